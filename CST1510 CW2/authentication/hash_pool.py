@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+# How many worker processes do bcrypt work (0 = run in the calling thread)
+HASH_WORKERS = min(4, os.cpu_count() or 1)
+
+# Most hash jobs that may wait or run at the same time.
+# More than this and new logins are turned away straight away.
+MAX_PENDING = 32
+
+# Longest time (seconds) a login waits for its hash result
+HASH_TIMEOUT = 10.0
+
+# How many recent latencies we keep for the metrics
+LATENCY_SAMPLES = 1000
+
+
+class HashPoolBusyError(RuntimeError):
+    """Raised when too many hash jobs are already waiting."""
+
+
+class HashPoolTimeoutError(TimeoutError):
+    """Raised when a hash job does not finish in time."""
+
+
+def _hash_job(password):
+    # imported here so the worker process only loads what it needs
+    from authentication.security import hash_password
+    return hash_password(password)
+
+
+def _verify_job(password, hashed_password):
+    from authentication.security import verify_password
+    return verify_password(password, hashed_password)
+
+
+class HashPool:
+    """
+    Runs bcrypt in separate processes, so a burst of logins does not
+    freeze the Streamlit script thread (and the GIL does not matter).
+
+    - at most max_pending jobs at once, extra ones fail fast with
+      HashPoolBusyError
+    - each job has a timeout (HashPoolTimeoutError)
+    - latency of every job is recorded for stats()
+    """
+
+    def __init__(self, workers=HASH_WORKERS, max_pending=MAX_PENDING, timeout=HASH_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _get_executor(self):
+        """Start the worker processes the first time they are needed."""
+        if self._executor is None and self.workers > 0:
+            with self._lock:
+                if self._executor is None:
+                    # "spawn" starts clean workers. The default "fork" copies
+                    # this process with all its threads, and a lock another
+                    # thread held at that moment stays locked in the child.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def run(self, func, *args):
+        """Run one hash job and wait for the result."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HashPoolBusyError("too many logins at once, try again")
+            self._pending += 1
+
+        start = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            if executor is not None:
+                future = executor.submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+
+        if executor is None:
+            try:
+                result = func(*args)
+            finally:
+                self._release()
+        else:
+            # the slot is freed when the worker is really done, not when we
+            # stop waiting: a timed out job still runs in its process
+            future.add_done_callback(lambda _: self._release())
+            try:
+                result = future.result(timeout=self.timeout)
+            except FutureTimeout:
+                future.cancel()
+                with self._lock:
+                    self.timeouts += 1
+                raise HashPoolTimeoutError(
+                    f"password check took longer than {self.timeout} seconds"
+                )
+
+        with self._lock:
+            self.completed += 1
+            self._latencies.append(time.perf_counter() - start)
+        return result
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def hash_password(self, password):
+        return self.run(_hash_job, password)
+
+    def verify_password(self, password, hashed_password):
+        return self.run(_verify_job, password, hashed_password)
+
+    def stats(self):
+        """Counters and latency percentiles (milliseconds) of recent jobs."""
+        with self._lock:
+            samples = sorted(self._latencies)
+            stats = {
+                "workers": self.workers,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+        for name, q in [("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)]:
+            if samples:
+                stats[name] = samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+            else:
+                stats[name] = 0.0
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# One pool shared by every Streamlit session in this process
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool():
+    """Return the shared hash pool, creating it the first time."""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashPool()
+    return _pool
+
+
+def configure_hash_pool(**options):
+    """Replace the shared pool with one using other options (e.g. workers=0)."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = HashPool(**options)
+    return _pool
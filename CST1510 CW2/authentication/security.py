@@ -1,5 +1,12 @@
+import sqlite3
+
 import bcrypt
-from hive_database.user import add_user, get_user, check_user_exists
+from hive_database.user import add_user, get_user, user_cache
+from authentication.hash_pool import HashPoolBusyError, HashPoolTimeoutError, get_hash_pool
+from authentication.throttle import get_login_throttle
+
+# Message shown when the hash workers are overloaded
+BUSY_MESSAGE = "Login service is busy, please try again in a moment"
 
 
 def hash_password(password):
@@ -76,37 +83,68 @@ def register_user(username, password, role):
     Create a new user account.
 
     Steps:
-    1. Check if the username already exists.
-    2. Hash the password.
-    3. Save the new user in the database.
+    1. Hash the password (in the hash worker pool).
+    2. Save the new user with one INSERT. If the username is taken,
+       the UNIQUE constraint on users.username stops it.
 
     Returns:
     (True, user_id) if success,
     (False, message) if something is wrong.
     """
-    if check_user_exists(username):
+    # quick answer if we already know this name is taken (no database call)
+    found, record = user_cache.lookup(username)
+    if found and record is not None:
         return False, "Username already exists"
 
-    hashed = hash_password(password)
-    user_id = add_user(username, hashed, role)
+    try:
+        hashed = get_hash_pool().hash_password(password)
+    except (HashPoolBusyError, HashPoolTimeoutError):
+        return False, BUSY_MESSAGE
+
+    try:
+        user_id = add_user(username, hashed, role)
+    except sqlite3.IntegrityError:
+        return False, "Username already exists"
+    except sqlite3.OperationalError:
+        # e.g. the database stayed locked by another program
+        return False, BUSY_MESSAGE
 
     return True, user_id
 
 
-def login_user(username, password):
+def login_user(username, password, client=None):
     """
     Log in a user.
 
     Steps:
-    1. Find the user in the database.
-    2. Check the password.
+    1. Ask the login throttle if this username / client may try again.
+       Too many attempts are refused here, before any bcrypt work.
+    2. Find the user in the database.
+    3. Check the password (in the hash worker pool, so the page
+       does not freeze while bcrypt runs).
+
+    client: something that identifies the browser, like its IP address.
     """
+    throttle = get_login_throttle()
+
+    allowed, wait = throttle.check(username, client)
+    if not allowed:
+        return False, f"Too many login attempts, try again in {wait} seconds"
+
     user = get_user(username)
 
     if not user:
+        throttle.record_failure(username, client)
         return False, "Username not found"
 
-    if verify_password(password, user["password_hash"]):
+    try:
+        matches = get_hash_pool().verify_password(password, user["password_hash"])
+    except (HashPoolBusyError, HashPoolTimeoutError):
+        return False, BUSY_MESSAGE
+
+    if matches:
+        throttle.record_success(username, client)
         return True, user
 
+    throttle.record_failure(username, client)
     return False, "Invalid password"
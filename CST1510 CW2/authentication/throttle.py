@@ -0,0 +1,255 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# --- token bucket: how often a username or client may try to log in ---
+BUCKET_CAPACITY = 10          # attempts allowed in a quick burst
+REFILL_PER_SECOND = 1 / 6     # then one new attempt every 6 seconds
+
+# --- backoff: what happens after wrong passwords ---
+FREE_FAILURES = 3             # wrong passwords allowed before waiting starts
+BACKOFF_BASE = 2.0            # first wait in seconds, doubled every failure
+BACKOFF_MAX = 15 * 60.0       # never wait longer than 15 minutes
+
+# Most usernames/clients we track in memory (oldest are forgotten first)
+MAX_TRACKED_KEYS = 10000
+
+# Save the state in the login_throttle table so it survives a restart
+THROTTLE_PERSIST = False
+
+# Only set this to True when the app runs behind our own reverse proxy
+# that adds the X-Forwarded-For header. Without such a proxy the header
+# comes straight from the browser, and an attacker could send a new
+# address with every attempt so their client bucket never fills.
+TRUST_PROXY_HEADER = False
+
+# Client key for every attempt whose address we do not know. They all
+# share one bucket, so a hidden address gives no extra attempts.
+UNKNOWN_CLIENT = "unknown"
+
+
+class LoginThrottle:
+    """
+    Stops password guessing before bcrypt runs.
+
+    Every login attempt is checked against two keys, "user:<name>" and
+    "client:<address>". Each key has:
+    - a token bucket that limits how fast attempts can come in, and
+    - a failure counter that adds a growing wait after wrong passwords.
+
+    If any key is over its limit, the attempt is refused straight away,
+    so an attack costs almost no CPU.
+    """
+
+    def __init__(
+        self,
+        capacity=BUCKET_CAPACITY,
+        refill_per_second=REFILL_PER_SECOND,
+        free_failures=FREE_FAILURES,
+        backoff_base=BACKOFF_BASE,
+        backoff_max=BACKOFF_MAX,
+        max_keys=MAX_TRACKED_KEYS,
+        persist=THROTTLE_PERSIST,
+        enabled=True,
+    ):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.free_failures = free_failures
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_keys = max_keys
+        self.persist = persist
+        self.enabled = enabled
+
+        # key -> {"tokens", "updated", "failures", "locked_until"}
+        self._state = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.refused = 0
+
+    # ---------- state ----------
+
+    def _load(self, key):
+        """Read a key's saved state from the database (only if persist is on)."""
+        from hive_database.connection import read_connection
+
+        with read_connection() as conn:
+            row = conn.execute(
+                "SELECT tokens, updated, failures, locked_until "
+                "FROM login_throttle WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+        if row is None:
+            return None
+        return {
+            "tokens": row[0],
+            "updated": row[1],
+            "failures": row[2],
+            "locked_until": row[3],
+        }
+
+    def _save(self, changed):
+        """
+        Save [(key, state copy)] in one write.
+
+        Called after the lock is released, so two saves of the same key
+        can arrive in either order: the WHERE keeps the newer one.
+        """
+        if not self.persist or not changed:
+            return
+
+        from hive_database.connection import write
+
+        rows = [
+            (key, state["tokens"], state["updated"], state["failures"], state["locked_until"])
+            for key, state in changed
+        ]
+        write(lambda conn: conn.executemany(
+            "INSERT INTO login_throttle (key, tokens, updated, failures, locked_until) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, "
+            "updated = excluded.updated, failures = excluded.failures, "
+            "locked_until = excluded.locked_until "
+            "WHERE excluded.updated >= login_throttle.updated",
+            rows,
+        ))
+
+    def _get(self, key, now):
+        """Return the state of a key with its bucket refilled up to now."""
+        state = self._state.get(key)
+        if state is None:
+            state = self._load(key) if self.persist else None
+            if state is None:
+                state = {
+                    "tokens": float(self.capacity),
+                    "updated": now,
+                    "failures": 0,
+                    "locked_until": 0.0,
+                }
+            self._state[key] = state
+            while len(self._state) > self.max_keys:
+                self._state.popitem(last=False)
+
+        self._state.move_to_end(key)
+
+        elapsed = max(0.0, now - state["updated"])
+        state["tokens"] = min(self.capacity, state["tokens"] + elapsed * self.refill_per_second)
+        state["updated"] = now
+        return state
+
+    @staticmethod
+    def keys_for(username, client=None):
+        keys = [f"user:{username.lower()}"]
+        if client:
+            keys.append(f"client:{client}")
+        return keys
+
+    # ---------- public api ----------
+
+    def check(self, username, client=None):
+        """
+        Decide if a login attempt may go ahead.
+
+        Returns (True, 0) and uses one token of each key, or
+        (False, seconds to wait) without using anything.
+        """
+        if not self.enabled:
+            return True, 0
+
+        now = time.time()
+        with self._lock:
+            keys = self.keys_for(username, client)
+            states = [self._get(key, now) for key in keys]
+
+            wait = 0.0
+            for state in states:
+                if state["locked_until"] > now:
+                    wait = max(wait, state["locked_until"] - now)
+                if state["tokens"] < 1:
+                    wait = max(wait, (1 - state["tokens"]) / self.refill_per_second)
+
+            if wait > 0:
+                self.refused += 1
+                return False, math.ceil(wait)
+
+            changed = []
+            for key, state in zip(keys, states):
+                state["tokens"] -= 1
+                changed.append((key, dict(state)))
+            self.allowed += 1
+
+        # the used tokens are saved too, or a restart would refill the buckets
+        self._save(changed)
+        return True, 0
+
+    def record_failure(self, username, client=None):
+        """Count a wrong password (or unknown user) and start the backoff."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            changed = []
+            for key in self.keys_for(username, client):
+                state = self._get(key, now)
+                state["failures"] += 1
+                extra = state["failures"] - self.free_failures
+                if extra > 0:
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** (extra - 1))
+                    state["locked_until"] = now + delay
+                changed.append((key, dict(state)))
+
+        self._save(changed)
+
+    def record_success(self, username, client=None):
+        """A correct password clears the failures of that username and client."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            changed = []
+            for key in self.keys_for(username, client):
+                state = self._get(key, now)
+                if state["failures"] or state["locked_until"]:
+                    state["failures"] = 0
+                    state["locked_until"] = 0.0
+                    changed.append((key, dict(state)))
+
+        self._save(changed)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tracked_keys": len(self._state),
+                "allowed": self.allowed,
+                "refused": self.refused,
+            }
+
+
+# One throttle shared by every Streamlit session
+_throttle = None
+_throttle_lock = threading.Lock()
+
+
+def get_login_throttle():
+    """Return the shared login throttle, creating it the first time."""
+    global _throttle
+
+    if _throttle is None:
+        with _throttle_lock:
+            if _throttle is None:
+                _throttle = LoginThrottle()
+    return _throttle
+
+
+def configure_login_throttle(**options):
+    """Replace the shared throttle, e.g. configure_login_throttle(persist=True)."""
+    global _throttle
+
+    with _throttle_lock:
+        _throttle = LoginThrottle(**options)
+    return _throttle
@@ -0,0 +1,183 @@
+"""
+Check that the SQL aggregates give the same numbers as the old pandas code,
+and compare how long both take.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.aggregate_parity
+
+Exits with code 1 if any number is different.
+"""
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import build_database
+from hive_database.aggregates import (
+    box_stats,
+    column_stat,
+    count_where,
+    group_stats,
+    quantile,
+    value_counts,
+)
+from hive_database.connection import configure_database
+from hive_database.data_loader import (
+    count_rows,
+    load_cyber_incidents,
+    load_datasets_metadata,
+    load_it_tickets,
+)
+
+ROWS = 100000
+
+
+def same(a, b):
+    """Compare numbers, Series and DataFrames with a small float tolerance."""
+    if isinstance(a, pd.Series):
+        return same(a.to_dict(), b.to_dict())
+    if isinstance(a, pd.DataFrame):
+        return same(a.to_dict(), b.to_dict())
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, float) or isinstance(b, float):
+        if math.isnan(a) and math.isnan(b):
+            return True
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+def checks(cyber, tickets, datasets):
+    """(name, old pandas version, new SQL version) for every pushed-down number."""
+    phishing = cyber[cyber["category"] == "Phishing"]
+
+    old_staff = tickets.groupby("assigned_to").agg(
+        {"ticket_id": "count", "resolution_time_hours": "mean"}
+    ).rename(columns={"ticket_id": "total_tickets",
+                      "resolution_time_hours": "avg_resolution_time"})
+
+    old_sources = datasets.groupby("uploaded_by").agg(
+        {"dataset_id": "count", "rows": "sum"}
+    ).rename(columns={"dataset_id": "dataset_count", "rows": "total_rows"})
+
+    old_box = {}
+    for priority, values in tickets.groupby("priority")["resolution_time_hours"]:
+        old_box[priority] = {
+            "min": values.min(), "q1": values.quantile(0.25),
+            "median": values.quantile(0.5), "q3": values.quantile(0.75),
+            "max": values.max(),
+        }
+
+    return [
+        # --- cybersecurity.py ---
+        ("total incidents", lambda: len(cyber), lambda: count_rows("cyber_incidents")),
+        ("open incidents",
+         lambda: len(cyber[cyber["status"] == "Open"]),
+         lambda: count_where("cyber_incidents", status="Open")),
+        ("critical incidents",
+         lambda: len(cyber[cyber["severity"] == "Critical"]),
+         lambda: count_where("cyber_incidents", severity="Critical")),
+        ("phishing incidents",
+         lambda: len(phishing),
+         lambda: count_where("cyber_incidents", category="Phishing")),
+        ("phishing open / in progress",
+         lambda: len(phishing[phishing["status"].isin(["Open", "In Progress"])]),
+         lambda: count_where("cyber_incidents", category="Phishing",
+                             status=["Open", "In Progress"])),
+        ("incidents by category",
+         lambda: cyber["category"].value_counts(),
+         lambda: value_counts("cyber_incidents", "category")),
+        ("incidents by severity",
+         lambda: cyber["severity"].value_counts(),
+         lambda: value_counts("cyber_incidents", "severity")),
+        ("phishing by status",
+         lambda: phishing["status"].value_counts(),
+         lambda: value_counts("cyber_incidents", "status",
+                              filters={"category": ["Phishing"]})),
+        # --- it_tickets.py ---
+        ("open tickets",
+         lambda: len(tickets[tickets["status"] == "Open"]),
+         lambda: count_where("it_tickets", status="Open")),
+        ("average resolution",
+         lambda: tickets["resolution_time_hours"].mean(),
+         lambda: column_stat("it_tickets", "resolution_time_hours", "mean")),
+        ("tickets per agent",
+         lambda: tickets["assigned_to"].value_counts(),
+         lambda: value_counts("it_tickets", "assigned_to")),
+        ("staff performance",
+         lambda: old_staff,
+         lambda: group_stats("it_tickets", "assigned_to", {
+             "total_tickets": ("ticket_id", "count"),
+             "avg_resolution_time": ("resolution_time_hours", "mean"),
+         })),
+        ("status bottleneck",
+         lambda: tickets.groupby("status")["resolution_time_hours"].mean(),
+         lambda: group_stats("it_tickets", "status", {
+             "resolution_time_hours": ("resolution_time_hours", "mean"),
+         })["resolution_time_hours"]),
+        ("priority box plot",
+         lambda: old_box,
+         lambda: box_stats("it_tickets", "resolution_time_hours", "priority").to_dict("index")),
+        # --- data_science.py ---
+        ("total dataset rows",
+         lambda: int(datasets["rows"].sum()),
+         lambda: int(column_stat("datasets_metadata", "rows", "sum"))),
+        ("data sources",
+         lambda: datasets["uploaded_by"].nunique(),
+         lambda: column_stat("datasets_metadata", "uploaded_by", "nunique")),
+        ("rows per source",
+         lambda: datasets.groupby("uploaded_by")["rows"].sum(),
+         lambda: group_stats("datasets_metadata", "uploaded_by",
+                             {"rows": ("rows", "sum")})["rows"]),
+        ("source summary", lambda: old_sources,
+         lambda: group_stats("datasets_metadata", "uploaded_by", {
+             "dataset_count": ("dataset_id", "count"),
+             "total_rows": ("rows", "sum"),
+         })),
+        ("75th percentile rows",
+         lambda: datasets["rows"].quantile(0.75),
+         lambda: quantile("datasets_metadata", "rows", 0.75)),
+    ]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "parity.db"
+        build_database(path, incidents=ROWS, tickets=ROWS, datasets=500)
+        manager = configure_database(path)
+
+        start = time.perf_counter()
+        cyber = load_cyber_incidents()
+        tickets = load_it_tickets()
+        datasets = load_datasets_metadata()
+        load_time = time.perf_counter() - start
+
+        failures = 0
+        pandas_time = sql_time = 0.0
+        for name, old, new in checks(cyber, tickets, datasets):
+            start = time.perf_counter()
+            expected = old()
+            pandas_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = new()
+            sql_time += time.perf_counter() - start
+
+            ok = same(expected, actual)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name}")
+
+        manager.close_all()
+
+    print(f"\n{ROWS} incidents and {ROWS} tickets")
+    print(f"pandas: {load_time:.3f} s loading + {pandas_time:.3f} s computing")
+    print(f"SQL:    {sql_time:.3f} s")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Check the AI client's deadline, retries, concurrency limit and fallback
+against the local stub API (no OpenAI key or network needed).
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.ai_client_check
+
+Exits with code 1 if any check fails.
+"""
+import socket
+import sys
+import threading
+import time
+
+from benchmarks.stub_ai_server import start_stub_server
+from jarvis.client import AIClient, AIUnavailableError
+
+MESSAGES = [{"role": "user", "content": "How many critical incidents are open?"}]
+
+failures = []
+
+
+def check(name, ok, detail=""):
+    print(f"{'ok  ' if ok else 'FAIL'} {name:<42} {detail}")
+    if not ok:
+        failures.append(name)
+
+
+def ask(client):
+    """Return (answer or None, error text or None, seconds)."""
+    start = time.perf_counter()
+    try:
+        return client.complete(MESSAGES), None, time.perf_counter() - start
+    except AIUnavailableError as e:
+        return None, str(e), time.perf_counter() - start
+
+
+def stub_client(port, **options):
+    options.setdefault("retry_base", 0.05)
+    return AIClient(api_key="stub", base_url=f"http://127.0.0.1:{port}/v1", **options)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    server, state = start_stub_server(first_token_delay=0.05, token_delay=0.0)
+    port = server.server_port
+
+    client = stub_client(port)
+    answer, error, _ = ask(client)
+    check("healthy service answers", answer is not None, error or "")
+
+    state.fail_with = [503, 429]
+    client = stub_client(port)
+    answer, error, _ = ask(client)
+    check("503 then 429 are retried", answer is not None and client.retries == 2,
+          f"retries={client.retries}")
+
+    state.fail_with = [401]
+    client = stub_client(port)
+    answer, error, _ = ask(client)
+    check("401 is not retried", answer is None and client.retries == 0, error or "")
+
+    state.fail_with = [503] * 5
+    client = stub_client(port, max_retries=2)
+    answer, error, _ = ask(client)
+    check("gives up after max_retries", answer is None and client.retries == 2, error or "")
+    state.fail_with = []
+
+    client = stub_client(free_port(), max_retries=1)
+    answer, error, seconds = ask(client)
+    check("unreachable service falls back", answer is None, f"{seconds:.2f} s, {error}")
+    errors = client.stats()["errors"]
+    check("failed requests are in the metrics", errors == 2, f"errors={errors}")
+
+    slow, _ = start_stub_server(first_token_delay=3.0)
+    client = stub_client(slow.server_port, deadline=0.5)
+    answer, error, seconds = ask(client)
+    check("deadline stops a slow service", answer is None and seconds < 1.5,
+          f"{seconds:.2f} s, {error}")
+    slow.shutdown()
+
+    # every piece comes quickly enough for the read timeout, the whole answer does not
+    trickle, _ = start_stub_server(first_token_delay=0.05, token_delay=0.3)
+    client = stub_client(trickle.server_port, deadline=1.0)
+    answer, error, seconds = ask(client)
+    check("deadline stops a trickling answer", answer is None and seconds < 1.6,
+          f"{seconds:.2f} s, {error}")
+    trickle.shutdown()
+
+    # 12 questions at once, at most 3 may reach the service together
+    busy, busy_state = start_stub_server(first_token_delay=0.3, token_delay=0.0)
+    client = stub_client(busy.server_port, max_concurrent=3, queue_wait=0.5)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(ask(client))) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    answered = sum(1 for answer, _, _ in results if answer is not None)
+    check("at most max_concurrent requests at once", busy_state.peak_active <= 3,
+          f"peak {busy_state.peak_active}, {answered} answered, {client.rejected} sent to fallback")
+    busy.shutdown()
+
+    stats = client.stats()
+    print("\ntotal latency histogram of the concurrency run:")
+    for label, count in client.metrics.histogram("total"):
+        print(f"  {label:>10} {'#' * count} {count}")
+    print(f"p50 {stats['total_p50_ms']:.0f} ms, p95 {stats['total_p95_ms']:.0f} ms")
+
+    server.shutdown()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
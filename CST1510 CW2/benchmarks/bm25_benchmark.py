@@ -0,0 +1,92 @@
+"""
+Build time, memory, query time and update cost of the BM25 search index.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.bm25_benchmark [rows]
+
+The default is 1,000,000 incident rows. "index" is the size of the numpy
+arrays, "peak RSS" the most memory the whole process used so far.
+"""
+import random
+import sys
+import tempfile
+import time
+import resource
+from pathlib import Path
+
+from benchmarks.synthetic import WORDS, build_database
+from hive_database.connection import configure_database, db_connection, setup_database
+from jarvis.retrieval import BM25Index
+
+DEFAULT_ROWS = 1000000
+QUERIES = 200
+UPDATES = 10000
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"creating {rows:,} incidents...")
+        build_database(Path(tmp) / "bm25.db", incidents=rows, tickets=0, datasets=0)
+        manager = configure_database(Path(tmp) / "bm25.db")
+        setup_database()
+
+        index = BM25Index("cyber_incidents")
+        start = time.perf_counter()
+        index.build()
+        build_seconds = time.perf_counter() - start
+        arrays = sum(a.nbytes for a in [index.row_ids, index.lengths, index.alive,
+                                        index.offsets, index.post_slots, index.post_tf])
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        stats = index.stats()
+        print(f"build        : {build_seconds:8.2f} s, index {arrays / 2**20:,.0f} MB, "
+              f"peak RSS {peak_rss:,.0f} MB, {stats['words']} words, "
+              f"{stats['postings']:,} postings")
+
+        for terms in (1, 2, 4):
+            times = []
+            for _ in range(QUERIES):
+                query = " ".join(rng.sample(WORDS, terms))
+                start = time.perf_counter()
+                index.search(query)
+                times.append(time.perf_counter() - start)
+            print(f"query {terms} word{'s' if terms > 1 else ' '}: p50 {percentile(times, 0.5) * 1000:7.1f} ms, "
+                  f"p95 {percentile(times, 0.95) * 1000:7.1f} ms")
+
+        # change UPDATES descriptions through SQL; the triggers log them
+        with db_connection() as conn:
+            ids = [row[0] for row in conn.execute(
+                "SELECT incident_id FROM cyber_incidents ORDER BY RANDOM() LIMIT ?", (UPDATES,)
+            )]
+            conn.executemany(
+                "UPDATE cyber_incidents SET description = ? WHERE incident_id = ?",
+                [(f"updated {' '.join(rng.sample(WORDS, 4))}", i) for i in ids],
+            )
+            conn.commit()
+
+        start = time.perf_counter()
+        index.search("vpn")   # applies the changes first
+        refresh_seconds = time.perf_counter() - start
+        print(f"refresh      : {UPDATES:,} changed rows in {refresh_seconds:.2f} s "
+              f"({UPDATES / refresh_seconds:,.0f} rows/s, no rebuild: builds={index.stats()['builds']})")
+
+        start = time.perf_counter()
+        index._compact()
+        print(f"compaction   : {time.perf_counter() - start:8.2f} s")
+
+        start = time.perf_counter()
+        hits = index.search("updated vpn")
+        print(f"after update : {(time.perf_counter() - start) * 1000:7.1f} ms, best match {hits[:1]}")
+
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
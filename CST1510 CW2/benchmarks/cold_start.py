@@ -0,0 +1,140 @@
+"""
+Cold start and first render time of every page.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.cold_start
+
+Each page runs in a fresh Python process (nothing imported yet) with
+Streamlit's AppTest, against a synthetic database:
+- cold:  first run of the script, including all of its imports
+- rerun: the same script again, like after a click
+- heavy: which of pandas / plotly / openai the first run had to import
+  (AppTest itself imports plotly, so it only shows up in a real server)
+
+It also times setup_database() the first time and on later reruns.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import build_database
+
+APP_DIR = Path(__file__).parent.parent
+
+PAGES = [
+    "login.py",
+    "pages/dash.py",
+    "pages/cybersecurity.py",
+    "pages/it_tickets.py",
+    "pages/data_science.py",
+    "pages/ai_aid.py",
+]
+
+HEAVY_MODULES = ["pandas", "plotly", "openai"]
+
+RERUNS = 5
+
+
+def measure_page(page, db_path):
+    """Run inside the child process. Prints one JSON line with the timings."""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import streamlit.delta_generator as delta_generator
+    from hive_database.connection import configure_database
+    streamlit_seconds = time.perf_counter() - start
+
+    # page_link needs the real multipage app, AppTest runs one file only
+    delta_generator.DeltaGenerator.page_link = lambda self, *args, **kwargs: None
+
+    configure_database(db_path)
+    before = {name for name in HEAVY_MODULES if name in sys.modules}
+
+    at = AppTest.from_file(str(APP_DIR / page), default_timeout=120)
+    if page != "login.py":
+        at.session_state["logged_in"] = True
+        at.session_state["username"] = "benchmark"
+        at.session_state["role"] = "agent"
+
+    start = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - start
+
+    reruns = []
+    for _ in range(RERUNS):
+        start = time.perf_counter()
+        at.run()
+        reruns.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        "page": page,
+        "streamlit": streamlit_seconds,
+        "cold": cold,
+        "rerun": sorted(reruns)[len(reruns) // 2],
+        "heavy": [name for name in HEAVY_MODULES if name in sys.modules and name not in before],
+        "errors": [str(e.value) for e in at.exception],
+    }))
+
+
+def measure_setup(db_path):
+    """Time setup_database() on the first call and on later calls."""
+    from hive_database.connection import configure_database, setup_database
+
+    configure_database(db_path)
+    start = time.perf_counter()
+    first = setup_database()
+    first_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        setup_database()
+    again_seconds = (time.perf_counter() - start) / 1000
+
+    start = time.perf_counter()
+    setup_database(force=True)
+    forced_seconds = time.perf_counter() - start
+
+    print(f"setup_database first call: {first_seconds * 1000:8.2f} ms ({first})")
+    print(f"setup_database again:      {again_seconds * 1000:8.4f} ms (skipped)")
+    print(f"setup_database force=True: {forced_seconds * 1000:8.2f} ms (fingerprint check)")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "cold_start.db"
+        build_database(db_path, incidents=20000, tickets=20000, datasets=200)
+
+        print(f"{'page':<24} {'import st':>9} {'cold ms':>9} {'rerun ms':>9}  heavy modules loaded")
+        for page in PAGES:
+            result = subprocess.run(
+                [sys.executable, "-m", "benchmarks.cold_start", page, str(db_path)],
+                cwd=APP_DIR,
+                capture_output=True,
+                text=True,
+                env={**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "")},
+            )
+            lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+            if not lines:
+                print(f"{page:<24} failed: {result.stderr.strip().splitlines()[-1:]}")
+                continue
+
+            row = json.loads(lines[-1])
+            print(
+                f"{page:<24} {row['streamlit'] * 1000:>9.0f} {row['cold'] * 1000:>9.0f} "
+                f"{row['rerun'] * 1000:>9.0f}  {', '.join(row['heavy']) or '-'}"
+            )
+            if row["errors"]:
+                print(f"   errors: {row['errors'][:1]}")
+
+        print()
+        measure_setup(db_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        measure_page(sys.argv[1], sys.argv[2])
+    else:
+        main()
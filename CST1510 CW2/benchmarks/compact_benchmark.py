@@ -0,0 +1,204 @@
+"""
+File size and query speed of the live TEXT tables against the compact
+format (epoch times and coded words, see hive_database/compact.py).
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.compact_benchmark [rows]
+
+The default is 1,000,000 incidents and 1,000,000 tickets. Both files have
+the same indexes (the dashboard indexes of schema version 3), nothing else.
+Each query runs on the TEXT table, on the compatibility view and, where
+it helps, straight on the coded *_data table.
+
+Before timing, it checks that the views give back every live row exactly.
+A few odd rows are added first for that: a time with microseconds, one
+with a "T", one that is not a time, a date only. A small file without the
+NOT NULL rules checks rows with NULL times and words the same way.
+Exits with code 1 if a row is different.
+"""
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.synthetic import build_database
+from hive_database.compact import COMPACT_TABLES, write_compact_copy
+from hive_database.data_loader import TABLE_COLUMNS, TABLE_KEYS
+
+DEFAULT_ROWS = 1000000
+RUNS = 3
+
+
+def epoch(text):
+    return int(datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp())
+
+
+# name -> (SQL on the TEXT table / the view, the same on the codes)
+QUERIES = {
+    "June incidents (range)": (
+        "SELECT COUNT(*) FROM cyber_incidents "
+        "WHERE timestamp >= '2024-06-01' AND timestamp < '2024-07-01'",
+        f"SELECT COUNT(*) FROM cyber_incidents_data "
+        f"WHERE timestamp_epoch >= {epoch('2024-06-01')} "
+        f"AND timestamp_epoch < {epoch('2024-07-01')}",
+    ),
+    "incidents per severity": (
+        "SELECT severity, COUNT(*) FROM cyber_incidents GROUP BY severity",
+        "SELECT l.name, n FROM (SELECT severity_id, COUNT(*) AS n "
+        "FROM cyber_incidents_data GROUP BY severity_id) "
+        "JOIN lookup_severity AS l ON l.id = severity_id",
+    ),
+    "phishing by status": (
+        "SELECT status, COUNT(*) FROM cyber_incidents "
+        "WHERE category = 'Phishing' GROUP BY status",
+        "SELECT l.name, n FROM (SELECT status_id, COUNT(*) AS n FROM cyber_incidents_data "
+        "WHERE category_id = (SELECT id FROM lookup_category WHERE name = 'Phishing') "
+        "GROUP BY status_id) JOIN lookup_status AS l ON l.id = status_id",
+    ),
+    "incidents per month": (
+        "SELECT substr(timestamp, 1, 7) AS month, COUNT(*) FROM cyber_incidents GROUP BY month",
+        "SELECT strftime('%Y-%m', timestamp_epoch, 'unixepoch') AS month, COUNT(*) "
+        "FROM cyber_incidents_data GROUP BY month",
+    ),
+    "staff performance": (
+        "SELECT assigned_to, COUNT(*), AVG(resolution_time_hours) "
+        "FROM it_tickets GROUP BY assigned_to",
+        "SELECT l.name, n, hours FROM (SELECT assigned_to_id, COUNT(*) AS n, "
+        "AVG(resolution_time_hours) AS hours FROM it_tickets_data GROUP BY assigned_to_id) "
+        "JOIN lookup_assignee AS l ON l.id = assigned_to_id",
+    ),
+    "open high tickets": (
+        "SELECT * FROM it_tickets WHERE status = 'Open' AND priority = 'High'",
+        "SELECT * FROM it_tickets_data "
+        "WHERE status_id = (SELECT id FROM lookup_status WHERE name = 'Open') "
+        "AND priority_id = (SELECT id FROM lookup_priority WHERE name = 'High')",
+    ),
+}
+
+
+# rows the compact copy must also give back as they are
+ODD_ROWS = {
+    "cyber_incidents": [
+        (1, "2024-06-01 12:00:00.123456", "High", "Malware", "Open", "microseconds"),
+        (2, "2024-06-01T12:00:00", "Low", "Phishing", "Closed", "T between date and time"),
+        (3, "last tuesday", "Medium", "Malware", "Open", "not a time"),
+    ],
+    "it_tickets": [
+        (1, "High", "date only", "Open", "IT_Support_A", "2024-06-01", 4.5),
+    ],
+}
+
+# rows the live schema does not allow (NOT NULL), but an older file might have
+NULL_ROWS = {
+    "cyber_incidents": [
+        (1, "2024-06-01 12:00:00.000000", "High", "Malware", "Open", "normal row"),
+        (2, None, None, None, None, None),
+    ],
+    "it_tickets": [
+        (1, None, "no priority", "Open", None, "2024-06-01 12:00:00", None),
+    ],
+}
+
+
+def add_rows(path, tables, create=False):
+    conn = sqlite3.connect(path)
+    with conn:
+        for table, rows in tables.items():
+            if create:
+                conn.execute(f"CREATE TABLE {table} ({', '.join(TABLE_COLUMNS[table])})")
+            marks = ", ".join("?" for _ in rows[0])
+            conn.executemany(f"INSERT INTO {table} VALUES ({marks})", rows)
+    conn.close()
+
+
+def check_round_trip(live, compact):
+    """Number of rows whose view row is not the same as the live row."""
+    different = 0
+    for table in COMPACT_TABLES:
+        order = f"SELECT * FROM {table} ORDER BY {TABLE_KEYS[table]}"
+        for old, new in zip(live.execute(order), compact.execute(order)):
+            if old != new:
+                different += 1
+                if different <= 5:
+                    print(f"   {table}: {old} != {new}")
+    return different
+
+
+def best_time(conn, sql):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def table_bytes(conn, names):
+    """Bytes used by the given tables and their indexes (needs dbstat)."""
+    marks = ", ".join("?" for _ in names)
+    return conn.execute(
+        f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({marks}) "
+        f"OR name IN (SELECT name FROM sqlite_master WHERE tbl_name IN ({marks}) "
+        f"AND type = 'index')",
+        names + names,
+    ).fetchone()[0]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        live_path = Path(tmp) / "live.db"
+        compact_path = Path(tmp) / "compact.db"
+
+        print(f"creating {rows:,} incidents and {rows:,} tickets...")
+        build_database(live_path, incidents=rows, tickets=rows, datasets=0, version=3)
+        add_rows(live_path, ODD_ROWS)
+        start = time.perf_counter()
+        report = write_compact_copy(compact_path, source=live_path)
+        print(f"compact copy written in {time.perf_counter() - start:.1f} s {report}\n")
+
+        live = sqlite3.connect(live_path)
+        compact = sqlite3.connect(compact_path)
+        different = check_round_trip(live, compact)
+
+        null_live = Path(tmp) / "null_live.db"
+        null_compact = Path(tmp) / "null_compact.db"
+        add_rows(null_live, NULL_ROWS, create=True)
+        write_compact_copy(null_compact, source=null_live)
+        a, b = sqlite3.connect(null_live), sqlite3.connect(null_compact)
+        different += check_round_trip(a, b)
+        a.close()
+        b.close()
+
+        print(f"round trip: {different} rows different\n")
+        if different:
+            sys.exit(1)
+        live.execute("ANALYZE")
+
+        live_size = table_bytes(live, ["cyber_incidents", "it_tickets"])
+        compact_size = table_bytes(compact, [
+            "cyber_incidents_data", "it_tickets_data", "lookup_severity",
+            "lookup_category", "lookup_status", "lookup_priority", "lookup_assignee",
+        ])
+        print(f"tables + indexes: TEXT {live_size / 2**20:,.0f} MB, "
+              f"compact {compact_size / 2**20:,.0f} MB "
+              f"({1 - compact_size / live_size:.0%} smaller)")
+        print(f"whole file      : TEXT {live_path.stat().st_size / 2**20:,.0f} MB, "
+              f"compact {compact_path.stat().st_size / 2**20:,.0f} MB\n")
+
+        print(f"{'query':<26} {'TEXT':>9} {'view':>9} {'codes':>9}")
+        for name, (sql, coded_sql) in QUERIES.items():
+            text_time = best_time(live, sql)
+            view_time = best_time(compact, sql)
+            coded = f"{best_time(compact, coded_sql) * 1000:7.1f}ms" if coded_sql else f"{'-':>9}"
+            print(f"{name:<26} {text_time * 1000:7.1f}ms {view_time * 1000:7.1f}ms {coded}")
+
+        live.close()
+        compact.close()
+
+
+if __name__ == "__main__":
+    main()
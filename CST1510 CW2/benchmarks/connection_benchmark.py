@@ -0,0 +1,74 @@
+"""
+Compare the old open-per-call connection path with the pooled manager.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.connection_benchmark
+"""
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from hive_database.connection import ConnectionManager
+
+CALLS = 5000
+THREADS = [1, 4, 8]
+
+
+def make_database(path):
+    """Create a small users table like the real one."""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "username TEXT NOT NULL UNIQUE, password_hash TEXT NOT NULL, role TEXT NOT NULL)"
+    )
+    conn.executemany(
+        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+        [(f"user{i}", "x" * 60, "agent") for i in range(1000)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def open_per_call(path, i):
+    """What get_db_connection() used to do for every helper call."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("SELECT * FROM users WHERE username = ?", (f"user{i % 1000}",)).fetchone()
+    conn.close()
+
+
+def pooled(manager, i):
+    conn = manager.acquire()
+    conn.execute("SELECT * FROM users WHERE username = ?", (f"user{i % 1000}",)).fetchone()
+    conn.close()
+
+
+def timed(func, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(func, range(CALLS)))
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        make_database(path)
+        manager = ConnectionManager(path)
+
+        print(f"{CALLS} single-row lookups per run\n")
+        print(f"{'threads':>8} {'open/close (s)':>15} {'pooled (s)':>12} {'speed-up':>9}")
+
+        for threads in THREADS:
+            old = timed(lambda i: open_per_call(path, i), threads)
+            new = timed(lambda i: pooled(manager, i), threads)
+            print(f"{threads:>8} {old:>15.3f} {new:>12.3f} {old / new:>8.1f}x")
+
+        print("\nPool state:", manager.health_check())
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Memory of the loaded incident and ticket frames before and after
+apply_dtypes (memory_usage(deep=True)), at 100,000 and 1,000,000 rows.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.dtype_memory [rows ...]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import build_database
+from hive_database.connection import configure_database, db_connection
+from hive_database.data_loader import apply_dtypes
+
+SIZES = [100000, 1000000]
+TABLES = ["cyber_incidents", "it_tickets"]
+
+
+def mb(n):
+    return f"{n / 2**20:8.1f} MB"
+
+
+def report(table, rows):
+    with db_connection() as conn:
+        start = time.perf_counter()
+        raw = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+        read_seconds = time.perf_counter() - start
+
+    before = raw.memory_usage(deep=True)
+    start = time.perf_counter()
+    typed = apply_dtypes(table, raw.copy())
+    convert_seconds = time.perf_counter() - start
+    after = typed.memory_usage(deep=True)
+
+    print(f"\n{table}, {rows:,} rows "
+          f"(read {read_seconds:.2f} s, dtypes {convert_seconds:.2f} s)")
+    print(f"  {'column':<22} {'before':>18} {'after':>22}")
+    for column in raw.columns:
+        print(f"  {column:<22} {mb(before[column])} {str(raw[column].dtype):>8} "
+              f"{mb(after[column])} {str(typed[column].dtype):>12}")
+    print(f"  {'total':<22} {mb(before.sum())} {'':>8} {mb(after.sum())} "
+          f"{before.sum() / after.sum():>11.1f}x")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = Path(tmp) / f"dtypes_{rows}.db"
+            build_database(path, incidents=rows, tickets=rows, datasets=0, version=1)
+            manager = configure_database(path)
+            for table in TABLES:
+                report(table, rows)
+            manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Search time of the FTS5 index (search_page) against a pandas
+str.contains scan of the loaded table.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.fts_benchmark [rows]
+
+The default is 1,000,000 incident rows. The fake descriptions only use
+about 20 words, so "vpn" is in a big part of the table (the worst case
+for the index). A few rows get a rare word as well.
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import build_database
+from hive_database.connection import configure_database, db_connection, setup_database
+from hive_database.data_loader import PAGE_SIZE, search_page
+
+DEFAULT_ROWS = 1000000
+RUNS = 5
+RARE_ROWS = 50
+
+SEARCHES = ["vpn", "vpn firewall", "zeroday", "pass"]
+
+
+def best_time(func):
+    """Fastest of RUNS runs, in seconds, and the last result."""
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def pandas_search(df, text):
+    """What a page would do without the index: scan every description."""
+    mask = df["description"].str.contains(text.split()[0], case=False, na=False)
+    for word in text.split()[1:]:
+        mask &= df["description"].str.contains(word, case=False, na=False)
+    hits = df[mask]
+    return len(hits), hits.head(PAGE_SIZE)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "fts.db"
+        print(f"creating {rows:,} incidents...")
+        start = time.perf_counter()
+        build_database(path, incidents=rows, tickets=0, datasets=0)
+        print(f"insert with FTS triggers: {time.perf_counter() - start:.1f} s")
+
+        manager = configure_database(path)
+        setup_database()
+
+        with db_connection() as conn:
+            ids = [row[0] for row in conn.execute(
+                "SELECT incident_id FROM cyber_incidents ORDER BY RANDOM() LIMIT ?",
+                (RARE_ROWS,),
+            )]
+            conn.executemany(
+                "UPDATE cyber_incidents SET description = description || ' zeroday' "
+                "WHERE incident_id = ?",
+                [(i,) for i in ids],
+            )
+            conn.commit()
+
+            start = time.perf_counter()
+            conn.execute("INSERT INTO cyber_incidents_fts (cyber_incidents_fts) VALUES ('rebuild')")
+            conn.commit()
+            print(f"full index rebuild      : {time.perf_counter() - start:.1f} s")
+
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            fts_pages = conn.execute(
+                "SELECT COUNT(*) FROM dbstat WHERE name LIKE 'cyber_incidents_fts%'"
+            ).fetchone()[0] if _has_dbstat(conn) else None
+
+        size = f", index {fts_pages / pages:.0%} of the file" if fts_pages else ""
+        print(f"database file           : {pages * page_size / 2**20:,.0f} MB{size}\n")
+
+        import pandas as pd
+
+        start = time.perf_counter()
+        with db_connection() as conn:
+            df = pd.read_sql_query("SELECT * FROM cyber_incidents", conn)
+        print(f"pandas load of the table: {time.perf_counter() - start:.2f} s "
+              f"(paid once per data version)\n")
+
+        print(f"{'search':<14} {'matches':>9} {'FTS page 1':>11} {'FTS page 20':>12} "
+              f"{'pandas scan':>12} {'speed-up':>9}")
+        for text in SEARCHES:
+            fts_first, page = best_time(lambda: search_page("cyber_incidents", text))
+            fts_later, _ = best_time(
+                lambda: search_page("cyber_incidents", text, cursor=19 * PAGE_SIZE)
+            )
+            scan, (matches, _) = best_time(lambda: pandas_search(df, text))
+
+            # prefix search is the same as a substring scan only at word starts
+            note = "" if page["total"] == matches else f"  (pandas {matches:,})"
+            print(f"{text:<14} {page['total']:>9,} {fts_first * 1000:>9.1f}ms "
+                  f"{fts_later * 1000:>10.1f}ms {scan * 1000:>10.1f}ms "
+                  f"{scan / fts_first:>8.1f}x{note}")
+
+        # a random single-row change, as a page would make it
+        incident = rng.choice(ids)
+        start = time.perf_counter()
+        with db_connection() as conn:
+            conn.execute(
+                "UPDATE cyber_incidents SET description = ? WHERE incident_id = ?",
+                ("vpn tunnel dropped", incident),
+            )
+            conn.commit()
+        print(f"\none description update (trigger keeps the index in sync): "
+              f"{(time.perf_counter() - start) * 1000:.2f} ms")
+
+        manager.close_all()
+
+
+def _has_dbstat(conn):
+    try:
+        conn.execute("SELECT 1 FROM dbstat LIMIT 1")
+        return True
+    except Exception:
+        return False
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare the old pandas CSV fallback with the chunked ingestion engine.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.ingest_benchmark [rows]
+
+The default is 1,000,000 incident rows. Peak memory is measured with
+tracemalloc, so it counts Python and numpy allocations.
+"""
+import csv
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import make_incidents
+from hive_database.connection import configure_database
+from hive_database.data_loader import TABLE_COLUMNS
+from hive_database.ingest import format_report, import_csv
+
+DEFAULT_ROWS = 1000000
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(TABLE_COLUMNS["cyber_incidents"])
+        writer.writerows(make_incidents(rows))
+
+
+def measure(func):
+    """Run func and return (result, seconds, peak MB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def old_fallback(db_path, csv_path):
+    """What load_table used to do: read everything, then to_sql replace."""
+    conn = sqlite3.connect(db_path)
+    df = pd.read_csv(csv_path)
+    df.to_sql("cyber_incidents", conn, if_exists="replace", index=False)
+    conn.close()
+    return len(df)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        csv_path = tmp / "incidents.csv"
+        write_csv(csv_path, rows)
+        print(f"CSV with {rows:,} rows ({csv_path.stat().st_size / 1024 / 1024:.0f} MB)\n")
+
+        _, seconds, peak = measure(lambda: old_fallback(tmp / "old.db", csv_path))
+        print(f"pandas read_csv + to_sql: {seconds:6.2f} s, "
+              f"{rows / seconds:,.0f} rows/s, peak {peak:,.0f} MB")
+
+        manager = configure_database(tmp / "new.db")
+        report, seconds, peak = measure(lambda: import_csv("cyber_incidents", csv_path))
+        print(f"chunked import_csv:       {seconds:6.2f} s, "
+              f"{rows / seconds:,.0f} rows/s, peak {peak:,.0f} MB")
+        print("  ", format_report(report))
+
+        report = import_csv("cyber_incidents", csv_path)
+        print("second import of the same file:", format_report(report))
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
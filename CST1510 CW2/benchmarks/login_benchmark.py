@@ -0,0 +1,77 @@
+"""
+Login throughput with bcrypt in the calling thread vs the hash worker pool.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.login_benchmark
+
+Users are stored with a cheaper bcrypt cost (ROUNDS) than the app uses,
+only so the benchmark finishes quickly; the ratio between modes is the same.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import bcrypt
+
+from authentication.hash_pool import configure_hash_pool
+from authentication.security import login_user
+from hive_database.connection import configure_database, setup_database
+from hive_database.user import add_user
+
+ROUNDS = 10
+USERS = 8
+LOGINS_PER_THREAD = 4
+CONCURRENCY = [1, 2, 4, 8]
+
+
+def run_level(threads):
+    """Run threads * LOGINS_PER_THREAD logins, return (logins/s, p95 ms, failures)."""
+    latencies = []
+
+    def one_login(i):
+        start = time.perf_counter()
+        ok, _ = login_user(f"agent{i % USERS}", "Secret123")
+        latencies.append(time.perf_counter() - start)
+        return ok
+
+    total = threads * LOGINS_PER_THREAD
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one_login, range(total)))
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] * 1000
+    return total / seconds, p95, results.count(False)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = configure_database(Path(tmp) / "login.db")
+        setup_database()
+
+        salt = bcrypt.gensalt(rounds=ROUNDS)
+        hashed = bcrypt.hashpw(b"Secret123", salt).decode("utf-8")
+        for i in range(USERS):
+            add_user(f"agent{i}", hashed, "agent")
+
+        workers = os.cpu_count() or 1
+        print(f"{os.cpu_count()} CPUs, bcrypt cost {ROUNDS}\n")
+        print(f"{'mode':<16} {'threads':>7} {'logins/s':>9} {'p95 ms':>8} {'failed':>7}")
+
+        for mode, options in [("inline", {"workers": 0}), (f"pool ({workers})", {"workers": workers})]:
+            pool = configure_hash_pool(**options)
+            pool.verify_password("warm", hashed)  # start the workers first
+            for threads in CONCURRENCY:
+                rate, p95, failed = run_level(threads)
+                print(f"{mode:<16} {threads:>7} {rate:>9.1f} {p95:>8.0f} {failed:>7}")
+            print("   pool stats:", pool.stats())
+            pool.shutdown()
+
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Show how the schema migrations change the plans of the hot dashboard queries.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.query_plans
+"""
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import build_database
+from hive_database.tables import HOT_QUERIES, migrate, query_plan_report
+
+ROWS = 200000
+REPEAT = 5
+
+
+def time_queries(conn):
+    """Best of REPEAT runs for each hot query, in milliseconds."""
+    timings = {}
+    for name, sql in HOT_QUERIES.items():
+        best = float("inf")
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            conn.execute(sql).fetchall()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best * 1000
+    return timings
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "plans.db"
+        build_database(path, incidents=ROWS, tickets=ROWS, version=1)
+        conn = sqlite3.connect(path)
+
+        before_plans = query_plan_report(conn)
+        before_times = time_queries(conn)
+
+        migrate(conn)
+        conn.execute("ANALYZE")
+        after_plans = query_plan_report(conn)
+        after_times = time_queries(conn)
+        conn.close()
+
+    print(f"{ROWS} incidents and {ROWS} tickets\n")
+    for name in HOT_QUERIES:
+        print(f"== {name}")
+        print(f"   before ({before_times[name]:7.2f} ms): {' | '.join(before_plans[name])}")
+        print(f"   after  ({after_times[name]:7.2f} ms): {' | '.join(after_plans[name])}")
+
+
+if __name__ == "__main__":
+    main()
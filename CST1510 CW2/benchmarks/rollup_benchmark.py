@@ -0,0 +1,97 @@
+"""
+Time to draw a year of trend data from the rollups, against a GROUP BY
+over the raw incidents, for growing table sizes.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.rollup_benchmark [largest]
+
+The default sizes are 10,000, 100,000 and 1,000,000 incidents.
+The rollup reads should stay the same, the raw GROUP BY grows with the rows.
+"""
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import build_database, make_incidents
+from hive_database.connection import configure_database, db_connection, setup_database
+from hive_database.rollups import hour_heatmap, rollup_trend
+
+SIZES = [10000, 100000, 1000000]
+RUNS = 5
+INSERT_ROWS = 20000
+
+# what the trend chart would run without the rollups
+RAW_TREND = (
+    "SELECT strftime('%Y-%m-%d', timestamp) AS day, severity, COUNT(*) "
+    "FROM cyber_incidents GROUP BY day, severity"
+)
+
+
+def best_time(func):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def insert_time(path, version):
+    """Seconds to insert INSERT_ROWS incidents in one transaction."""
+    build_database(path, incidents=0, tickets=0, datasets=0, version=version)
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    with conn:
+        conn.executemany(
+            "INSERT INTO cyber_incidents VALUES (?, ?, ?, ?, ?, ?)",
+            make_incidents(INSERT_ROWS, seed=5),
+        )
+    seconds = time.perf_counter() - start
+    conn.close()
+    return seconds
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    sizes = [size for size in SIZES if size < largest] + [largest]
+
+    # pandas is imported once here, so it does not count in the first read
+    import pandas  # noqa: F401
+
+    print(f"{'rows':>10} {'rollup build':>13} {'rollup rows':>12} {'trend':>9} "
+          f"{'heatmap':>9} {'raw GROUP BY':>13}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = Path(tmp) / f"rollup_{rows}.db"
+            # load without the rollup triggers, then let the migration count
+            build_database(path, incidents=rows, tickets=0, datasets=0, version=10)
+            manager = configure_database(path)
+            start = time.perf_counter()
+            setup_database()
+            build = time.perf_counter() - start
+
+            with db_connection() as conn:
+                stored = conn.execute(
+                    "SELECT COUNT(*) FROM time_rollup WHERE table_name = 'cyber_incidents'"
+                ).fetchone()[0]
+
+                trend = best_time(lambda: rollup_trend("cyber_incidents", "severity"))
+                heat = best_time(lambda: hour_heatmap("cyber_incidents"))
+                raw = best_time(lambda: conn.execute(RAW_TREND).fetchall())
+
+            print(f"{rows:>10,} {build:>11.2f} s {stored:>12,} {trend * 1000:>7.1f}ms "
+                  f"{heat * 1000:>7.1f}ms {raw * 1000:>11.1f}ms")
+            manager.close_all()
+
+        without = insert_time(Path(tmp) / "insert_10.db", 10)
+        with_rollups = insert_time(Path(tmp) / "insert_11.db", None)
+        print(f"\ninsert {INSERT_ROWS:,} incidents: {without:.2f} s without rollup triggers, "
+              f"{with_rollups:.2f} s with ({(with_rollups - without) / INSERT_ROWS * 1e6:.0f} us "
+              f"extra per row)")
+
+
+if __name__ == "__main__":
+    main()
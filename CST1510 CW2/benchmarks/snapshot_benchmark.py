@@ -0,0 +1,93 @@
+"""
+Load time and memory (RSS) of a big table through SQL against its
+memory-mapped Arrow snapshot.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.snapshot_benchmark [rows]
+
+The default is 1,000,000 incidents. Every load runs in a new process, so
+each one starts with an empty table cache and its own RSS:
+- anon: memory that belongs only to that process (Python objects, copies)
+- file: mapped file pages, shared by every process that maps the snapshot
+"""
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import build_database
+
+DEFAULT_ROWS = 1000000
+RUNS = 3
+
+
+def memory():
+    """(anon MB, file MB, peak MB) of this process, from /proc."""
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("RssAnon", "RssFile", "VmHWM"):
+                values[name] = int(rest.split()[0]) / 1024
+    return values["RssAnon"], values["RssFile"], values["VmHWM"]
+
+
+def load_once(db_path, mode, results):
+    """Runs in a child process: load the table once and report."""
+    import pandas  # noqa: F401  (not part of the load time)
+
+    from hive_database import snapshots
+    from hive_database.connection import configure_database
+    from hive_database.data_loader import load_cyber_incidents
+
+    configure_database(db_path)
+    snapshots.SNAPSHOTS_ENABLED = mode != "sql"
+    before = memory()
+
+    start = time.perf_counter()
+    df = load_cyber_incidents()
+    # touch every value, like a chart or a groupby would
+    df["description"].str.len().sum()
+    df["severity"].value_counts()
+    seconds = time.perf_counter() - start
+
+    after = memory()
+    results.put((seconds, after[0] - before[0], after[1] - before[1], after[2]))
+
+
+def run(db_path, mode):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=load_once, args=(db_path, mode, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "snapshots.db"
+        print(f"creating {rows:,} incidents...")
+        build_database(db_path, incidents=rows, tickets=0, datasets=0)
+
+        print(f"\n{'path':<22} {'seconds':>8} {'anon MB':>8} {'file MB':>8} {'peak MB':>8}")
+        for label, mode in [
+            ("SQL + dtypes", "sql"),
+            ("first load (writes)", "snapshot"),
+            ("snapshot (mmap)", "snapshot"),
+        ]:
+            runs = [run(db_path, mode) for _ in range(RUNS if label != "first load (writes)" else 1)]
+            seconds, anon, file, peak = min(runs)
+            print(f"{label:<22} {seconds:>8.2f} {anon:>8.0f} {file:>8.0f} {peak:>8.0f}")
+
+        snapshot = next((Path(tmp) / "snapshots").glob("*.arrow"))
+        print(f"\nsnapshot file: {snapshot.stat().st_size / 2**20:,.0f} MB, "
+              f"database file: {db_path.stat().st_size / 2**20:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
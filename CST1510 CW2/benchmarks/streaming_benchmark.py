@@ -0,0 +1,55 @@
+"""
+Time to first text with and without streaming, against the local stub API.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.streaming_benchmark
+
+No OpenAI key or network is needed. The last part closes a stream after
+a few pieces (like a user leaving the page) and checks that the stub
+server sees the request as cancelled.
+"""
+import time
+
+from openai import OpenAI
+
+from benchmarks.stub_ai_server import start_stub_server
+from jarvis.streaming import StreamMetrics, stream_chat
+
+REQUESTS = 10
+MESSAGES = [{"role": "user", "content": "How many critical incidents are open?"}]
+
+
+def main():
+    server, state = start_stub_server(first_token_delay=0.2, token_delay=0.02)
+    client = OpenAI(api_key="stub", base_url=f"http://127.0.0.1:{server.server_port}/v1")
+
+    # without streaming the user sees nothing until the whole answer is done
+    waits = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        client.chat.completions.create(model="stub", messages=MESSAGES)
+        waits.append(time.perf_counter() - start)
+    waits.sort()
+    print(f"whole answer : first text after {waits[len(waits) // 2] * 1000:7.0f} ms (p50)")
+
+    metrics = StreamMetrics()
+    for _ in range(REQUESTS):
+        "".join(stream_chat(client, "stub", MESSAGES, metrics=metrics))
+    stats = metrics.stats()
+    print(f"streamed     : first text after {stats['ttft_p50_ms']:7.0f} ms (p50), "
+          f"done after {stats['total_p50_ms']:.0f} ms")
+
+    # cancel: read three pieces, then close like Streamlit does on rerun
+    pieces = stream_chat(client, "stub", MESSAGES, metrics=metrics)
+    for _ in range(3):
+        next(pieces)
+    pieces.close()
+    time.sleep(0.5)
+    print(f"cancelled    : client counted {metrics.stats()['cancelled']}, "
+          f"stub counted {state.cancelled} cancelled of {state.requests} requests")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
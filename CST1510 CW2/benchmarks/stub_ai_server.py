@@ -0,0 +1,186 @@
+"""
+A tiny local server that answers like the OpenAI chat completions API.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.stub_ai_server [port]
+
+Then point the app (or any OpenAI client) at it:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub streamlit run login.py
+
+With "stream": true the answer is sent word by word as server-sent events
+("data: {chunk}" lines, then "data: [DONE]"), like the real API.
+Without it, one JSON response is sent. The delays can be changed to test
+time to first token, and fail_with=[503, 429, ...] makes the next requests
+fail with those status codes (to test retries).
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+
+ANSWER = (
+    "Based on the current H.I.V.E. data, critical incidents and open tickets "
+    "need attention first. 1. Review the open critical incidents today. "
+    "2. Move idle tickets to available staff. 3. Check the slowest category "
+    "for repeated causes."
+)
+
+
+class StubState:
+    """Settings and counters shared by all requests of one server."""
+
+    def __init__(self, first_token_delay=0.3, token_delay=0.02, answer=ANSWER, fail_with=()):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.answer = answer
+        self.fail_with = list(fail_with)
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.active = 0
+        self.peak_active = 0
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def next_failure(self):
+        """Status code the next request must fail with, or None."""
+        with self.lock:
+            return self.fail_with.pop(0) if self.fail_with else None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state = None   # set by start_stub_server
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.state.count("requests")
+
+        status = self.state.next_failure()
+        if status is not None:
+            self.send_failure(status)
+            return
+
+        with self.state.lock:
+            self.state.active += 1
+            self.state.peak_active = max(self.state.peak_active, self.state.active)
+        try:
+            if body.get("stream"):
+                self.send_stream(body.get("model", "stub"))
+            else:
+                self.send_whole(body.get("model", "stub"))
+        finally:
+            with self.state.lock:
+                self.state.active -= 1
+
+    def send_failure(self, status):
+        payload = json.dumps({
+            "error": {"message": f"stub failure {status}", "type": "stub_error", "code": None}
+        }).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self.state.count("failed")
+
+    def chunk(self, model, delta, finish_reason=None):
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    def send_stream(self, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        words = self.state.answer.split(" ")
+        try:
+            time.sleep(self.state.first_token_delay)
+            self.write_event(self.chunk(model, {"role": "assistant", "content": ""}))
+            for i, word in enumerate(words):
+                text = word if i == 0 else " " + word
+                self.write_event(self.chunk(model, {"content": text}))
+                time.sleep(self.state.token_delay)
+            self.write_event(self.chunk(model, {}, "stop"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # the client closed the stream (user left the page)
+            self.state.count("cancelled")
+            return
+
+        self.state.count("completed")
+
+    def write_event(self, data):
+        self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def send_whole(self, model):
+        time.sleep(self.state.first_token_delay + self.state.token_delay * len(self.state.answer.split()))
+        payload = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.state.answer},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self.state.count("completed")
+
+
+def start_stub_server(port=0, **settings):
+    """
+    Start the stub in a background thread.
+
+    port=0 picks a free port. Returns (server, state); the base URL for
+    the OpenAI client is f"http://127.0.0.1:{server.server_port}/v1".
+    Call server.shutdown() when done.
+    """
+    state = StubState(**settings)
+    handler = type("Handler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    server, _ = start_stub_server(port)
+    print(f"Stub chat completions API on http://127.0.0.1:{server.server_port}/v1 (Ctrl+C stops)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
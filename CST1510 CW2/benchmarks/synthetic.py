@@ -0,0 +1,99 @@
+"""
+Fake incident, ticket and dataset rows for the benchmarks.
+
+The values look like the CSV files in the Data folder, just many more rows.
+"""
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+CATEGORIES = ["Phishing", "Malware", "DDoS", "Unauthorized Access", "Misconfiguration"]
+INCIDENT_STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+TICKET_STATUSES = ["Open", "In Progress", "Resolved", "Waiting for User"]
+STAFF = ["IT_Support_A", "IT_Support_B", "IT_Support_C"]
+SOURCES = ["data_scientist", "cyber_admin", "it_admin"]
+WORDS = [
+    "vpn", "password", "reset", "printer", "email", "outlook", "login", "server",
+    "firewall", "laptop", "wifi", "malware", "phishing", "link", "account",
+    "locked", "slow", "network", "disk", "backup", "update", "patch", "ransomware",
+]
+
+START = datetime(2024, 1, 1)
+
+
+def _when(rng):
+    return START + timedelta(hours=rng.randrange(365 * 24))
+
+
+def _text(rng, n=6):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def make_incidents(n, seed=1, start_id=1000):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield (
+            start_id + i,
+            _when(rng).strftime("%Y-%m-%d %H:%M:%S.%f"),
+            rng.choice(SEVERITIES),
+            rng.choice(CATEGORIES),
+            rng.choice(INCIDENT_STATUSES),
+            f"Incident {i} {_text(rng)}",
+        )
+
+
+def make_tickets(n, seed=2, start_id=2000):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield (
+            start_id + i,
+            rng.choice(PRIORITIES),
+            f"Ticket {i} {_text(rng)}",
+            rng.choice(TICKET_STATUSES),
+            rng.choice(STAFF),
+            _when(rng).strftime("%Y-%m-%d %H:%M:%S"),
+            rng.randint(1, 72),
+        )
+
+
+def make_datasets(n, seed=3, start_id=1):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield (
+            start_id + i,
+            f"Dataset_{i}",
+            rng.randint(100, 500000),
+            rng.randint(3, 60),
+            rng.choice(SOURCES),
+            _when(rng).strftime("%Y-%m-%d"),
+        )
+
+
+def build_database(path, incidents=10000, tickets=10000, datasets=100, version=None):
+    """
+    Create a database file with the real schema and fake rows.
+
+    version: stop the migrations at this schema version (None = latest)
+    """
+    from hive_database.tables import migrate, save_fingerprint
+
+    conn = sqlite3.connect(path)
+    migrate(conn, target=version)
+    if version is None:
+        save_fingerprint(conn)
+    conn.executemany(
+        "INSERT INTO cyber_incidents VALUES (?, ?, ?, ?, ?, ?)",
+        make_incidents(incidents),
+    )
+    conn.executemany(
+        "INSERT INTO it_tickets VALUES (?, ?, ?, ?, ?, ?, ?)",
+        make_tickets(tickets),
+    )
+    conn.executemany(
+        "INSERT INTO datasets_metadata VALUES (?, ?, ?, ?, ?, ?)",
+        make_datasets(datasets),
+    )
+    conn.commit()
+    conn.close()
@@ -0,0 +1,71 @@
+"""
+CPU cost of a credential-stuffing attack with and without the login throttle.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.throttle_benchmark
+
+bcrypt runs in this process (hash pool with workers=0) so process_time()
+counts all of the hashing work.
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import bcrypt
+
+from authentication.hash_pool import configure_hash_pool
+from authentication.security import login_user
+from authentication.throttle import configure_login_throttle
+from hive_database.connection import configure_database, setup_database
+from hive_database.user import add_user
+
+ROUNDS = 10
+ATTEMPTS = 200
+VICTIMS = 5
+
+
+def attack(label):
+    """One client tries wrong passwords against a few real accounts."""
+    refused = 0
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    for i in range(ATTEMPTS):
+        ok, message = login_user(f"victim{i % VICTIMS}", f"guess{i}", client="203.0.113.7")
+        if message.startswith("Too many"):
+            refused += 1
+
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    hashed = ATTEMPTS - refused
+    print(f"{label:<18} {cpu:8.2f} s CPU {wall:8.2f} s wall "
+          f"{hashed:6d} bcrypt checks {refused:6d} refused")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = configure_database(Path(tmp) / "throttle.db")
+        setup_database()
+        configure_hash_pool(workers=0)
+
+        hashed = bcrypt.hashpw(b"RealPass1", bcrypt.gensalt(rounds=ROUNDS)).decode("utf-8")
+        for i in range(VICTIMS):
+            add_user(f"victim{i}", hashed, "agent")
+
+        print(f"{ATTEMPTS} wrong-password attempts from one client, bcrypt cost {ROUNDS}\n")
+
+        configure_login_throttle(enabled=False)
+        attack("no throttle")
+
+        throttle = configure_login_throttle()
+        attack("throttle")
+        print("   throttle stats:", throttle.stats())
+
+        throttle = configure_login_throttle(persist=True)
+        attack("throttle + SQLite")
+
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
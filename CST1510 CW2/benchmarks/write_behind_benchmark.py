@@ -0,0 +1,96 @@
+"""
+Inserts per second of create_incident one commit per row (wait=True)
+against the write-behind queue with group commits (wait=False).
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.write_behind_benchmark [inserts]
+
+Every run inserts the same number of incidents from 1, 8 or 32 threads,
+with synchronous=NORMAL (the app setting) and FULL (a sync to disk on
+every commit). For the queue, "p95 wait" is the time from submit until
+the Future says the row is committed.
+"""
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import build_database
+from hive_database.connection import PRAGMAS, configure_database, setup_database
+from hive_database.data_loader import count_rows, create_incident
+from hive_database.write_behind import get_write_behind
+
+DEFAULT_INSERTS = 5000
+THREADS = [1, 8, 32]
+SYNC_MODES = ["NORMAL", "FULL"]
+
+
+def insert_rows(ids, wait, waits):
+    futures = []
+    for incident_id in ids:
+        start = time.perf_counter()
+        result = create_incident(
+            incident_id, "2024-06-01 12:00:00", "High", "Malware", "Open",
+            "raised by an automatic alert", wait=wait,
+        )
+        if wait:
+            waits.append(time.perf_counter() - start)
+        else:
+            result.add_done_callback(
+                lambda _, start=start: waits.append(time.perf_counter() - start)
+            )
+            futures.append(result)
+
+    # the caller is only done when every row is confirmed
+    for future in futures:
+        future.result()
+
+
+def run(inserts, threads, wait):
+    waits = []
+    ids = list(range(1000000, 1000000 + inserts))
+    parts = [ids[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=insert_rows, args=(part, wait, waits)) for part in parts]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+
+    waits.sort()
+    return inserts / seconds, waits[int(len(waits) * 0.95)]
+
+
+def main():
+    inserts = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_INSERTS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{inserts:,} single inserts per run\n")
+        print(f"{'sync':<7} {'threads':>7} {'per row/s':>10} {'p95 wait':>9} "
+              f"{'queue/s':>10} {'p95 wait':>9} {'speed-up':>9} {'batches':>8}")
+
+        for sync in SYNC_MODES:
+            for threads in THREADS:
+                rates = {}
+                for wait in (True, False):
+                    db_path = Path(tmp) / f"wb_{sync}_{threads}_{wait}.db"
+                    build_database(db_path, incidents=10000, tickets=0, datasets=0)
+                    configure_database(db_path, pragmas=dict(PRAGMAS, synchronous=sync))
+                    setup_database()
+
+                    rates[wait] = run(inserts, threads, wait)
+                    assert count_rows("cyber_incidents") == 10000 + inserts
+                    batches = get_write_behind().stats["batches"] if not wait else 0
+
+                (slow, slow_wait), (fast, fast_wait) = rates[True], rates[False]
+                print(f"{sync:<7} {threads:>7} {slow:>10,.0f} {slow_wait * 1000:>7.1f}ms "
+                      f"{fast:>10,.0f} {fast_wait * 1000:>7.1f}ms {fast / slow:>8.1f}x {batches:>8}")
+
+        configure_database(Path(tmp) / "done.db").close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Many threads read and write at the same time. Counts "database is
+locked" errors and measures read and write times, for the old way of writing
+(every thread writes on its own pooled connection) against the writer
+thread (hive_database.connection.write) with read-only connections.
+
+Run from the "CST1510 CW2" folder:
+    python -m benchmarks.write_stress [seconds]
+
+Half of the threads write (add an incident, change one, update a group
+of incidents with a filter), the other half read like the dashboard
+(a page of rows, a count, the values of a filter). One more thread
+imports a 300,000 row ticket CSV once, a second after the start. The
+import holds the write lock for longer than busy_timeout (5 s).
+"""
+import csv
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from itertools import count
+from pathlib import Path
+
+from benchmarks.synthetic import build_database, make_tickets
+from hive_database import data_loader
+from hive_database.aggregates import count_where
+from hive_database.connection import (
+    PoolExhaustedError,
+    configure_database,
+    db_connection,
+    setup_database,
+    transaction,
+)
+from hive_database.data_loader import TABLE_COLUMNS
+from hive_database.ingest import file_checksum, import_csv, load_csv
+
+ROWS = 20000
+IMPORT_ROWS = 300000
+IMPORT_DELAY = 1.0
+THREADS = [8, 32, 64]
+DEFAULT_SECONDS = 20.0
+
+
+# ---------- the old write path, as run_query / bulk_update were ----------
+
+def direct_query(sql, params=()):
+    with db_connection() as conn:
+        conn.execute(sql, params)
+        conn.commit()
+
+
+def direct_filtered_update(status, category):
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE cyber_incidents SET status = ? WHERE category = ? AND status = 'Open'",
+            (status, category),
+        )
+
+
+def direct_import(csv_path):
+    with transaction() as conn:
+        load_csv(conn, "it_tickets", csv_path, file_checksum(csv_path))
+
+
+# ---------- the new write path ----------
+
+def writer_query(sql, params=()):
+    data_loader.run_query(sql, params, table="cyber_incidents")
+
+
+def writer_filtered_update(status, category):
+    data_loader.bulk_update(
+        "cyber_incidents",
+        filters={"category": [category], "status": ["Open"]},
+        status=status,
+    )
+
+
+def writer_import(csv_path):
+    import_csv("it_tickets", csv_path, force=True)
+
+
+PATHS = {
+    "own connections": (direct_query, direct_filtered_update, direct_import),
+    "writer thread": (writer_query, writer_filtered_update, writer_import),
+}
+
+
+def count_error(results, error):
+    if isinstance(error, sqlite3.OperationalError) and "locked" in str(error):
+        results["locked"] += 1
+    else:
+        results["other"] += 1
+
+
+def write_loop(query, filtered_update, ids, stop, results):
+    n = 0
+    times = []
+    while not stop.is_set():
+        new_id = next(ids)
+        step = n % 3
+        start = time.perf_counter()
+        try:
+            if step == 0:
+                query(
+                    "INSERT INTO cyber_incidents VALUES (?, ?, ?, ?, ?, ?)",
+                    (new_id, "2024-06-01 12:00:00", "High", "Malware", "Open", "stress test row"),
+                )
+            elif step == 1:
+                query(
+                    "UPDATE cyber_incidents SET severity = ? WHERE incident_id = ?",
+                    ("Low", 1000 + new_id % ROWS),
+                )
+            else:
+                filtered_update("In Progress", "Phishing")
+            times.append(time.perf_counter() - start)
+        except (sqlite3.OperationalError, PoolExhaustedError) as error:
+            count_error(results, error)
+        n += 1
+    results["write_times"].extend(times)
+
+
+def import_once(bulk_import, csv_path, results):
+    time.sleep(IMPORT_DELAY)
+    start = time.perf_counter()
+    try:
+        bulk_import(csv_path)
+        results["import_seconds"] = time.perf_counter() - start
+    except (sqlite3.OperationalError, PoolExhaustedError) as error:
+        count_error(results, error)
+
+
+def read_loop(stop, results):
+    times = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            data_loader.query_page("cyber_incidents", filters={"severity": ["High"]}, page_size=50)
+            count_where("cyber_incidents", status="Open")
+            data_loader.distinct_values("cyber_incidents", "category")
+            times.append(time.perf_counter() - start)
+        except (sqlite3.OperationalError, PoolExhaustedError) as error:
+            count_error(results, error)
+    results["read_times"].extend(times)
+
+
+def p95(times):
+    times = sorted(times)
+    return times[int(len(times) * 0.95)] if times else 0.0
+
+
+def run(path, threads, seconds, csv_path):
+    query, filtered_update, bulk_import = PATHS[path]
+    results = {"import_seconds": None, "locked": 0, "other": 0, "read_times": [], "write_times": []}
+    ids = count(10000000)
+    stop = threading.Event()
+
+    workers = [threading.Thread(target=import_once, args=(bulk_import, csv_path, results))]
+    for i in range(threads):
+        if i % 2 == 0:
+            target, args = write_loop, (query, filtered_update, ids, stop, results)
+        else:
+            target, args = read_loop, (stop, results)
+        workers.append(threading.Thread(target=target, args=args))
+
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    return results
+
+
+def write_csv(path):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(TABLE_COLUMNS["it_tickets"])
+        writer.writerows(make_tickets(IMPORT_ROWS))
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SECONDS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "tickets.csv"
+        write_csv(csv_path)
+
+        print(f"{seconds:.0f} s per run, half the threads write, half read, plus one import\n")
+        print(f"{'threads':>7} {'path':<16} {'writes/s':>9} {'write p95':>10} {'reads/s':>8} "
+              f"{'read p95':>9} {'import':>8} {'locked':>7} {'other':>6}")
+
+        for threads in THREADS:
+            for path in PATHS:
+                db_path = Path(tmp) / f"stress_{threads}_{path[:3]}.db"
+                build_database(db_path, incidents=ROWS, tickets=ROWS, datasets=0)
+                configure_database(db_path)
+                setup_database()
+
+                r = run(path, threads, seconds, csv_path)
+                imported = "failed" if r["import_seconds"] is None else f"{r['import_seconds']:.1f}s"
+                print(f"{threads:>7} {path:<16} {len(r['write_times']) / seconds:>9.0f} "
+                      f"{p95(r['write_times']) * 1000:>8.0f}ms "
+                      f"{len(r['read_times']) / seconds:>8.0f} {p95(r['read_times']) * 1000:>7.0f}ms "
+                      f"{imported:>8} {r['locked']:>7} {r['other']:>6}")
+
+        configure_database(Path(tmp) / "done.db").close_all()
+
+
+if __name__ == "__main__":
+    main()
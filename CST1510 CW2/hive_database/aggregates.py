@@ -0,0 +1,194 @@
+import math
+
+from hive_database.connection import read_connection
+from hive_database.data_loader import build_where, check_column
+
+# SQL function for each pandas-style statistic name.
+# COALESCE makes an empty SUM give 0 like pandas does.
+STATS = {
+    "count": "COUNT({col})",
+    "sum": "COALESCE(SUM({col}), 0)",
+    "mean": "AVG({col})",
+    "min": "MIN({col})",
+    "max": "MAX({col})",
+    "nunique": "COUNT(DISTINCT {col})",
+}
+
+
+# =============== HELPERS ===============
+
+def _conditions(conditions):
+    """
+    Turn keyword conditions into the filters dict used by build_where.
+
+    status="Open" becomes {"status": ["Open"]},
+    status=["Open", "In Progress"] stays a list.
+    """
+    filters = {}
+    for column, value in conditions.items():
+        if isinstance(value, (list, tuple, set)):
+            filters[column] = list(value)
+        else:
+            filters[column] = [value]
+    return filters
+
+
+def _and(where, extra):
+    """Add one more condition to a WHERE part made by build_where."""
+    return f"{where} AND {extra}" if where else f" WHERE {extra}"
+
+
+def _number(value):
+    """Turn a missing SQL result into NaN, like pandas gives for empty data."""
+    return float("nan") if value is None else value
+
+
+# =============== COUNTS AND TOTALS ===============
+
+def count_where(table, **conditions):
+    """
+    Count rows that match simple conditions.
+
+    Example: count_where("cyber_incidents", status="Open")
+    Same as len(df[df["status"] == "Open"]) but without loading the table.
+    """
+    where, params = build_where(table, _conditions(conditions))
+
+    with read_connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+
+
+def column_stat(table, column, stat, filters=None):
+    """
+    Work out one number for a column: sum, mean, min, max, count or nunique.
+
+    Example: column_stat("it_tickets", "resolution_time_hours", "mean")
+    """
+    check_column(table, column)
+    where, params = build_where(table, filters)
+    expr = STATS[stat].format(col=column)
+
+    with read_connection() as conn:
+        value = conn.execute(f"SELECT {expr} FROM {table}{where}", params).fetchone()[0]
+
+    return _number(value)
+
+
+def value_counts(table, column, filters=None):
+    """
+    Count how many rows have each value of a column (biggest first).
+
+    Returns a pandas Series like df[column].value_counts().
+    """
+    # pandas is imported here, so pages that only need numbers load faster
+    import pandas as pd
+
+    check_column(table, column)
+    where, params = build_where(table, filters)
+    where = _and(where, f"{column} IS NOT NULL")
+
+    with read_connection() as conn:
+        rows = conn.execute(
+            f"SELECT {column}, COUNT(*) AS n FROM {table}{where} "
+            f"GROUP BY {column} ORDER BY n DESC, {column}",
+            params,
+        ).fetchall()
+
+    return pd.Series(
+        [row[1] for row in rows],
+        index=pd.Index([row[0] for row in rows], name=column),
+        name="count",
+    )
+
+
+def group_stats(table, by, aggregations, filters=None, sort_by=None, descending=True):
+    """
+    Group rows by one column and work out statistics for each group.
+
+    aggregations: {result name: (column, stat)}, for example
+        {"total_tickets": ("ticket_id", "count"),
+         "avg_resolution_time": ("resolution_time_hours", "mean")}
+
+    Returns a DataFrame indexed by the group column, like
+    df.groupby(by).agg(...).rename(...).
+    """
+    import pandas as pd
+
+    check_column(table, by)
+    where, params = build_where(table, filters)
+    where = _and(where, f"{by} IS NOT NULL")
+
+    selects = []
+    for name, (column, stat) in aggregations.items():
+        check_column(table, column)
+        selects.append(f"{STATS[stat].format(col=column)} AS {name}")
+
+    with read_connection() as conn:
+        result = pd.read_sql_query(
+            f"SELECT {by}, {', '.join(selects)} FROM {table}{where} GROUP BY {by}",
+            conn,
+            params=params,
+        )
+
+    result = result.set_index(by)
+    if sort_by is not None:
+        result = result.sort_values(sort_by, ascending=not descending)
+    return result
+
+
+# =============== DISTRIBUTIONS ===============
+
+def quantile(table, column, q, filters=None):
+    """
+    Return the q-quantile of a column, the same way pandas does it
+    (linear interpolation between the two closest values).
+
+    Only two rows are read, picked with ORDER BY ... LIMIT 2 OFFSET.
+    """
+    check_column(table, column)
+    where, params = build_where(table, filters)
+    where = _and(where, f"{column} IS NOT NULL")
+
+    with read_connection() as conn:
+        n = conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+        if n == 0:
+            return float("nan")
+
+        position = q * (n - 1)
+        low = math.floor(position)
+        rows = conn.execute(
+            f"SELECT {column} FROM {table}{where} ORDER BY {column} LIMIT 2 OFFSET ?",
+            params + [low],
+        ).fetchall()
+
+    below = rows[0][0]
+    above = rows[1][0] if len(rows) > 1 else below
+    return below + (above - below) * (position - low)
+
+
+def box_stats(table, column, by):
+    """
+    Work out box plot numbers (min, q1, median, q3, max) for each group.
+
+    Returns a DataFrame indexed by the group column. It is small enough to
+    draw with plotly's go.Box(q1=..., median=..., ...) instead of px.box,
+    which needs every single row.
+    """
+    import pandas as pd
+
+    check_column(table, by)
+    groups = value_counts(table, by).index
+
+    rows = []
+    for group in groups:
+        filters = {by: [group]}
+        rows.append({
+            by: group,
+            "min": column_stat(table, column, "min", filters),
+            "q1": quantile(table, column, 0.25, filters),
+            "median": quantile(table, column, 0.5, filters),
+            "q3": quantile(table, column, 0.75, filters),
+            "max": column_stat(table, column, "max", filters),
+        })
+
+    return pd.DataFrame(rows, columns=[by, "min", "q1", "median", "q3", "max"]).set_index(by)
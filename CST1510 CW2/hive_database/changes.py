@@ -0,0 +1,121 @@
+"""
+Change log of incident and ticket rows, written by SQLite triggers.
+
+Every INSERT, DELETE, or UPDATE of the key or the description adds one row
+(seq, table_name, row_id) to the row_changes table. A search index keeps
+the last seq it has seen and only reads what changed after it, so it stays
+up to date without being built again. This works for bulk updates and for
+writes from other processes too.
+
+A row with row_id NULL means "the whole table was reloaded" (bulk import).
+"""
+from hive_database.connection import db_connection, write
+
+# Tables with a change log: table -> key column
+CHANGE_TABLES = {
+    "cyber_incidents": "incident_id",
+    "it_tickets": "ticket_id",
+}
+
+# Column the search indexes read
+TEXT_COLUMN = "description"
+
+# How many changes we keep; an index that is further behind builds again
+CHANGE_LOG_KEEP = 100000
+
+
+# =============== SCHEMA ===============
+
+def create_change_triggers(conn, table):
+    key = CHANGE_TABLES[table]
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO row_changes (table_name, row_id) VALUES ('{table}', NEW.{key});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO row_changes (table_name, row_id) VALUES ('{table}', OLD.{key});
+        END
+    """)
+    # only when the indexed text (or the key) changes
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_update
+        AFTER UPDATE OF {key}, {TEXT_COLUMN} ON {table}
+        BEGIN
+            INSERT INTO row_changes (table_name, row_id)
+            SELECT '{table}', OLD.{key} WHERE OLD.{key} != NEW.{key};
+            INSERT INTO row_changes (table_name, row_id) VALUES ('{table}', NEW.{key});
+        END
+    """)
+
+
+def create_change_log_schema(conn):
+    """Create the row_changes table and the triggers that fill it."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS row_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- grows with every change
+            table_name TEXT NOT NULL,               -- cyber_incidents or it_tickets
+            row_id INTEGER                          -- changed row, NULL = whole table
+        )
+    """)
+
+    for table in CHANGE_TABLES:
+        create_change_triggers(conn, table)
+
+
+# =============== READERS / WRITERS ===============
+
+def log_table_reload(conn, table):
+    """Record that every row of a table may have changed (after a bulk load)."""
+    conn.execute("INSERT INTO row_changes (table_name, row_id) VALUES (?, NULL)", (table,))
+
+
+def last_change():
+    """Return the newest seq (0 if the log is empty)."""
+    with db_connection() as conn:
+        row = conn.execute("SELECT MAX(seq) FROM row_changes").fetchone()
+    return row[0] or 0
+
+
+def changes_since(table, seq):
+    """
+    Return (newest seq, row ids changed after seq, reload) for one table.
+
+    reload is True when the index must build again: the table was bulk
+    loaded, or the log no longer goes back as far as seq.
+    """
+    with db_connection() as conn:
+        # two subqueries: SQLite reads MIN and MAX straight from the key,
+        # but not when both are in the same SELECT
+        oldest, newest = conn.execute(
+            "SELECT (SELECT MIN(seq) FROM row_changes), (SELECT MAX(seq) FROM row_changes)"
+        ).fetchone()
+        if newest is None or newest <= seq:
+            return seq, [], False
+
+        if oldest > seq + 1:
+            return newest, [], True
+
+        rows = conn.execute(
+            "SELECT row_id FROM row_changes WHERE table_name = ? AND seq > ? AND seq <= ?",
+            (table, seq, newest),
+        ).fetchall()
+
+    ids = [row[0] for row in rows]
+    if None in ids:
+        return newest, [], True
+    return newest, sorted(set(ids)), False
+
+
+def prune_changes(keep=CHANGE_LOG_KEEP):
+    """Delete all but the newest keep changes."""
+    return write(lambda conn: conn.execute(
+        "DELETE FROM row_changes WHERE seq <= (SELECT MAX(seq) FROM row_changes) - ?",
+        (keep,),
+    ).rowcount)
@@ -0,0 +1,311 @@
+"""
+Compact copy of the incident and ticket tables.
+
+In the live database every row keeps its time as text
+("2024-04-12 19:00:00.000000" is 26 bytes) and its severity, category,
+status, priority and assignee as words. The compact format keeps:
+- times as INTEGER seconds since 1970 (epoch), so ranges compare numbers
+- each word as a small number (code), with the words once in a lookup table
+
+Views with the old table and column names turn the codes back into text,
+so read-only code (run_query, aggregates, pandas) works on a compact file
+without changes. Queries that need speed can use the *_data tables and
+their codes directly.
+
+The live tables stay as they are: the summary, rollup, search and change
+log triggers and the keyset paging all work on the text columns. The
+compact file is a snapshot, e.g. for archiving or sharing a big database.
+
+The views give back exactly the text that was copied:
+- each time column gets the layout most of its rows use (see
+  TIME_FORMATS, e.g. incidents "2024-04-12 19:00:00.000000", tickets
+  "2024-01-27 05:00:00"), saved in the compact_time_formats table
+- a time that the epoch and that layout cannot rebuild (microseconds
+  that are not 0, a "T" instead of the space, text that is not a time)
+  is also kept as text in {column}_text, so only those rows pay for it
+- a word that is NULL stays NULL (its code is NULL)
+benchmarks/compact_benchmark.py checks every row of the views against
+the live tables.
+
+Run from the "CST1510 CW2" folder:
+    python -m hive_database.compact DATA/platform_compact.db
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+from hive_database.connection import get_connection_manager
+from hive_database.data_loader import TABLE_COLUMNS, TABLE_KEYS
+
+# Words that become codes: column -> lookup table.
+# status is shared by incidents and tickets.
+LOOKUPS = {
+    "severity": "lookup_severity",
+    "category": "lookup_category",
+    "status": "lookup_status",
+    "priority": "lookup_priority",
+    "assigned_to": "lookup_assignee",
+}
+
+# Per table: time columns (stored as epoch) and coded columns
+COMPACT_TABLES = {
+    "cyber_incidents": {
+        "times": ["timestamp"],
+        "codes": ["severity", "category", "status"],
+    },
+    "it_tickets": {
+        "times": ["created_at"],
+        "codes": ["priority", "status", "assigned_to"],
+    },
+}
+
+# Indexes of the compact tables, like the live dashboard indexes
+COMPACT_INDEXES = {
+    "cyber_incidents": [
+        ["timestamp_epoch"],
+        ["severity_id"],
+        ["status_id"],
+        ["category_id", "status_id"],
+    ],
+    "it_tickets": [
+        ["created_at_epoch"],
+        ["status_id", "resolution_time_hours"],
+        ["status_id", "priority_id"],
+        ["priority_id", "resolution_time_hours"],
+        ["assigned_to_id", "resolution_time_hours"],
+    ],
+}
+
+# Layouts a time column can use: name -> SQL that writes an epoch ({})
+# back as text. A column gets the first one that fits most of its rows.
+TIME_FORMATS = {
+    "YYYY-MM-DD HH:MM:SS": "datetime({}, 'unixepoch')",
+    "YYYY-MM-DD HH:MM:SS.000000": "datetime({}, 'unixepoch') || '.000000'",
+    "YYYY-MM-DD": "date({}, 'unixepoch')",
+}
+
+# Types of the columns that are copied as they are
+PLAIN_TYPES = {
+    "description": "TEXT",
+    "resolution_time_hours": "REAL",
+}
+
+
+def data_table(table):
+    return f"{table}_data"
+
+
+def stored_column(table, column):
+    """Name of a column in the *_data table."""
+    spec = COMPACT_TABLES[table]
+    if column in spec["times"]:
+        return f"{column}_epoch"
+    if column in spec["codes"]:
+        return f"{column}_id"
+    return column
+
+
+# =============== SCHEMA ===============
+
+def create_compact_schema(conn, formats):
+    """
+    Create the lookup tables, the *_data tables and the views.
+
+    formats: {(table, column): TIME_FORMATS name} of every time column.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS compact_time_formats (
+            table_name TEXT NOT NULL,
+            column_name TEXT NOT NULL,
+            format TEXT NOT NULL,             -- a name from TIME_FORMATS
+            PRIMARY KEY (table_name, column_name)
+        )
+    """)
+    conn.executemany(
+        "INSERT OR REPLACE INTO compact_time_formats VALUES (?, ?, ?)",
+        [(table, column, name) for (table, column), name in formats.items()],
+    )
+
+    for lookup in sorted(set(LOOKUPS.values())):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {lookup} (
+                id INTEGER PRIMARY KEY,           -- the code saved in the rows
+                name TEXT NOT NULL UNIQUE         -- the word it stands for
+            )
+        """)
+
+    for table, spec in COMPACT_TABLES.items():
+        key = TABLE_KEYS[table]
+        columns = [f"{key} INTEGER PRIMARY KEY"]
+        for column in TABLE_COLUMNS[table]:
+            if column == key:
+                continue
+            if column in spec["times"]:
+                columns.append(f"{column}_epoch INTEGER")
+                # only set when the epoch cannot give the text back
+                columns.append(f"{column}_text TEXT")
+            elif column in spec["codes"]:
+                # NULL when the live row had no word
+                columns.append(f"{column}_id INTEGER REFERENCES {LOOKUPS[column]} (id)")
+            else:
+                columns.append(f"{column} {PLAIN_TYPES[column]}")
+
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {data_table(table)} ({', '.join(columns)})"
+        )
+        conn.execute(
+            f"CREATE VIEW IF NOT EXISTS {table} AS {compat_view_sql(table, formats)}"
+        )
+
+
+def create_compact_indexes(conn):
+    for table, indexes in COMPACT_INDEXES.items():
+        for columns in indexes:
+            name = f"idx_{data_table(table)}_{'_'.join(columns)}"
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} "
+                f"ON {data_table(table)} ({', '.join(columns)})"
+            )
+
+
+def compat_view_sql(table, formats):
+    """
+    SELECT with the live table's columns, in the same order, made from
+    the *_data table and the lookup tables.
+    """
+    spec = COMPACT_TABLES[table]
+    selects = []
+
+    for column in TABLE_COLUMNS[table]:
+        if column in spec["times"]:
+            rebuilt = TIME_FORMATS[formats[(table, column)]].format(f"d.{column}_epoch")
+            selects.append(f"COALESCE(d.{column}_text, {rebuilt}) AS {column}")
+        elif column in spec["codes"]:
+            # a subquery instead of a join: SQLite only looks up the
+            # words of the columns a query really uses
+            selects.append(
+                f"(SELECT name FROM {LOOKUPS[column]} WHERE id = d.{column}_id) AS {column}"
+            )
+        else:
+            selects.append(f"d.{column}")
+
+    return f"SELECT {', '.join(selects)} FROM {data_table(table)} AS d"
+
+
+# =============== CONVERSION ===============
+
+def _epoch_sql(value):
+    return f"CAST(strftime('%s', {value}) AS INTEGER)"
+
+
+def _pick_time_format(conn, table, column):
+    """Name of the TIME_FORMATS layout that rebuilds most rows of the live column."""
+    fits = ", ".join(
+        f"SUM({layout.format(_epoch_sql(column))} IS {column})"
+        for layout in TIME_FORMATS.values()
+    )
+    counts = conn.execute(f"SELECT {fits} FROM live.{table}").fetchone()
+    counts = [n or 0 for n in counts]
+
+    # max() keeps the first layout when two fit the same number of rows
+    best = max(range(len(counts)), key=lambda i: counts[i])
+    return list(TIME_FORMATS)[best]
+
+
+def _copy_table(conn, table, formats):
+    """Fill one *_data table from the live table attached as "live"."""
+    spec = COMPACT_TABLES[table]
+
+    for column in spec["codes"]:
+        conn.execute(
+            f"INSERT OR IGNORE INTO {LOOKUPS[column]} (name) "
+            f"SELECT DISTINCT {column} FROM live.{table} "
+            f"WHERE {column} IS NOT NULL ORDER BY {column}"
+        )
+
+    targets, values, joins = [], [], []
+    for column in TABLE_COLUMNS[table]:
+        targets.append(stored_column(table, column))
+        if column in spec["times"]:
+            epoch = _epoch_sql(f"t.{column}")
+            rebuilt = TIME_FORMATS[formats[(table, column)]].format(epoch)
+            values.append(epoch)
+            targets.append(f"{column}_text")
+            values.append(f"CASE WHEN {rebuilt} IS NOT t.{column} THEN t.{column} END")
+        elif column in spec["codes"]:
+            alias = f"l_{column}"
+            values.append(f"{alias}.id")
+            # LEFT JOIN: a row with a NULL word is copied with a NULL code
+            joins.append(
+                f"LEFT JOIN {LOOKUPS[column]} AS {alias} ON {alias}.name = t.{column}"
+            )
+        else:
+            values.append(f"t.{column}")
+
+    return conn.execute(
+        f"INSERT INTO {data_table(table)} ({', '.join(targets)}) "
+        f"SELECT {', '.join(values)} FROM live.{table} AS t {' '.join(joins)}"
+    ).rowcount
+
+
+def write_compact_copy(target, source=None):
+    """
+    Write the incidents and tickets of the live database (or source)
+    into a new compact database file.
+
+    Returns {table: rows copied} plus "times_kept_as_text": times the
+    epoch could not give back exactly (stored in {column}_text), and
+    "unreadable_times": the ones among them that are not a time at all.
+    """
+    target = Path(target)
+    if target.exists():
+        raise FileExistsError(f"{target} already exists")
+    source = Path(source) if source else get_connection_manager().db_path
+
+    conn = sqlite3.connect(target)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")   # new file, nothing to protect yet
+        conn.execute("ATTACH DATABASE ? AS live", (str(source),))
+
+        formats = {
+            (table, column): _pick_time_format(conn, table, column)
+            for table, spec in COMPACT_TABLES.items()
+            for column in spec["times"]
+        }
+
+        report = {}
+        with conn:
+            create_compact_schema(conn, formats)
+            for table in COMPACT_TABLES:
+                report[table] = _copy_table(conn, table, formats)
+            create_compact_indexes(conn)
+
+        for name, where in [
+            ("times_kept_as_text", "{column}_text IS NOT NULL"),
+            ("unreadable_times", "{column}_text IS NOT NULL AND {column}_epoch IS NULL"),
+        ]:
+            report[name] = sum(
+                conn.execute(
+                    f"SELECT COUNT(*) FROM {data_table(table)} "
+                    f"WHERE {where.format(column=column)}"
+                ).fetchone()[0]
+                for table, spec in COMPACT_TABLES.items()
+                for column in spec["times"]
+            )
+
+        conn.execute("DETACH DATABASE live")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python -m hive_database.compact <new file>")
+        sys.exit(2)
+
+    result = write_compact_copy(sys.argv[1])
+    for name, value in result.items():
+        print(f"{name}: {value:,}")
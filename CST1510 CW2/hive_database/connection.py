@@ -1,45 +1,652 @@
+import atexit
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
+from queue import Empty, LifoQueue, Queue
 
 # This is the path where the database file will be stored
 # I go two folders up, then into "DATA", then create "platform.db"
 DB_PATH = Path(__file__).parent.parent / "DATA" / "platform.db"
 
+# Settings we apply one time to every new connection.
+# WAL lets readers keep reading while somebody writes,
+# and synchronous=NORMAL is safe with WAL and much faster than FULL.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,      # negative means KiB, so about 16 MB of page cache
+    "mmap_size": 268435456,    # map up to 256 MB of the file into memory
+    "busy_timeout": 5000,      # wait up to 5 seconds if the database is locked
+}
+
+# Read-only connections cannot change the journal mode or how it syncs,
+# the database file already has those settings
+READ_PRAGMAS = {
+    name: value for name, value in PRAGMAS.items()
+    if name not in ("journal_mode", "synchronous")
+}
+
+# How many connections can be open at the same time
+POOL_SIZE = 8
+
+# How long (seconds) a caller waits for a free connection
+ACQUIRE_TIMEOUT = 10.0
+
+# Idle connections older than this (seconds) are checked before reuse
+HEALTH_CHECK_INTERVAL = 30.0
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no connection becomes free before the timeout."""
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A normal sqlite3 connection that goes back to the pool on close().
+
+    Old code calls conn.close() after every query. With this class the
+    close() just hands the connection back, so the next caller can use it
+    without opening the file and running the pragmas again.
+    """
+
+    manager = None
+
+    def close(self):
+        if self.manager is not None:
+            self.manager.release(self)
+        else:
+            super().close()
+
+    def discard(self):
+        """Really close the connection (used by the pool itself)."""
+        self.manager = None
+        super().close()
+
+
+class ConnectionManager:
+    """
+    Keeps a bounded pool of SQLite connections.
+
+    - Each thread gets one connection and reuses it for nested calls.
+    - When the thread is done, the connection goes back to the idle pool.
+    - Pragmas run only once, when a connection is first opened.
+    - Idle connections are health checked before they are handed out again.
+
+    With read_only=True the connections are opened with mode=ro, so
+    SQLite itself refuses any write made through them.
+    """
+
+    def __init__(
+        self,
+        db_path=DB_PATH,
+        pool_size=POOL_SIZE,
+        timeout=ACQUIRE_TIMEOUT,
+        pragmas=None,
+        health_check_interval=HEALTH_CHECK_INTERVAL,
+        read_only=False,
+    ):
+        self.db_path = Path(db_path)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.read_only = read_only
+        if pragmas is None:
+            pragmas = READ_PRAGMAS if read_only else PRAGMAS
+        self.pragmas = pragmas
+        self.health_check_interval = health_check_interval
+
+        # LIFO so the most recently used (warm cache) connection is reused first
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+
+        # thread id -> connection that thread is holding right now
+        self._held = {}
+        self._closed = False
+
+        self.stats = {
+            "created": 0,
+            "reused": 0,
+            "nested": 0,
+            "discarded": 0,
+            "reclaimed": 0,
+        }
+
+    # ---------- opening ----------
+
+    def _connect(self):
+        """Open a brand new connection and apply the pragmas."""
+        if self.read_only:
+            # the file must exist already, a read-only connection cannot make it
+            conn = sqlite3.connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                factory=PooledConnection,
+            )
+        else:
+            self.db_path.parent.mkdir(exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                factory=PooledConnection,
+            )
+
+        # Make rows easier to access by column name
+        conn.row_factory = sqlite3.Row
+
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+        conn.manager = self
+        conn.last_used = time.monotonic()
+        conn.depth = 0
+
+        with self._lock:
+            self.stats["created"] += 1
+        return conn
+
+    def _is_healthy(self, conn):
+        """Return True if the connection can still run a query."""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _take_idle(self):
+        """Get a working idle connection, or None if the pool has none."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                return None
+
+            too_old = time.monotonic() - conn.last_used > self.health_check_interval
+            if too_old and not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+
+            with self._lock:
+                self.stats["reused"] += 1
+            return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self.stats["discarded"] += 1
+        try:
+            conn.discard()
+        except sqlite3.Error:
+            pass
+
+    def _reclaim_dead_threads(self):
+        """
+        Give back connections held by threads that no longer exist.
+
+        This happens if a script run crashed before it called close().
+        """
+        alive = {t.ident for t in threading.enumerate()}
+
+        with self._lock:
+            dead = [tid for tid in self._held if tid not in alive]
+            conns = [self._held.pop(tid) for tid in dead]
+            self.stats["reclaimed"] += len(conns)
+
+        for conn in conns:
+            conn.depth = 0
+            self._return(conn)
+
+    # ---------- public api ----------
+
+    def acquire(self):
+        """
+        Get a connection for the current thread.
+
+        If this thread already holds one, the same connection is returned
+        and must be closed the same number of times.
+        """
+        if self._closed:
+            raise RuntimeError("connection manager is closed")
+
+        tid = threading.get_ident()
+
+        with self._lock:
+            conn = self._held.get(tid)
+            if conn is not None:
+                conn.depth += 1
+                self.stats["nested"] += 1
+                return conn
+
+        if not self._slots.acquire(timeout=0):
+            self._reclaim_dead_threads()
+            if not self._slots.acquire(timeout=self.timeout):
+                raise PoolExhaustedError(
+                    f"no free database connection after {self.timeout} seconds"
+                )
+
+        try:
+            conn = self._take_idle() or self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+        conn.depth = 1
+        with self._lock:
+            self._held[tid] = conn
+        return conn
+
+    def held_connection(self):
+        """The connection the current thread is holding, or None."""
+        with self._lock:
+            return self._held.get(threading.get_ident())
+
+    def release(self, conn):
+        """Hand a connection back. Called by PooledConnection.close()."""
+        with self._lock:
+            if conn.depth <= 0:
+                # closed twice, nothing to do
+                return
+            conn.depth -= 1
+            if conn.depth > 0:
+                return
+
+            for tid, held in list(self._held.items()):
+                if held is conn:
+                    del self._held[tid]
+                    break
+
+        self._return(conn)
+
+    def _return(self, conn):
+        # Old code closed without commit, which threw away the changes.
+        # We do the same so the next user starts with a clean connection.
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            self._slots.release()
+            return
+
+        if self._closed:
+            self._discard(conn)
+        else:
+            conn.last_used = time.monotonic()
+            self._idle.put(conn)
+
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Use a pooled connection inside a with-block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def health_check(self):
+        """
+        Check every idle connection and drop the broken ones.
+
+        Returns a small dict with the pool state, handy for a status page.
+        """
+        checked, healthy = [], 0
+
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            if self._is_healthy(conn):
+                healthy += 1
+                checked.append(conn)
+            else:
+                self._discard(conn)
+
+        for conn in checked:
+            self._idle.put(conn)
+
+        with self._lock:
+            in_use = len(self._held)
+            stats = dict(self.stats)
+
+        return {
+            "ok": not self._closed,
+            "pool_size": self.pool_size,
+            "idle": healthy,
+            "in_use": in_use,
+            **stats,
+        }
+
+    def close_all(self):
+        """Close every idle connection and stop handing out new ones."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(conn)
+
+
+class DatabaseWriter:
+    """
+    One thread that makes every write, one job after another.
+
+    When many sessions write at the same time, SQLite lets only one of
+    them in and the rest wait for the lock. After busy_timeout they fail
+    with "database is locked". Here the writes wait in a queue instead,
+    and only this thread ever asks for the write lock.
+
+    A job is a function that gets the connection, e.g.
+        writer.run(lambda conn: conn.execute("DELETE FROM ..."))
+    Each job runs in its own transaction and is committed before the
+    next one starts. If the job raises, its changes are rolled back and
+    the error is raised again in the caller.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._jobs = Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+        self.stats = {
+            "jobs": 0,
+            "failed": 0,
+            "inline": 0,
+        }
+
+    def _start(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("database writer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="hive-db-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                # close() puts None at the end of the queue
+                return
+            job, future = item
+            if future.set_running_or_notify_cancel():
+                self._run_job(job, future)
+
+    def _run_job(self, job, future):
+        try:
+            with self.manager.connection() as conn:
+                # IMMEDIATE takes the write lock at the start,
+                # so the transaction never has to upgrade later
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    result = job(conn)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+        except BaseException as error:
+            with self._lock:
+                self.stats["failed"] += 1
+            future.set_exception(error)
+        else:
+            with self._lock:
+                self.stats["jobs"] += 1
+            future.set_result(result)
+
+    def _must_run_here(self):
+        """
+        True if the job has to run in the calling thread.
+
+        That is the writer thread itself (a job that writes again), or a
+        thread in the middle of its own transaction(): it holds the write
+        lock, so the writer thread would wait for it forever.
+        """
+        if threading.current_thread() is self._thread:
+            return True
+        conn = self.manager.held_connection()
+        return conn is not None and conn.in_transaction
+
+    def submit(self, job):
+        """Queue a job and return a Future with its result."""
+        future = Future()
+
+        if self._must_run_here():
+            with self._lock:
+                self.stats["inline"] += 1
+            future.set_running_or_notify_cancel()
+            try:
+                with self.manager.connection() as conn:
+                    future.set_result(job(conn))
+            except BaseException as error:
+                future.set_exception(error)
+            return future
+
+        self._start()
+        self._jobs.put((job, future))
+        return future
+
+    def run(self, job):
+        """Queue a job, wait for it and return its result."""
+        return self.submit(job).result()
+
+    def pending(self):
+        """How many jobs are waiting in the queue."""
+        return self._jobs.qsize()
+
+    def close(self):
+        """Finish the queued jobs, then stop the thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._jobs.put(None)
+            thread.join()
+
+
+# One shared manager for the whole app (all Streamlit sessions)
+_manager = None
+_manager_lock = threading.Lock()
+
+# Read-only pool for dashboard reads, and the one writer thread.
+# Both belong to the file of _manager and are made again with it.
+_reader = None
+_writer = None
+
+# Database files that setup_database() has already checked in this process
+_ready_databases = set()
+_setup_lock = threading.Lock()
+
+
+def get_connection_manager():
+    """Return the shared connection manager, creating it the first time."""
+    global _manager
+
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager(DB_PATH)
+    return _manager
+
+
+def get_reader_manager():
+    """Return the shared read-only pool, creating it the first time."""
+    global _reader
+
+    manager = get_connection_manager()
+    if _reader is None:
+        with _manager_lock:
+            if _reader is None:
+                _reader = ConnectionManager(manager.db_path, read_only=True)
+    return _reader
+
+
+def get_writer():
+    """Return the shared database writer, creating it the first time."""
+    global _writer
+
+    manager = get_connection_manager()
+    if _writer is None:
+        with _manager_lock:
+            if _writer is None:
+                _writer = DatabaseWriter(manager)
+    return _writer
+
+
+def _close_writer():
+    # at exit: finish the writes that are still queued
+    if _writer is not None:
+        _writer.close()
+
+
+atexit.register(_close_writer)
+
+
+def configure_database(db_path=DB_PATH, **options):
+    """
+    Point the app at another database file (for example in benchmarks).
+
+    The old pool is closed and a new one is created with the options.
+    """
+    global _manager, _reader, _writer
+
+    # I import inside the function because write_behind imports this module
+    from hive_database.write_behind import close_write_behind
+
+    # queued rows and writes still go to the old file
+    close_write_behind()
+
+    with _manager_lock:
+        if _writer is not None:
+            _writer.close()
+        if _reader is not None:
+            _reader.close_all()
+        if _manager is not None:
+            _manager.close_all()
+        _manager = ConnectionManager(db_path, **options)
+        _reader = None
+        _writer = None
+    # a new file (or one made again at the same path) must be set up again
+    _ready_databases.discard(str(_manager.db_path))
+    return _manager
+
 
 def get_db_connection():
     """
-    This function creates and returns a connection to the database.
-    It also makes sure the DATA folder exists.
+    Return a connection to the database from the shared pool.
+
+    Calling conn.close() gives it back to the pool instead of closing the file.
     """
-    # Create the folder if it is not there
-    DB_PATH.parent.mkdir(exist_ok=True)
+    return get_connection_manager().acquire()
+
 
-    # Connect to the database file
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+@contextmanager
+def db_connection():
+    """Short way to write: with db_connection() as conn: ..."""
+    with get_connection_manager().connection() as conn:
+        yield conn
 
-    # Make rows easier to access by column name
-    conn.row_factory = sqlite3.Row
 
-    return conn
+@contextmanager
+def read_connection():
+    """
+    Like db_connection(), but read-only. Used by the dashboard reads.
 
+    In WAL mode readers never wait for the writer, and a read-only
+    connection can never hold the write lock by mistake (for example a
+    read that forgot to commit).
 
-def setup_database():
+    Two cases use the normal pool instead:
+    - the database file does not exist yet (nothing to read, and the
+      normal connection creates it)
+    - this thread is inside its own transaction(): a separate connection
+      would not see its changes that are not committed yet
     """
-    This function sets up the database.
-    It runs another function that creates all tables.
+    manager = get_connection_manager()
+    held = manager.held_connection()
+
+    if (held is not None and held.in_transaction) or not manager.db_path.exists():
+        with manager.connection() as conn:
+            yield conn
+        return
+
+    with get_reader_manager().connection() as conn:
+        yield conn
+
+
+def write(job):
     """
-    # I import inside the function to avoid problems when the file loads
-    from hive_database.tables import initialize_all_tables
+    Run job(conn) on the writer thread as one transaction and return
+    what it returns. Use it for every write the app makes:
+
+    write(lambda conn: conn.execute("UPDATE ...", params).rowcount)
+    """
+    return get_writer().run(job)
+
+
+@contextmanager
+def transaction():
+    """
+    Run many statements as one unit: they are all saved, or none are.
+
+    with transaction() as conn:
+        conn.executemany(...)
 
-    # Open the connection
-    conn = get_db_connection()
+    If the thread is already inside a transaction, we just join it and
+    the outer code decides when to commit.
+    """
+    with db_connection() as conn:
+        if conn.in_transaction:
+            yield conn
+            return
+
+        conn.execute("BEGIN")
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
 
-    # Create all the tables in the database
-    initialize_all_tables(conn)
 
-    # Close the connection after finishing
-    conn.close()
+def setup_database(force=False):
+    """
+    This function sets up the database.
+    It runs another function that creates all tables, then fills empty
+    tables from the CSV backup files (a fresh install).
+
+    Streamlit runs login.py again on every click, so the real work only
+    happens the first time for each database file in this process.
+    After that the call returns straight away. Returns what
+    initialize_all_tables() reported, or "skipped".
+    """
+    # I import inside the function to avoid problems when the file loads
+    from hive_database.ingest import seed_empty_tables
+    from hive_database.tables import initialize_all_tables
 
+    db_path = str(get_connection_manager().db_path)
+    if db_path in _ready_databases and not force:
+        return "skipped"
 
+    with _setup_lock:
+        if db_path in _ready_databases and not force:
+            return "skipped"
 
+        # Create all the tables in one job on the writer thread
+        result = write(initialize_all_tables)
 
+        # marked ready first: import_csv calls setup_database() again
+        _ready_databases.add(db_path)
+        seed_empty_tables()
+    return result
@@ -0,0 +1,194 @@
+"""
+Data context snapshot for JARVIS.
+
+Every chat message sends a short text with the main figures of the
+platform to the model. The figures come from the summary counters and SQL
+aggregates (never a full table), and the finished snapshot is cached:
+
+- it is rebuilt when a write changes the data version of one of its tables
+- it is also rebuilt after CONTEXT_TTL seconds, to pick up writes made by
+  another process (the data versions only count writes in this process)
+- one cache is shared by every Streamlit session
+
+To add more figures, write a function that returns a list of
+(label, value) pairs and register it with add_context_section().
+It only runs when the snapshot is rebuilt, not for every message.
+"""
+import hashlib
+import threading
+import time
+
+from hive_database.aggregates import column_stat
+from hive_database.connection import db_connection, transaction
+from hive_database.data_loader import get_data_version
+from hive_database.summary import summary_breakdown, summary_count, summary_mean_hours
+
+# Longest time (seconds) a snapshot is used before it is built again
+CONTEXT_TTL = 60.0
+
+
+# =============== SECTIONS ===============
+
+def _breakdown_text(table, dimension):
+    """"Critical 12, High 30, ..." from the summary counters."""
+    return ", ".join(f"{value} {n}" for value, n in summary_breakdown(table, dimension))
+
+
+def cyber_section():
+    return [
+        ("Total incidents", summary_count("cyber_incidents")),
+        ("Open incidents", summary_count("cyber_incidents", "status", "Open")),
+        ("Critical incidents", summary_count("cyber_incidents", "severity", "Critical")),
+        ("Phishing incidents", summary_count("cyber_incidents", "category", "Phishing")),
+        ("Incidents by severity", _breakdown_text("cyber_incidents", "severity")),
+        ("Incidents by category", _breakdown_text("cyber_incidents", "category")),
+    ]
+
+
+def datasets_section():
+    return [
+        ("Total datasets", column_stat("datasets_metadata", "dataset_id", "count")),
+        ("Total rows across all datasets",
+         int(column_stat("datasets_metadata", "rows", "sum"))),
+        ("Largest dataset (rows)", int(column_stat("datasets_metadata", "rows", "max") or 0)),
+    ]
+
+
+def tickets_section():
+    lines = [
+        ("Total tickets", summary_count("it_tickets")),
+        ("Open tickets", summary_count("it_tickets", "status", "Open")),
+        ("Average resolution time", f"{summary_mean_hours('it_tickets'):.1f} hours"),
+        ("Tickets by priority", _breakdown_text("it_tickets", "priority")),
+    ]
+
+    # the summary table also keeps resolution hours per staff member
+    with db_connection() as conn:
+        slowest = conn.execute(
+            "SELECT value, hours_sum / hours_count FROM table_summary "
+            "WHERE table_name = 'it_tickets' AND dimension = 'assigned_to' "
+            "AND hours_count > 0 ORDER BY 2 DESC LIMIT 1"
+        ).fetchone()
+    if slowest:
+        lines.append(("Slowest average resolution", f"{slowest[0]} ({slowest[1]:.1f} hours)"))
+    return lines
+
+
+# (title, tables it reads, function) in the order they appear in the text
+CONTEXT_SECTIONS = [
+    ("CYBERSECURITY", ["cyber_incidents"], cyber_section),
+    ("DATASETS", ["datasets_metadata"], datasets_section),
+    ("IT TICKETS", ["it_tickets"], tickets_section),
+]
+
+
+def add_context_section(title, tables, func):
+    """
+    Add one more block of figures to the snapshot.
+
+    func() returns [(label, value), ...]. tables lists the tables it reads,
+    so a write to any of them rebuilds the snapshot.
+    """
+    CONTEXT_SECTIONS.append((title, list(tables), func))
+    context_cache.invalidate()
+
+
+# =============== SNAPSHOT ===============
+
+def snapshot_tables():
+    tables = []
+    for _, section_tables, _ in CONTEXT_SECTIONS:
+        for table in section_tables:
+            if table not in tables:
+                tables.append(table)
+    return tables
+
+
+def build_snapshot():
+    """
+    Work out every section and return a snapshot dict:
+        figures  - {title: [(label, value), ...]}
+        text     - the figures as the text we send to the model
+        version  - short hash of the text (for caching answers)
+        built_at - time.time() when it was made
+    """
+    figures = {}
+
+    # One read transaction, so all figures come from the same moment
+    with transaction():
+        for title, _, func in CONTEXT_SECTIONS:
+            figures[title] = func()
+
+    text = "Here is the current data from the H.I.V.E. platform:\n\n"
+    for title, lines in figures.items():
+        text += f"{title}:\n"
+        for label, value in lines:
+            text += f"- {label}: {value}\n"
+        text += "\n"
+
+    text = text.rstrip() + "\n"
+    return {
+        "figures": figures,
+        "text": text,
+        # changes only when a figure changes, also across restarts
+        "version": hashlib.sha256(text.encode("utf-8")).hexdigest()[:16],
+        "built_at": time.time(),
+    }
+
+
+class ContextCache:
+    """Keeps the last snapshot and the data versions it was built from."""
+
+    def __init__(self, ttl=CONTEXT_TTL):
+        self.ttl = ttl
+        self._snapshot = None
+        self._versions = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self):
+        versions = tuple(get_data_version(table) for table in snapshot_tables())
+
+        with self._lock:
+            if (self._snapshot is not None and versions == self._versions
+                    and time.monotonic() < self._expires):
+                self.hits += 1
+                return self._snapshot
+
+            # Build while holding the lock, so many sessions asking at the
+            # same time cause one build, not one each
+            snapshot = build_snapshot()
+            self._snapshot = snapshot
+            self._versions = versions
+            self._expires = time.monotonic() + self.ttl
+            self.builds += 1
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "builds": self.builds,
+                "age_seconds": (time.time() - self._snapshot["built_at"]
+                                if self._snapshot else None),
+            }
+
+
+# One snapshot cache for the whole process
+context_cache = ContextCache()
+
+
+def get_context_snapshot():
+    """Return the current snapshot dict (cached, see ContextCache)."""
+    return context_cache.get()
+
+
+def get_data_context():
+    """Return the data context text that goes to the model."""
+    return get_context_snapshot()["text"]
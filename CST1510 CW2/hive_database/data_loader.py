@@ -1,6 +1,10 @@
-import pandas as pd
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from hive_database.connection import get_db_connection
+
+from hive_database.connection import read_connection, write
+from hive_database.snapshots import current_version, load_snapshot
+from hive_database.write_behind import get_write_behind
 
 # Base folder for data files
 DATA_DIR = Path(__file__).parent.parent / "DATA"
@@ -10,41 +14,286 @@ CYBER_CSV = DATA_DIR / "cyber_incidents.csv"
 DATASETS_CSV = DATA_DIR / "datasets_metadata.csv"
 TICKETS_CSV = DATA_DIR / "it_tickets.csv"
 
+# Primary key of each table (used to sort and page through rows)
+TABLE_KEYS = {
+    "cyber_incidents": "incident_id",
+    "datasets_metadata": "dataset_id",
+    "it_tickets": "ticket_id",
+}
+
+# Columns of each table.
+# Column names cannot be passed as "?" parameters, so every name that goes
+# into the SQL text is checked against this list first.
+TABLE_COLUMNS = {
+    "cyber_incidents": [
+        "incident_id", "timestamp", "severity", "category", "status", "description",
+    ],
+    "datasets_metadata": [
+        "dataset_id", "name", "rows", "columns", "uploaded_by", "upload_date",
+    ],
+    "it_tickets": [
+        "ticket_id", "priority", "description", "status", "assigned_to",
+        "created_at", "resolution_time_hours",
+    ],
+}
+
+# Columns without NOT NULL in tables.py. Paging sorted by one of them
+# has to step over the NULL rows too (see query_page).
+NULLABLE_COLUMNS = {
+    "cyber_incidents": {"description"},
+    "datasets_metadata": set(),
+    "it_tickets": {"resolution_time_hours"},
+}
+
+# pandas dtype of every column of a loaded table:
+#   "category" - a few repeated words, kept once with a small code per row
+#   "datetime" - text times turned into datetime64 (unreadable ones -> NaT)
+#   "integer"  - the smallest integer type that fits (int8 .. int64)
+#   "float"    - float64; float32 would change averages in the 7th digit
+#   "text"     - left as it is
+TABLE_DTYPES = {
+    "cyber_incidents": {
+        "incident_id": "integer",
+        "timestamp": "datetime",
+        "severity": "category",
+        "category": "category",
+        "status": "category",
+        "description": "text",
+    },
+    "datasets_metadata": {
+        "dataset_id": "integer",
+        "name": "text",
+        "rows": "integer",
+        "columns": "integer",
+        "uploaded_by": "category",
+        "upload_date": "datetime",
+    },
+    "it_tickets": {
+        "ticket_id": "integer",
+        "priority": "category",
+        "description": "text",
+        "status": "category",
+        "assigned_to": "category",
+        "created_at": "datetime",
+        "resolution_time_hours": "float",
+    },
+}
+
+# How many rows one page of a dashboard table shows
+PAGE_SIZE = 50
+
+# Most memory (bytes) the shared table cache may use
+TABLE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+# =============== DATA VERSIONS ===============
+
+# Every write helper below bumps the version of the table it changed.
+# Caches use (table, version) as key, so a write makes old entries miss.
+_data_versions = {}
+_version_lock = threading.Lock()
+
+
+def bump_data_version(table):
+    """Mark a table as changed. Called after every successful write."""
+    with _version_lock:
+        _data_versions[table] = _data_versions.get(table, 0) + 1
+        return _data_versions[table]
+
+
+def get_data_version(table=None):
+    """
+    Return the current data version of one table.
+
+    Without a table, returns one number that changes whenever any table
+    changes (handy for caches that depend on all the data).
+    """
+    with _version_lock:
+        if table is None:
+            return sum(_data_versions.values())
+        return _data_versions.get(table, 0)
+
+
+# =============== TABLE CACHE ===============
+
+class TableCache:
+    """
+    Keeps loaded DataFrames in memory, shared by every Streamlit session.
+
+    Entries are keyed by (table, data version, version saved in the
+    database). When the cache uses more than max_bytes, the least recently
+    used frames are thrown away.
+    """
+
+    def __init__(self, max_bytes=TABLE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (DataFrame, size in bytes)
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached frame for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, df):
+        """Save a frame, dropping old versions of the same table first."""
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            # bigger than the whole budget, not worth keeping
+            return
+
+        table = key[0]
+        with self._lock:
+            for old_key in [k for k in self._entries if k[0] == table and k != key]:
+                self._drop(old_key)
+
+            if key in self._entries:
+                self._drop(key)
+
+            self._entries[key] = (df, size)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key):
+        _, size = self._entries.pop(key)
+        self.size -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Hit/miss counters and memory use, for a status page or a benchmark."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# One cache for the whole process
+table_cache = TableCache()
+
+
+def cache_stats():
+    """Return the hit/miss counters of the shared table cache."""
+    return table_cache.stats()
+
 
 # =============== HELPERS ===============
 
-def load_table(table_name, csv_path):
+def apply_dtypes(table_name, df):
     """
-    Try to load a table from the database.
-    If it fails or is empty, load from CSV and save to the database.
-    """
-    conn = get_db_connection()
-
-    try:
-        # Try to read table from the database
-        df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-        if df.empty:
-            # If table has no rows, we use the CSV
-            raise ValueError("table is empty")
-    except Exception:
-        # If table does not exist or error happens, read from CSV
-        df = pd.read_csv(csv_path)
-        # Save CSV data into the database table
-        df.to_sql(table_name, conn, if_exists="replace", index=False)
-
-    conn.close()
+    Give the columns of a loaded table the dtypes from TABLE_DTYPES.
+
+    pandas reads every SQLite text column as strings (objects) and every
+    number as int64 / float64. With categories, datetimes and small
+    integers the same frame takes a lot less memory.
+    """
+    import pandas as pd
+
+    for column, kind in TABLE_DTYPES.get(table_name, {}).items():
+        if column not in df.columns:
+            continue
+        if kind == "category":
+            df[column] = df[column].astype("category")
+        elif kind == "datetime":
+            df[column] = pd.to_datetime(df[column], format="ISO8601", errors="coerce")
+        elif kind == "integer":
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+        elif kind == "float":
+            df[column] = pd.to_numeric(df[column]).astype("float64")
     return df
 
 
-def run_query(sql, params=()):
+def read_table(table_name, csv_path):
     """
-    Run a write query (INSERT, UPDATE, DELETE) and then close the connection.
+    Try to load a table from the database.
+    If it fails or is empty, import the CSV into the database first.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(sql, params)
-    conn.commit()
-    conn.close()
+    # I import inside the function because ingest imports this module
+    from hive_database.ingest import import_csv
+    import pandas as pd
+
+    with read_connection() as conn:
+        try:
+            # Try to read table from the database
+            df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
+            if df.empty:
+                # If table has no rows, we use the CSV
+                raise ValueError("table is empty")
+        except Exception:
+            # If table does not exist or is empty, stream the CSV into the
+            # real table (keeps the schema) and read it back.
+            # A CSV that was already imported once is skipped.
+            if csv_path.exists():
+                import_csv(table_name, csv_path)
+            df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
+
+    return apply_dtypes(table_name, df)
+
+
+def load_table(table_name, csv_path):
+    """
+    Load a table, using the shared cache when nothing has changed.
+
+    On a cache miss the table comes from its Arrow snapshot if there is
+    one (see snapshots.py), otherwise through SQL.
+
+    The key also has the version saved in the database (one small
+    SELECT), so writes made by another process, like the ingest command
+    or a second app worker, make the cached frame miss too.
+
+    The versions are read before loading: if a write happens while we load,
+    the frame is saved under the old version and the next call reloads.
+    """
+    stored = current_version(table_name)
+    key = (table_name, get_data_version(table_name), stored)
+
+    df = table_cache.get(key)
+    if df is None:
+        df = load_snapshot(table_name, lambda: read_table(table_name, csv_path), stored)
+        if df is None:
+            df = read_table(table_name, csv_path)
+        table_cache.put(key, df)
+
+    # shallow copy so a page adding a column does not change the cached frame
+    return df.copy(deep=False)
+
+
+def run_query(sql, params=(), table=None):
+    """
+    Run a write query (INSERT, UPDATE, DELETE) and then give the connection back.
+
+    table: name of the table the query changes, so its cached data is
+    marked as old.
+    """
+    # the writer thread commits it, so two writes never fight over the lock
+    write(lambda conn: conn.execute(sql, params))
+
+    if table is not None:
+        bump_data_version(table)
 
 
 def update_row(table, id_column, row_id, **kwargs):
@@ -61,7 +310,8 @@ def update_row(table, id_column, row_id, **kwargs):
 
     run_query(
         f"UPDATE {table} SET {set_clause} WHERE {id_column} = ?",
-        values
+        values,
+        table=table,
     )
 
 
@@ -71,7 +321,8 @@ def delete_row(table, id_column, row_id):
     """
     run_query(
         f"DELETE FROM {table} WHERE {id_column} = ?",
-        (row_id,)
+        (row_id,),
+        table=table,
     )
 
 
@@ -92,16 +343,371 @@ def load_it_tickets():
     return load_table("it_tickets", TICKETS_CSV)
 
 
+# =============== QUERY API ===============
+
+def check_column(table, column):
+    """Stop with an error if the column is not part of the table."""
+    if column not in TABLE_COLUMNS.get(table, []):
+        raise ValueError(f"unknown column {column!r} for table {table!r}")
+
+
+def build_where(table, filters=None, minimums=None):
+    """
+    Build the WHERE part of a query from the page filters.
+
+    filters: {column: list of allowed values}, like a multiselect.
+             None means "no filter", an empty list matches nothing.
+    minimums: {column: smallest allowed value}, like a number input.
+
+    Returns (sql_text, params).
+    """
+    parts, params = [], []
+
+    for column, values in (filters or {}).items():
+        if values is None:
+            continue
+        check_column(table, column)
+        values = list(values)
+        if not values:
+            parts.append("0")
+            continue
+        marks = ", ".join("?" for _ in values)
+        parts.append(f"{column} IN ({marks})")
+        params.extend(values)
+
+    for column, value in (minimums or {}).items():
+        if value is None:
+            continue
+        check_column(table, column)
+        parts.append(f"{column} >= ?")
+        params.append(value)
+
+    sql = " WHERE " + " AND ".join(parts) if parts else ""
+    return sql, params
+
+
+def _plain(value):
+    """Turn numpy numbers into normal Python values for sqlite3."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def distinct_values(table, column):
+    """Return the sorted distinct values of one column (for multiselects)."""
+    check_column(table, column)
+
+    with read_connection() as conn:
+        rows = conn.execute(
+            f"SELECT DISTINCT {column} FROM {table} "
+            f"WHERE {column} IS NOT NULL ORDER BY {column}"
+        ).fetchall()
+
+    return [row[0] for row in rows]
+
+
+def count_rows(table, filters=None, minimums=None):
+    """Count the rows that match the filters, without loading them."""
+    where, params = build_where(table, filters, minimums)
+
+    with read_connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+
+
+def query_page(table, filters=None, minimums=None, sort_by=None,
+               descending=False, page_size=PAGE_SIZE, cursor=None):
+    """
+    Load one page of rows, filtered and sorted inside SQLite.
+
+    Paging uses the last row of the previous page (keyset pagination)
+    instead of OFFSET, so page 100 is as fast as page 1.
+
+    cursor: the "next_cursor" from the previous page, or None for page 1.
+
+    Returns a dict:
+        rows        - DataFrame with at most page_size rows
+        total       - how many rows match the filters in total
+        next_cursor - cursor for the next page, or None on the last page
+    """
+    # pandas is imported here, so pages that only need numbers load faster
+    import pandas as pd
+
+    key = TABLE_KEYS[table]
+    sort_by = sort_by or key
+    check_column(table, sort_by)
+
+    where, params = build_where(table, filters, minimums)
+    total = count_rows(table, filters, minimums)
+
+    direction = "DESC" if descending else "ASC"
+    compare = "<" if descending else ">"
+
+    # sort column first, then the id so the order is always the same
+    # the cursor is (sort value, id) of the last row already shown
+    if sort_by == key:
+        order = f"{key} {direction}"
+        keyset = f"{key} {compare} ?"
+        keyset_params = [cursor[1]] if cursor else []
+    elif sort_by in NULLABLE_COLUMNS[table]:
+        # NULL is never > or < anything, so a plain keyset would skip
+        # those rows. They go last (both directions) and are paged by id.
+        order = f"{sort_by} IS NULL, {sort_by} {direction}, {key} {direction}"
+        if cursor is not None and cursor[0] is None:
+            keyset = f"{sort_by} IS NULL AND {key} {compare} ?"
+            keyset_params = [cursor[1]]
+        else:
+            keyset = f"({sort_by} IS NULL OR ({sort_by}, {key}) {compare} (?, ?))"
+            keyset_params = list(cursor) if cursor else []
+    else:
+        order = f"{sort_by} {direction}, {key} {direction}"
+        keyset = f"({sort_by}, {key}) {compare} (?, ?)"
+        keyset_params = list(cursor) if cursor else []
+
+    if cursor is not None:
+        where += (" AND " if where else " WHERE ") + keyset
+        params = params + keyset_params
+
+    sql = f"SELECT * FROM {table}{where} ORDER BY {order} LIMIT ?"
+
+    with read_connection() as conn:
+        # ask for one extra row to know if there is another page
+        rows = pd.read_sql_query(sql, conn, params=params + [page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows.iloc[:page_size]
+        last = rows.iloc[-1]
+        # pandas shows a NULL as NaN / None, the cursor needs None
+        value = None if pd.isna(last[sort_by]) else _plain(last[sort_by])
+        next_cursor = (value, _plain(last[key]))
+
+    return {"rows": rows, "total": total, "next_cursor": next_cursor}
+
+
+def search_page(table, text, filters=None, minimums=None,
+                page_size=PAGE_SIZE, cursor=None):
+    """
+    Load one page of rows whose description contains the search words,
+    best match first.
+
+    The words are looked up in the table's FTS5 index (see fulltext.py)
+    and ranked with bm25, so no description is read one by one.
+    With more than RANK_MAX_MATCHES matches the rows come newest first
+    instead (ranking them all would take longer than the search).
+    The filters work like in query_page.
+
+    cursor: the "next_cursor" from the previous page, or None for page 1.
+            Here it is the number of rows already shown (ranks are
+            worked out per search, so there is no sort value to keep).
+
+    Returns the same dict as query_page (rows, total, next_cursor),
+    plus ranked (True if the rows are in best-match order).
+    With no words to look for (e.g. "!!!") it is just query_page, and
+    cursor is then query_page's own cursor, so "Next" still works.
+    """
+    import pandas as pd
+
+    from hive_database.fulltext import RANK_MAX_MATCHES, fulltext_name, match_expression
+
+    match = match_expression(text)
+    if match is None:
+        return query_page(table, filters, minimums, page_size=page_size, cursor=cursor)
+
+    key = TABLE_KEYS[table]
+    fts = fulltext_name(table)
+    offset = cursor or 0
+
+    where, params = build_where(table, filters, minimums)
+    where = where.replace(" WHERE ", " AND ", 1)
+
+    # the index gives the matching ids, the join brings the whole rows
+    source = (
+        f"FROM {fts} JOIN {table} ON {table}.{key} = {fts}.rowid "
+        f"WHERE {fts} MATCH ?{where}"
+    )
+    params = [match] + params
+
+    with read_connection() as conn:
+        total = conn.execute(f"SELECT COUNT(*) {source}", params).fetchone()[0]
+
+        ranked = total <= RANK_MAX_MATCHES
+        if ranked:
+            order = f"{fts}.rank, {fts}.rowid"
+        else:
+            # the index already keeps the ids in order, no sorting needed
+            order = f"{fts}.rowid DESC"
+
+        rows = pd.read_sql_query(
+            f"SELECT {table}.* {source} ORDER BY {order} LIMIT ? OFFSET ?",
+            conn,
+            params=params + [page_size + 1, offset],
+        )
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows.iloc[:page_size]
+        next_cursor = offset + page_size
+
+    return {"rows": rows, "total": total, "next_cursor": next_cursor, "ranked": ranked}
+
+
+def get_row(table, row_id):
+    """Return one row as a dict, or None if the id does not exist."""
+    key = TABLE_KEYS[table]
+
+    with read_connection() as conn:
+        row = conn.execute(
+            f"SELECT * FROM {table} WHERE {key} = ?", (_plain(row_id),)
+        ).fetchone()
+
+    return dict(row) if row is not None else None
+
+
+def list_ids(table):
+    """
+    Return every id of a table, smallest first (for the update and
+    delete pickers). Only the key column is read, straight from its index.
+    """
+    key = TABLE_KEYS[table]
+
+    with read_connection() as conn:
+        rows = conn.execute(f"SELECT {key} FROM {table} ORDER BY {key}").fetchall()
+
+    return [row[0] for row in rows]
+
+
+def next_id(table):
+    """Return the id a new row should get (largest id + 1)."""
+    key = TABLE_KEYS[table]
+
+    with read_connection() as conn:
+        largest = conn.execute(f"SELECT MAX({key}) FROM {table}").fetchone()[0]
+
+    return 1 if largest is None else int(largest) + 1
+
+
+# =============== BATCH WRITES ===============
+# One transaction (one fsync) for the whole batch instead of one per row.
+
+def run_many(sql, rows, table=None):
+    """
+    Run the same write query for many rows with executemany.
+
+    Everything happens in one transaction. Returns how many rows changed.
+    """
+    changed = write(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    if table is not None:
+        bump_data_version(table)
+    return changed
+
+
+def bulk_create(table, rows):
+    """
+    Insert many rows at once.
+
+    rows: list of tuples in the column order of the table,
+          or list of dicts with column names as keys.
+    """
+    columns = TABLE_COLUMNS[table]
+    rows = [
+        tuple(_plain(row.get(col)) for col in columns) if isinstance(row, dict)
+        else tuple(_plain(value) for value in row)
+        for row in rows
+    ]
+    if not rows:
+        return 0
+
+    marks = ", ".join("?" for _ in columns)
+    return run_many(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})",
+        rows,
+        table=table,
+    )
+
+
+def bulk_update(table, ids=None, filters=None, **changes):
+    """
+    Change the same columns on many rows.
+
+    Pick the rows with ids (a list of primary keys) or with filters
+    (same dict as build_where, e.g. {"status": ["Open"]}).
+    Example: bulk_update("cyber_incidents", ids=[1001, 1002], status="Closed")
+
+    Returns how many rows changed.
+    """
+    if not changes:
+        raise ValueError("nothing to change")
+    if not ids and not filters:
+        raise ValueError("give ids or filters, refusing to update every row")
+
+    for column in changes:
+        check_column(table, column)
+
+    key = TABLE_KEYS[table]
+    set_clause = ", ".join(f"{col} = ?" for col in changes)
+    values = [_plain(value) for value in changes.values()]
+
+    if ids:
+        return run_many(
+            f"UPDATE {table} SET {set_clause} WHERE {key} = ?",
+            [values + [_plain(row_id)] for row_id in ids],
+            table=table,
+        )
+
+    where, params = build_where(table, filters)
+    if not where:
+        # e.g. {"status": None} from an untouched multiselect
+        raise ValueError("the filters select nothing, refusing to update every row")
+    sql = f"UPDATE {table} SET {set_clause}{where}"
+    changed = write(lambda conn: conn.execute(sql, values + params).rowcount)
+
+    bump_data_version(table)
+    return changed
+
+
+def bulk_delete(table, ids=None, filters=None):
+    """
+    Delete many rows, picked by ids or by filters (see bulk_update).
+
+    Returns how many rows were deleted.
+    """
+    if not ids and not filters:
+        raise ValueError("give ids or filters, refusing to delete every row")
+
+    key = TABLE_KEYS[table]
+
+    if ids:
+        return run_many(
+            f"DELETE FROM {table} WHERE {key} = ?",
+            [(_plain(row_id),) for row_id in ids],
+            table=table,
+        )
+
+    where, params = build_where(table, filters)
+    if not where:
+        raise ValueError("the filters select nothing, refusing to delete every row")
+    changed = write(lambda conn: conn.execute(f"DELETE FROM {table}{where}", params).rowcount)
+
+    bump_data_version(table)
+    return changed
+
+
 # =============== CYBER INCIDENTS CRUD ===============
 
-def create_incident(incident_id, timestamp, severity, category, status, description):
+def create_incident(incident_id, timestamp, severity, category, status, description,
+                    wait=True):
     """
     Add a new cyber incident row into the table.
+
+    wait=False: queue the row to be saved together with other new rows
+    (see write_behind.py) and return a Future that is done once it is
+    committed. Good for many incidents raised by automatic alerts.
     """
-    run_query(
-        "INSERT INTO cyber_incidents VALUES (?, ?, ?, ?, ?, ?)",
-        (incident_id, timestamp, severity, category, status, description)
-    )
+    sql = "INSERT INTO cyber_incidents VALUES (?, ?, ?, ?, ?, ?)"
+    params = (incident_id, timestamp, severity, category, status, description)
+
+    if not wait:
+        return get_write_behind().submit("cyber_incidents", sql, params)
+    run_query(sql, params, table="cyber_incidents")
 
 
 def update_incident(incident_id, **kwargs):
@@ -119,6 +725,24 @@ def delete_incident(incident_id):
     delete_row("cyber_incidents", "incident_id", incident_id)
 
 
+def bulk_create_incidents(rows):
+    """Add many incidents in one transaction. Rows as in create_incident."""
+    return bulk_create("cyber_incidents", rows)
+
+
+def bulk_update_incidents(ids=None, filters=None, **kwargs):
+    """
+    Update many incidents at once, by id list or by filters.
+    Example: bulk_update_incidents([1001, 1002], status="Closed")
+    """
+    return bulk_update("cyber_incidents", ids=ids, filters=filters, **kwargs)
+
+
+def bulk_delete_incidents(ids=None, filters=None):
+    """Delete many incidents at once, by id list or by filters."""
+    return bulk_delete("cyber_incidents", ids=ids, filters=filters)
+
+
 # =============== DATASETS CRUD ===============
 
 def create_dataset(dataset_id, name, rows, columns, uploaded_by, upload_date):
@@ -127,7 +751,8 @@ def create_dataset(dataset_id, name, rows, columns, uploaded_by, upload_date):
     """
     run_query(
         "INSERT INTO datasets_metadata VALUES (?, ?, ?, ?, ?, ?)",
-        (dataset_id, name, rows, columns, uploaded_by, upload_date)
+        (dataset_id, name, rows, columns, uploaded_by, upload_date),
+        table="datasets_metadata",
     )
 
 
@@ -148,14 +773,19 @@ def delete_dataset(dataset_id):
 
 # =============== IT TICKETS CRUD ===============
 
-def create_ticket(ticket_id, priority, description, status, assigned_to, created_at, resolution_time):
+def create_ticket(ticket_id, priority, description, status, assigned_to, created_at, resolution_time,
+                  wait=True):
     """
     Add a new IT ticket row into the table.
+
+    wait=False: queue it and return a Future, like create_incident.
     """
-    run_query(
-        "INSERT INTO it_tickets VALUES (?, ?, ?, ?, ?, ?, ?)",
-        (ticket_id, priority, description, status, assigned_to, created_at, resolution_time)
-    )
+    sql = "INSERT INTO it_tickets VALUES (?, ?, ?, ?, ?, ?, ?)"
+    params = (ticket_id, priority, description, status, assigned_to, created_at, resolution_time)
+
+    if not wait:
+        return get_write_behind().submit("it_tickets", sql, params)
+    run_query(sql, params, table="it_tickets")
 
 
 def update_ticket(ticket_id, **kwargs):
@@ -171,3 +801,21 @@ def delete_ticket(ticket_id):
     Delete one IT ticket from the table.
     """
     delete_row("it_tickets", "ticket_id", ticket_id)
+
+
+def bulk_create_tickets(rows):
+    """Add many IT tickets in one transaction. Rows as in create_ticket."""
+    return bulk_create("it_tickets", rows)
+
+
+def bulk_update_tickets(ids=None, filters=None, **kwargs):
+    """
+    Update many IT tickets at once, by id list or by filters.
+    Example: bulk_update_tickets(filters={"assigned_to": ["IT_Support_A"]}, priority="High")
+    """
+    return bulk_update("it_tickets", ids=ids, filters=filters, **kwargs)
+
+
+def bulk_delete_tickets(ids=None, filters=None):
+    """Delete many IT tickets at once, by id list or by filters."""
+    return bulk_delete("it_tickets", ids=ids, filters=filters)
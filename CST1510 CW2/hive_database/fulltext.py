@@ -0,0 +1,154 @@
+"""
+Full-text search over incident and ticket descriptions with SQLite FTS5.
+
+Each table gets an FTS5 index, e.g. cyber_incidents_fts. It does not keep
+its own copy of the text (content= option): it points at the real table,
+and triggers add, remove and change its entries together with the rows.
+A search for "vpn" reads the word's entry in the index instead of every
+description in the table.
+
+Run from the "CST1510 CW2" folder to check or rebuild the indexes:
+    python -m hive_database.fulltext check
+    python -m hive_database.fulltext rebuild
+"""
+import re
+import sys
+
+from hive_database.connection import db_connection, write
+
+# Tables with a full-text index: table -> (key column, text column)
+FULLTEXT_TABLES = {
+    "cyber_incidents": ("incident_id", "description"),
+    "it_tickets": ("ticket_id", "description"),
+}
+
+# porter: "failed" also finds "failure", "fails", ...
+# unicode61: lower case, accents and punctuation removed
+FULLTEXT_TOKENIZER = "porter unicode61"
+
+# Ranking reads every match, which is slow for a word that is in a big
+# part of the table. Searches with more matches than this are shown
+# newest first instead, which the index can do one page at a time.
+RANK_MAX_MATCHES = 5000
+
+# Letters and digits typed in the search box
+SEARCH_WORD = re.compile(r"\w+")
+
+
+def fulltext_name(table):
+    return f"{table}_fts"
+
+
+# =============== SCHEMA ===============
+
+def create_fulltext_triggers(conn, table):
+    """Create the INSERT / UPDATE / DELETE triggers for one table."""
+    key, text = FULLTEXT_TABLES[table]
+    fts = fulltext_name(table)
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts} (rowid, {text}) VALUES (NEW.{key}, NEW.{text});
+        END
+    """)
+    # the 'delete' command needs the old text to find the old entries
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {text}) VALUES ('delete', OLD.{key}, OLD.{text});
+        END
+    """)
+    # only when the text (or the key) changes, not on status updates
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update
+        AFTER UPDATE OF {key}, {text} ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {text}) VALUES ('delete', OLD.{key}, OLD.{text});
+            INSERT INTO {fts} (rowid, {text}) VALUES (NEW.{key}, NEW.{text});
+        END
+    """)
+
+
+def create_fulltext_schema(conn):
+    """Create the FTS5 index of every table and the triggers that fill it."""
+    for table, (key, text) in FULLTEXT_TABLES.items():
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fulltext_name(table)} USING fts5(
+                {text},
+                content='{table}',
+                content_rowid='{key}',
+                tokenize='{FULLTEXT_TOKENIZER}'
+            )
+        """)
+        create_fulltext_triggers(conn, table)
+
+
+# =============== REBUILD / CHECK ===============
+
+def rebuild_fulltext(conn, table=None):
+    """
+    Build the index again from the table's rows.
+
+    Use it after a bulk load without triggers, or to repair the index.
+    """
+    tables = [table] if table else list(FULLTEXT_TABLES)
+
+    for name in tables:
+        fts = fulltext_name(name)
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def check_fulltext(conn):
+    """
+    Compare every index with its table.
+
+    Returns a list of (table, error text). Empty list = all good.
+    """
+    problems = []
+    for table in FULLTEXT_TABLES:
+        fts = fulltext_name(table)
+        try:
+            # rank = 1 also compares the index with the table's text
+            conn.execute(
+                f"INSERT INTO {fts} ({fts}, rank) VALUES ('integrity-check', 1)"
+            )
+        except Exception as e:
+            problems.append((table, str(e)))
+    return problems
+
+
+# =============== QUERIES ===============
+
+def match_expression(text):
+    """
+    Turn what the user typed into a safe FTS5 query.
+
+    Every word is quoted, so characters like - " * ( ) are not read as
+    FTS5 syntax. All words must be in the text; the last one may be the
+    start of a word ("pass" finds "password"). Returns None if there is
+    no word to look for.
+    """
+    words = SEARCH_WORD.findall(text or "")
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+
+    if command == "rebuild":
+        write(rebuild_fulltext)
+        print("full-text indexes rebuilt")
+    else:
+        # integrity-check is sent as an INSERT, so it needs a normal connection
+        with db_connection() as conn:
+            problems = check_fulltext(conn)
+            for table, error in problems:
+                print(f"{table}: {error}")
+            print("all good" if not problems else f"{len(problems)} problems")
@@ -0,0 +1,211 @@
+"""
+Load the CSV backup files into the database tables.
+
+The file is read a chunk at a time and every chunk is inserted with
+executemany, all inside one transaction, so a big export never has to fit
+in memory and a failed import leaves the table as it was.
+
+The transaction runs on the writer thread (connection.write), like every
+other write, so writes made during an import wait in its queue instead
+of failing with "database is locked" after busy_timeout.
+
+Run from the "CST1510 CW2" folder to import all CSV files:
+    python -m hive_database.ingest
+"""
+import csv
+import hashlib
+import time
+from datetime import datetime
+
+from hive_database.connection import read_connection, setup_database, write
+from hive_database.data_loader import (
+    CYBER_CSV,
+    DATASETS_CSV,
+    TICKETS_CSV,
+    bump_data_version,
+    check_column,
+)
+from hive_database.tables import rebuild_derived
+
+# Rows sent to SQLite in one executemany call
+CHUNK_ROWS = 50000
+
+# Which CSV file belongs to which table
+CSV_FILES = {
+    "cyber_incidents": CYBER_CSV,
+    "datasets_metadata": DATASETS_CSV,
+    "it_tickets": TICKETS_CSV,
+}
+
+
+def file_checksum(path, block_size=1024 * 1024):
+    """Return the sha256 of a file, reading it one block at a time."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_chunks(reader, chunk_rows):
+    """
+    Yield lists of at most chunk_rows rows from a csv reader.
+
+    Empty cells become None (NULL) instead of an empty string.
+    """
+    chunk = []
+    for row in reader:
+        chunk.append([value if value != "" else None for value in row])
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def last_import_checksum(conn, table):
+    """Return the checksum saved for the last import into the table, or None."""
+    row = conn.execute(
+        "SELECT checksum FROM csv_imports WHERE table_name = ?", (table,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def table_extras(conn, table):
+    """
+    Return (type, name, sql) for the indexes and triggers we made on a table.
+    """
+    return conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+        (table,),
+    ).fetchall()
+
+
+def load_csv(conn, table, csv_path, checksum, chunk_rows=CHUNK_ROWS):
+    """
+    Replace the rows of the table with the CSV rows, on conn.
+
+    This is the writing part of import_csv. It runs inside the caller's
+    transaction. Returns how many rows were loaded.
+    """
+    rows = 0
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        for column in header:
+            check_column(table, column)
+
+        marks = ", ".join("?" for _ in header)
+        sql = f"INSERT INTO {table} ({', '.join(header)}) VALUES ({marks})"
+
+        # Updating every index and running every trigger row by row
+        # is slow. We drop them, load, then build indexes once and
+        # recount the summaries. Still one transaction.
+        extras = table_extras(conn, table)
+        for kind, name, _ in extras:
+            conn.execute(f"DROP {kind.upper()} {name}")
+
+        conn.execute(f"DELETE FROM {table}")
+
+        for chunk in read_chunks(reader, chunk_rows):
+            conn.executemany(sql, chunk)
+            rows += len(chunk)
+
+        for _, _, extra_sql in extras:
+            conn.execute(extra_sql)
+        rebuild_derived(conn, table)
+
+        conn.execute(
+            "INSERT OR REPLACE INTO csv_imports "
+            "(table_name, checksum, rows, imported_at) VALUES (?, ?, ?, ?)",
+            (table, checksum, rows, datetime.now().isoformat(timespec="seconds")),
+        )
+    return rows
+
+
+def import_csv(table, csv_path, chunk_rows=CHUNK_ROWS, force=False):
+    """
+    Replace the rows of a table with the rows of a CSV file.
+
+    The table keeps the schema from tables.py (primary key, NOT NULL, ...).
+    SQLite turns the text values into numbers for INTEGER and REAL columns.
+
+    If the file has the same checksum as the last import, nothing happens
+    unless force=True.
+
+    Returns a report dict: table, rows, seconds, rows_per_second, skipped.
+    """
+    start = time.perf_counter()
+    checksum = file_checksum(csv_path)
+
+    setup_database()
+    with read_connection() as conn:
+        unchanged = not force and last_import_checksum(conn, table) == checksum
+
+    if unchanged:
+        return {
+            "table": table,
+            "rows": 0,
+            "seconds": time.perf_counter() - start,
+            "rows_per_second": 0.0,
+            "skipped": True,
+        }
+
+    # one job on the writer thread: committed as a whole or rolled back
+    rows = write(lambda conn: load_csv(conn, table, csv_path, checksum, chunk_rows))
+
+    bump_data_version(table)
+
+    seconds = time.perf_counter() - start
+    return {
+        "table": table,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "skipped": False,
+    }
+
+
+def format_report(report):
+    """Make one readable line out of an import report."""
+    if report["skipped"]:
+        return f"{report['table']}: unchanged, skipped"
+    return (
+        f"{report['table']}: {report['rows']:,} rows in {report['seconds']:.2f} s "
+        f"({report['rows_per_second']:,.0f} rows/s)"
+    )
+
+
+def seed_empty_tables():
+    """
+    Fill the tables that have no rows yet from their CSV backup files.
+
+    setup_database() calls this, so a fresh install shows the CSV data
+    on every page. A table whose rows were deleted on purpose stays empty,
+    because the same file is not imported twice (see the checksum).
+    Returns the reports of the imports that ran.
+    """
+    reports = []
+    for table, path in CSV_FILES.items():
+        if not path.exists():
+            continue
+        with read_connection() as conn:
+            empty = conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+        if empty:
+            reports.append(import_csv(table, path))
+    return reports
+
+
+def import_all(force=False):
+    """Import every CSV backup file. Returns the list of reports."""
+    return [
+        import_csv(table, path, force=force)
+        for table, path in CSV_FILES.items()
+        if path.exists()
+    ]
+
+
+if __name__ == "__main__":
+    for report in import_all():
+        print(format_report(report))
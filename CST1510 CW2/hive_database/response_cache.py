@@ -0,0 +1,178 @@
+"""
+On-disk cache of JARVIS answers (the response_cache table).
+
+An answer is saved under a key made from:
+- the normalised question ("How many critical incidents?" and
+  "how many  critical incidents" are the same question)
+- the model name
+- the data version, i.e. the version hash of the context snapshot
+
+Any write that changes a figure in the snapshot gives a new data version,
+so old answers simply stop matching. Old and unused entries are removed
+by age (max_age) and by count (max_entries, least recently used first).
+"""
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+
+from hive_database.connection import get_writer, read_connection, write
+
+# Most answers we keep on disk
+RESPONSE_CACHE_MAX_ENTRIES = 1000
+
+# Answers older than this (seconds) are removed, even if the data did not change
+RESPONSE_CACHE_MAX_AGE = 24 * 60 * 60.0
+
+# Run the eviction every this many saved answers
+EVICT_EVERY = 20
+
+
+def normalise_question(question):
+    """Lower case, single spaces, no punctuation at the end."""
+    text = unicodedata.normalize("NFKC", question).casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!. ")
+
+
+def cache_key(question, model, data_version):
+    raw = f"{model}\n{data_version}\n{normalise_question(question)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Reads and writes the response_cache table and counts hits and misses."""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 max_age=RESPONSE_CACHE_MAX_AGE, enabled=True):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._saves = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question, model, data_version):
+        """Return the saved answer, or None."""
+        if not self.enabled:
+            return None
+
+        key = cache_key(question, model, data_version)
+        now = time.time()
+
+        with read_connection() as conn:
+            row = conn.execute(
+                "SELECT answer FROM response_cache WHERE key = ? AND created_at >= ?",
+                (key, now - self.max_age),
+            ).fetchone()
+
+        if row is not None:
+            # only bookkeeping for the eviction: queue it, the answer does not wait
+            get_writer().submit(lambda conn: conn.execute(
+                "UPDATE response_cache SET hits = hits + 1, last_used = ? WHERE key = ?",
+                (now, key),
+            ))
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row else None
+
+    def put(self, question, model, data_version, answer):
+        """Save an answer. Only call this for real answers, not errors."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        normalised = normalise_question(question)
+
+        write(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO response_cache "
+            "(key, question, model, data_version, answer, created_at, last_used, hits, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)",
+            (
+                cache_key(question, model, data_version),
+                normalised,
+                model,
+                data_version,
+                answer,
+                now,
+                now,
+                len(normalised.encode("utf-8")) + len(answer.encode("utf-8")),
+            ),
+        ))
+
+        with self._lock:
+            self._saves += 1
+            due = self._saves % EVICT_EVERY == 1
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Remove answers that are too old, then the least used over max_entries."""
+        def delete_old(conn):
+            old = conn.execute(
+                "DELETE FROM response_cache WHERE created_at < ?",
+                (time.time() - self.max_age,),
+            ).rowcount
+            extra = conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                "  SELECT key FROM response_cache ORDER BY last_used DESC"
+                "  LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            return old + extra
+
+        return write(delete_old)
+
+    def clear(self):
+        write(lambda conn: conn.execute("DELETE FROM response_cache"))
+
+    def stats(self):
+        """Hits and misses of this process, plus what is on disk."""
+        with read_connection() as conn:
+            entries, size, saved_hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) "
+                "FROM response_cache"
+            ).fetchone()
+
+        with self._lock:
+            asked = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / asked if asked else 0.0,
+                "entries": entries,
+                "bytes": size,
+                "hits_on_disk": saved_hits,
+            }
+
+
+# One cache object for the whole process (the data itself is in SQLite)
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the shared response cache, creating it the first time."""
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def configure_response_cache(**options):
+    """Replace the shared cache, e.g. configure_response_cache(max_entries=100)."""
+    global _cache
+
+    with _cache_lock:
+        _cache = ResponseCache(**options)
+    return _cache
@@ -0,0 +1,349 @@
+"""
+Hourly and daily counters for the trend charts, kept up to date by triggers.
+
+The time_rollup table has one row per (table, grain, column, time bucket,
+value), e.g. ("cyber_incidents", "day", "severity", "2024-04-12", "High")
+holding how many incidents of that day were High. The column "*" with
+value "*" is the total of the bucket.
+
+A chart of one year reads at most 365 buckets per value (8,760 for the
+hourly heatmap), no matter how many incidents or tickets there are.
+
+Run from the "CST1510 CW2" folder to check or repair the rollups:
+    python -m hive_database.rollups verify
+    python -m hive_database.rollups rebuild
+"""
+import math
+import sys
+
+from hive_database.connection import read_connection, write
+from hive_database.summary import SUMMARY_HOURS
+
+# Column with the time of each row
+ROLLUP_TIME = {
+    "cyber_incidents": "timestamp",
+    "it_tickets": "created_at",
+}
+
+# Columns we keep counts for, per table
+ROLLUP_DIMENSIONS = {
+    "cyber_incidents": ["severity", "category", "status"],
+    "it_tickets": ["priority", "status"],
+}
+
+# Bucket size -> strftime format of the bucket.
+# strftime also reads "2024-04-12" and "2024-04-12T19:00:00";
+# a time it cannot read gives NULL and the row is left out.
+# "hour" must stay the smallest: rebuild_rollups makes the others from it.
+GRAINS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+}
+
+# Default length of a trend chart
+TREND_DAYS = 365
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def bucket_sql(table, grain, row=None):
+    """SQL for the bucket of a row ("NEW"/"OLD" in a trigger, None in a SELECT)."""
+    column = ROLLUP_TIME[table]
+    if row:
+        column = f"{row}.{column}"
+    return f"strftime('{GRAINS[grain]}', {column})"
+
+
+# =============== SCHEMA ===============
+
+def _change_sql(table, row, sign):
+    """
+    SQL that adds (sign "+") or removes (sign "-") one row from the rollups.
+
+    row: "NEW" or "OLD" inside a trigger.
+    """
+    hours = SUMMARY_HOURS.get(table)
+    hours_sum = f"COALESCE({row}.{hours}, 0)" if hours else "0"
+    hours_count = f"({row}.{hours} IS NOT NULL)" if hours else "0"
+
+    targets = [("'*'", "'*'")] + [
+        (f"'{column}'", f"{row}.{column}") for column in ROLLUP_DIMENSIONS[table]
+    ]
+
+    statements = []
+    for grain in GRAINS:
+        bucket = bucket_sql(table, grain, row)
+        for dimension, value in targets:
+            statements.append(f"""
+                INSERT INTO time_rollup
+                    (table_name, grain, dimension, bucket, value, n, hours_sum, hours_count)
+                SELECT '{table}', '{grain}', {dimension}, {bucket}, {value},
+                       {sign}1, {sign}{hours_sum}, {sign}{hours_count}
+                WHERE {bucket} IS NOT NULL AND {value} IS NOT NULL
+                ON CONFLICT (table_name, grain, dimension, bucket, value) DO UPDATE SET
+                    n = n + excluded.n,
+                    hours_sum = hours_sum + excluded.hours_sum,
+                    hours_count = hours_count + excluded.hours_count;""")
+    return "".join(statements)
+
+
+def create_rollup_triggers(conn, table):
+    """Create the INSERT / UPDATE / DELETE triggers for one table."""
+    watched = [ROLLUP_TIME[table]] + ROLLUP_DIMENSIONS[table] + (
+        [SUMMARY_HOURS[table]] if table in SUMMARY_HOURS else []
+    )
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_insert
+        AFTER INSERT ON {table}
+        BEGIN {_change_sql(table, "NEW", "+")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_delete
+        AFTER DELETE ON {table}
+        BEGIN {_change_sql(table, "OLD", "-")}
+        END
+    """)
+    # only when the time or a counted column changes
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_update
+        AFTER UPDATE OF {', '.join(watched)} ON {table}
+        BEGIN {_change_sql(table, "OLD", "-")} {_change_sql(table, "NEW", "+")}
+        END
+    """)
+
+
+def create_rollup_schema(conn):
+    """Create the time_rollup table and the triggers that fill it."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS time_rollup (
+            table_name TEXT NOT NULL,              -- cyber_incidents or it_tickets
+            grain TEXT NOT NULL,                   -- 'hour' or 'day'
+            dimension TEXT NOT NULL,               -- column name, or '*' for the total
+            bucket TEXT NOT NULL,                  -- '2024-04-12 19:00' or '2024-04-12'
+            value TEXT NOT NULL,                   -- column value, or '*' for the total
+            n INTEGER NOT NULL DEFAULT 0,          -- how many rows
+            hours_sum REAL NOT NULL DEFAULT 0,     -- sum of resolution hours
+            hours_count INTEGER NOT NULL DEFAULT 0, -- rows that have resolution hours
+            PRIMARY KEY (table_name, grain, dimension, bucket, value)
+        ) WITHOUT ROWID
+    """)
+
+    for table in ROLLUP_DIMENSIONS:
+        create_rollup_triggers(conn, table)
+
+
+# =============== REBUILD / VERIFY ===============
+
+def _actual_sql(table, grain):
+    """SELECT that works out the real rollups of one grain from the table."""
+    hours = SUMMARY_HOURS.get(table)
+    hours_sum = f"COALESCE(SUM({hours}), 0)" if hours else "0"
+    hours_count = f"COUNT({hours})" if hours else "0"
+    bucket = bucket_sql(table, grain)
+
+    parts = [
+        f"SELECT '{table}', '{grain}', '*', {bucket} AS b, '*', COUNT(*), "
+        f"{hours_sum}, {hours_count} FROM {table} WHERE b IS NOT NULL GROUP BY b"
+    ]
+    for column in ROLLUP_DIMENSIONS[table]:
+        parts.append(
+            f"SELECT '{table}', '{grain}', '{column}', {bucket} AS b, {column}, COUNT(*), "
+            f"{hours_sum}, {hours_count} FROM {table} "
+            f"WHERE b IS NOT NULL AND {column} IS NOT NULL GROUP BY b, {column}"
+        )
+    return " UNION ALL ".join(parts)
+
+
+def _from_base_sql(table, grain):
+    """Like _actual_sql, but reading the small rollup_base table."""
+    bucket = "bucket" if grain == "hour" else f"strftime('{GRAINS[grain]}', bucket)"
+    sums = "SUM(n), SUM(hours_sum), SUM(hours_count)"
+
+    parts = [
+        f"SELECT '{table}', '{grain}', '*', {bucket} AS b, '*', {sums} "
+        f"FROM temp.rollup_base GROUP BY b"
+    ]
+    for column in ROLLUP_DIMENSIONS[table]:
+        parts.append(
+            f"SELECT '{table}', '{grain}', '{column}', {bucket} AS b, {column}, {sums} "
+            f"FROM temp.rollup_base WHERE {column} IS NOT NULL GROUP BY b, {column}"
+        )
+    return " UNION ALL ".join(parts)
+
+
+def rebuild_rollups(conn, table=None):
+    """
+    Throw the rollups away and count everything again from the tables.
+
+    Use it after a bulk load without triggers, or to repair drift.
+    The table is read only once: first into counts per hour and
+    combination of values (rollup_base), then every rollup is added up
+    from those, which is a lot smaller than the table.
+    """
+    tables = [table] if table else list(ROLLUP_DIMENSIONS)
+
+    for name in tables:
+        columns = ", ".join(ROLLUP_DIMENSIONS[name])
+        hours = SUMMARY_HOURS.get(name)
+        hours_sum = f"COALESCE(SUM({hours}), 0)" if hours else "0"
+        hours_count = f"COUNT({hours})" if hours else "0"
+
+        conn.execute("DROP TABLE IF EXISTS temp.rollup_base")
+        conn.execute(f"""
+            CREATE TEMP TABLE rollup_base AS
+            SELECT {bucket_sql(name, "hour")} AS bucket, {columns},
+                   COUNT(*) AS n, {hours_sum} AS hours_sum, {hours_count} AS hours_count
+            FROM {name}
+            WHERE bucket IS NOT NULL
+            GROUP BY bucket, {columns}
+        """)
+
+        conn.execute("DELETE FROM time_rollup WHERE table_name = ?", (name,))
+        for grain in GRAINS:
+            conn.execute(
+                "INSERT INTO time_rollup "
+                "(table_name, grain, dimension, bucket, value, n, hours_sum, hours_count) "
+                + _from_base_sql(name, grain)
+            )
+        conn.execute("DROP TABLE temp.rollup_base")
+
+
+def verify_rollups(conn):
+    """
+    Compare the rollups with the real tables.
+
+    Returns a list of problems, each (table, grain, dimension, bucket, value,
+    stored, actual), where stored/actual are (n, hours_sum, hours_count).
+    Empty list = all good.
+    """
+    problems = []
+
+    for table in ROLLUP_DIMENSIONS:
+        for grain in GRAINS:
+            actual = {
+                tuple(row[2:5]): (row[5], row[6], row[7])
+                for row in conn.execute(_actual_sql(table, grain))
+            }
+            stored = {
+                tuple(row[0:3]): (row[3], row[4], row[5])
+                for row in conn.execute(
+                    "SELECT dimension, bucket, value, n, hours_sum, hours_count "
+                    "FROM time_rollup WHERE table_name = ? AND grain = ? AND n != 0",
+                    (table, grain),
+                )
+            }
+
+            for key in sorted(set(actual) | set(stored), key=str):
+                a = actual.get(key, (0, 0, 0))
+                s = stored.get(key, (0, 0, 0))
+                if a[0] != s[0] or a[2] != s[2] or not math.isclose(a[1], s[1], abs_tol=1e-6):
+                    problems.append((table, grain) + key + (s, a))
+
+    return problems
+
+
+# =============== READERS ===============
+
+def latest_bucket(table, grain="day"):
+    """Return the newest bucket that has rows, or None for an empty table."""
+    with read_connection() as conn:
+        row = conn.execute(
+            "SELECT MAX(bucket) FROM time_rollup "
+            "WHERE table_name = ? AND grain = ? AND dimension = '*' AND n > 0",
+            (table, grain),
+        ).fetchone()
+    return row[0]
+
+
+def _default_range(table, start, end, days=TREND_DAYS):
+    """The last `days` days of data if no start / end is given."""
+    if end is None:
+        end = latest_bucket(table, "day")
+    if start is None and end is not None:
+        with read_connection() as conn:
+            start = conn.execute(
+                "SELECT date(?, ?)", (end, f"-{days - 1} days")
+            ).fetchone()[0]
+    return start, end
+
+
+def rollup_trend(table, dimension="*", grain="day", start=None, end=None):
+    """
+    Counts per bucket (and value of dimension) as a DataFrame with the
+    columns bucket, value, n and avg_hours (NaN without resolution hours).
+
+    start / end: first and last day ("2024-04-12"), default the last
+    TREND_DAYS days that have data.
+    """
+    import pandas as pd
+
+    start, end = _default_range(table, start, end)
+    columns = ["bucket", "value", "n", "avg_hours"]
+    if end is None:
+        return pd.DataFrame(columns=columns)
+
+    with read_connection() as conn:
+        rows = conn.execute(
+            "SELECT bucket, value, n, "
+            "CASE WHEN hours_count > 0 THEN hours_sum / hours_count END "
+            "FROM time_rollup "
+            "WHERE table_name = ? AND grain = ? AND dimension = ? AND n > 0 "
+            "AND bucket >= ? AND bucket < date(?, '+1 day') "
+            "ORDER BY bucket, value",
+            (table, grain, dimension, start, end),
+        ).fetchall()
+
+    df = pd.DataFrame([tuple(row) for row in rows], columns=columns)
+    df["bucket"] = pd.to_datetime(df["bucket"])
+    df["avg_hours"] = pd.to_numeric(df["avg_hours"])
+    return df
+
+
+def hour_heatmap(table, dimension="*", value="*", start=None, end=None):
+    """
+    Rows per weekday (Mon..Sun) and hour of the day (0..23) as a 7 x 24
+    DataFrame, added up from the hourly rollups.
+    """
+    import pandas as pd
+
+    start, end = _default_range(table, start, end)
+    grid = pd.DataFrame(0, index=WEEKDAYS, columns=range(24))
+    if end is None:
+        return grid
+
+    with read_connection() as conn:
+        rows = conn.execute(
+            "SELECT CAST(strftime('%w', bucket) AS INTEGER), "
+            "CAST(substr(bucket, 12, 2) AS INTEGER), SUM(n) "
+            "FROM time_rollup "
+            "WHERE table_name = ? AND grain = 'hour' AND dimension = ? AND value = ? "
+            "AND bucket >= ? AND bucket < date(?, '+1 day') "
+            "GROUP BY 1, 2",
+            (table, dimension, value, start, end),
+        ).fetchall()
+
+    for weekday, hour, n in rows:
+        # %w counts from Sunday = 0
+        grid.iloc[(weekday - 1) % 7, hour] = n
+    return grid
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+
+    if command == "rebuild":
+        write(rebuild_rollups)
+        print("Rollups rebuilt.")
+
+    with read_connection() as conn:
+        problems = verify_rollups(conn)
+
+    if not problems:
+        print("Rollups match the tables.")
+    for table, grain, dimension, bucket, value, stored, actual in problems:
+        print(f"DRIFT {table}.{grain}.{dimension}={value} @ {bucket}: "
+              f"stored {stored}, actual {actual}")
+
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,215 @@
+"""
+Columnar snapshots of the tables, so a big table loads without SQL.
+
+pd.read_sql_query builds a Python object for every value of every row.
+A snapshot keeps the typed frame (see apply_dtypes) as an Arrow IPC file
+next to the database. Loading it memory-maps the file: numbers and
+strings are used straight from the mapped pages instead of being copied,
+and processes that load the same snapshot share those pages.
+
+A snapshot belongs to one database and one table version. The versions
+live in the database (table_versions, bumped by triggers), so they
+survive restarts and see writes from other processes. A random database
+id in schema_meta tells a new database file from an old one at the same
+path. When the version moves on, the next load writes a new snapshot and
+removes the old one.
+
+pyarrow is optional: without it load_table reads through SQL as before.
+Arrow IPC is used instead of Parquet because Parquet is compressed and
+encoded, so it has to be decoded (copied) on every load.
+"""
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from hive_database.connection import get_connection_manager, read_connection
+
+# Tables that get a version counter and snapshots
+VERSIONED_TABLES = ["cyber_incidents", "datasets_metadata", "it_tickets"]
+
+# Folder name next to the database file
+SNAPSHOT_FOLDER = "snapshots"
+
+# Set to False to always load through SQL
+SNAPSHOTS_ENABLED = True
+
+
+# =============== SCHEMA ===============
+
+def _bump_sql(table):
+    return f"""
+        INSERT INTO table_versions (table_name, version) VALUES ('{table}', 1)
+        ON CONFLICT (table_name) DO UPDATE SET version = version + 1;"""
+
+
+def create_version_triggers(conn, table):
+    """Bump the table's version on every INSERT / UPDATE / DELETE."""
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+            AFTER {event} ON {table}
+            BEGIN {_bump_sql(table)}
+            END
+        """)
+
+
+def create_version_schema(conn):
+    """Create the table_versions table and the triggers that bump it."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,      -- a table in VERSIONED_TABLES
+            version INTEGER NOT NULL          -- goes up with every changed row
+        )
+    """)
+
+    for table in VERSIONED_TABLES:
+        create_version_triggers(conn, table)
+
+    # made once; a database file made again gets a new id
+    conn.execute(
+        "INSERT OR IGNORE INTO schema_meta (key, value) "
+        "VALUES ('database_id', lower(hex(randomblob(8))))"
+    )
+
+
+def bump_table_version(conn, table):
+    """Mark a table as changed (after a bulk load without triggers)."""
+    conn.execute(_bump_sql(table))
+
+
+def table_version(conn, table):
+    row = conn.execute(
+        "SELECT version FROM table_versions WHERE table_name = ?", (table,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def database_id(conn):
+    row = conn.execute(
+        "SELECT value FROM schema_meta WHERE key = 'database_id'"
+    ).fetchone()
+    return row[0] if row else "none"
+
+
+def current_version(table):
+    """
+    Return (database id, version) of a table as saved in the database.
+
+    It changes with every write to the table, also writes made by another
+    process. Returns None for a table without a version counter, or a
+    database that has no table_versions yet.
+    """
+    if table not in VERSIONED_TABLES:
+        return None
+    try:
+        with read_connection() as conn:
+            return database_id(conn), table_version(conn, table)
+    except sqlite3.OperationalError:
+        return None
+
+
+# =============== FILES ===============
+
+def snapshot_dir():
+    return get_connection_manager().db_path.parent / SNAPSHOT_FOLDER
+
+
+def snapshot_path(table, db_id, version):
+    return snapshot_dir() / f"{table}-{db_id}-v{version}.arrow"
+
+
+def _have_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def write_snapshot(df, path):
+    """
+    Save a frame as an uncompressed Arrow IPC file.
+
+    It is written to a temporary file first and then renamed, so a reader
+    never sees half a file. Every writer gets its own temporary file, so
+    two sessions saving the same snapshot at once do not clash.
+    """
+    import pyarrow as pa
+
+    path = Path(path)
+    path.parent.mkdir(exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f"{path.stem}-", suffix=".tmp", delete=False
+    ) as f:
+        temp = Path(f.name)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    try:
+        with pa.OSFile(str(temp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp, path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+def read_snapshot(path):
+    """Memory-map a snapshot and return it as a DataFrame."""
+    import pyarrow as pa
+
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    # split_blocks keeps every column apart, so columns that need no
+    # conversion are not copied into one big block
+    return table.to_pandas(split_blocks=True)
+
+
+def remove_old_snapshots(table, keep):
+    """Delete the other snapshots of this table (also of old database files)."""
+    folder = snapshot_dir()
+    if not folder.exists():
+        return 0
+
+    removed = 0
+    for old in folder.glob(f"{table}-*.arrow"):
+        if old != keep:
+            try:
+                old.unlink()
+                removed += 1
+            except OSError:
+                # still mapped by another process on some systems, try next time
+                pass
+    return removed
+
+
+# =============== LOADING ===============
+
+def load_snapshot(table, read_fresh, version=None):
+    """
+    Return the table as a DataFrame from its snapshot, writing the
+    snapshot first if there is none for the current version.
+
+    read_fresh: function that reads the table through SQL (with dtypes).
+    version: what current_version(table) returned, if the caller has it.
+    Returns None if snapshots are off or pyarrow is not installed.
+    """
+    if not SNAPSHOTS_ENABLED or table not in VERSIONED_TABLES or not _have_pyarrow():
+        return None
+
+    # the version is read before the rows: if a write happens meanwhile,
+    # the snapshot is saved under the old version and made again next time
+    if version is None:
+        version = current_version(table)
+    if version is None:
+        return None
+    path = snapshot_path(table, *version)
+
+    if not path.exists():
+        df = read_fresh()
+        write_snapshot(df, path)
+        remove_old_snapshots(table, keep=path)
+        return df
+
+    return read_snapshot(path)
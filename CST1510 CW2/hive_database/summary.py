@@ -0,0 +1,243 @@
+"""
+Summary counters for the KPI tiles, kept up to date by SQLite triggers.
+
+The table_summary table has one row per (table, column, value), for example
+("cyber_incidents", "status", "Open"), holding how many rows have that value
+and the sum and count of resolution hours. The row ("*", "*") is the total.
+Reading a tile is one primary key lookup, no matter how big the table is.
+
+Run from the "CST1510 CW2" folder to check or repair the counters:
+    python -m hive_database.summary verify
+    python -m hive_database.summary rebuild
+"""
+import math
+import sys
+
+from hive_database.connection import read_connection, write
+
+# Columns we keep counts for, per table
+SUMMARY_DIMENSIONS = {
+    "cyber_incidents": ["status", "severity", "category"],
+    "it_tickets": ["status", "priority", "assigned_to"],
+}
+
+# Column whose sum and count we keep as well (for averages)
+SUMMARY_HOURS = {
+    "it_tickets": "resolution_time_hours",
+}
+
+
+# =============== SCHEMA ===============
+
+def _change_sql(table, row, sign):
+    """
+    SQL that adds (sign "+") or removes (sign "-") one row from the counters.
+
+    row: "NEW" or "OLD" inside a trigger.
+    """
+    hours = SUMMARY_HOURS.get(table)
+    hours_sum = f"COALESCE({row}.{hours}, 0)" if hours else "0"
+    hours_count = f"({row}.{hours} IS NOT NULL)" if hours else "0"
+
+    targets = [("'*'", "'*'")] + [
+        (f"'{column}'", f"{row}.{column}") for column in SUMMARY_DIMENSIONS[table]
+    ]
+
+    statements = []
+    for dimension, value in targets:
+        statements.append(f"""
+            INSERT INTO table_summary (table_name, dimension, value, n, hours_sum, hours_count)
+            SELECT '{table}', {dimension}, {value}, {sign}1, {sign}{hours_sum}, {sign}{hours_count}
+            WHERE {value} IS NOT NULL
+            ON CONFLICT (table_name, dimension, value) DO UPDATE SET
+                n = n + excluded.n,
+                hours_sum = hours_sum + excluded.hours_sum,
+                hours_count = hours_count + excluded.hours_count;""")
+    return "".join(statements)
+
+
+def create_summary_triggers(conn, table):
+    """Create the INSERT / UPDATE / DELETE triggers for one table."""
+    watched = SUMMARY_DIMENSIONS[table] + (
+        [SUMMARY_HOURS[table]] if table in SUMMARY_HOURS else []
+    )
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_insert
+        AFTER INSERT ON {table}
+        BEGIN {_change_sql(table, "NEW", "+")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_delete
+        AFTER DELETE ON {table}
+        BEGIN {_change_sql(table, "OLD", "-")}
+        END
+    """)
+    # only when a counted column changes
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_update
+        AFTER UPDATE OF {', '.join(watched)} ON {table}
+        BEGIN {_change_sql(table, "OLD", "-")} {_change_sql(table, "NEW", "+")}
+        END
+    """)
+
+
+def create_summary_schema(conn):
+    """Create the table_summary table and the triggers that fill it."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_summary (
+            table_name TEXT NOT NULL,              -- cyber_incidents or it_tickets
+            dimension TEXT NOT NULL,               -- column name, or '*' for the total
+            value TEXT NOT NULL,                   -- column value, or '*' for the total
+            n INTEGER NOT NULL DEFAULT 0,          -- how many rows
+            hours_sum REAL NOT NULL DEFAULT 0,     -- sum of resolution hours
+            hours_count INTEGER NOT NULL DEFAULT 0, -- rows that have resolution hours
+            PRIMARY KEY (table_name, dimension, value)
+        ) WITHOUT ROWID
+    """)
+
+    for table in SUMMARY_DIMENSIONS:
+        create_summary_triggers(conn, table)
+
+
+# =============== REBUILD / VERIFY ===============
+
+def _actual_sql(table):
+    """SELECT that works out the real counters from the table itself."""
+    hours = SUMMARY_HOURS.get(table)
+    hours_sum = f"COALESCE(SUM({hours}), 0)" if hours else "0"
+    hours_count = f"COUNT({hours})" if hours else "0"
+
+    parts = [
+        f"SELECT '{table}', '*', '*', COUNT(*), {hours_sum}, {hours_count} FROM {table}"
+    ]
+    for column in SUMMARY_DIMENSIONS[table]:
+        parts.append(
+            f"SELECT '{table}', '{column}', {column}, COUNT(*), {hours_sum}, {hours_count} "
+            f"FROM {table} WHERE {column} IS NOT NULL GROUP BY {column}"
+        )
+    return " UNION ALL ".join(parts)
+
+
+def rebuild_summary(conn, table=None):
+    """
+    Throw the counters away and count everything again from the tables.
+
+    Use it after a bulk load without triggers, or to repair drift.
+    """
+    tables = [table] if table else list(SUMMARY_DIMENSIONS)
+
+    for name in tables:
+        conn.execute("DELETE FROM table_summary WHERE table_name = ?", (name,))
+        conn.execute(
+            "INSERT INTO table_summary "
+            "(table_name, dimension, value, n, hours_sum, hours_count) "
+            + _actual_sql(name)
+        )
+
+
+def verify_summary(conn):
+    """
+    Compare the counters with the real tables.
+
+    Returns a list of problems, each (table, dimension, value, stored, actual),
+    where stored/actual are (n, hours_sum, hours_count). Empty list = all good.
+    """
+    problems = []
+
+    for table in SUMMARY_DIMENSIONS:
+        actual = {
+            (row[1], row[2]): (row[3], row[4], row[5])
+            for row in conn.execute(_actual_sql(table))
+        }
+        stored = {
+            (row[0], row[1]): (row[2], row[3], row[4])
+            for row in conn.execute(
+                "SELECT dimension, value, n, hours_sum, hours_count "
+                "FROM table_summary WHERE table_name = ? AND n != 0",
+                (table,),
+            )
+        }
+
+        for key in sorted(set(actual) | set(stored), key=str):
+            a = actual.get(key, (0, 0, 0))
+            s = stored.get(key, (0, 0, 0))
+            if a[0] != s[0] or a[2] != s[2] or not math.isclose(a[1], s[1], abs_tol=1e-6):
+                problems.append((table, key[0], key[1], s, a))
+
+    return problems
+
+
+# =============== READERS ===============
+
+def summary_count(table, dimension="*", value="*"):
+    """
+    Read one counter.
+
+    summary_count("cyber_incidents")                    -> all incidents
+    summary_count("cyber_incidents", "status", "Open")  -> open incidents
+    """
+    with read_connection() as conn:
+        row = conn.execute(
+            "SELECT n FROM table_summary "
+            "WHERE table_name = ? AND dimension = ? AND value = ?",
+            (table, dimension, value),
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def summary_breakdown(table, dimension):
+    """Return all counters of one column as [(value, count), ...], biggest first."""
+    with read_connection() as conn:
+        rows = conn.execute(
+            "SELECT value, n FROM table_summary "
+            "WHERE table_name = ? AND dimension = ? AND n > 0 "
+            "ORDER BY n DESC, value",
+            (table, dimension),
+        ).fetchall()
+    return [(row[0], row[1]) for row in rows]
+
+
+def summary_counts(table, dimension):
+    """Return all counters of one column as a Series, biggest first."""
+    import pandas as pd
+
+    rows = summary_breakdown(table, dimension)
+    return pd.Series(
+        [row[1] for row in rows],
+        index=pd.Index([row[0] for row in rows], name=dimension),
+        name="count",
+    )
+
+
+def summary_mean_hours(table, dimension="*", value="*"):
+    """Average resolution hours from the stored sum and count (NaN if none)."""
+    with read_connection() as conn:
+        row = conn.execute(
+            "SELECT hours_sum, hours_count FROM table_summary "
+            "WHERE table_name = ? AND dimension = ? AND value = ?",
+            (table, dimension, value),
+        ).fetchone()
+
+    if not row or row[1] == 0:
+        return float("nan")
+    return row[0] / row[1]
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+
+    if command == "rebuild":
+        write(rebuild_summary)
+        print("Summary counters rebuilt.")
+
+    with read_connection() as conn:
+        problems = verify_summary(conn)
+
+    if not problems:
+        print("Summary counters match the tables.")
+    for table, dimension, value, stored, actual in problems:
+        print(f"DRIFT {table}.{dimension}={value}: stored {stored}, actual {actual}")
+
+    sys.exit(1 if problems else 0)
@@ -1,3 +1,8 @@
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+
+
 def create_users_table(conn):
     """
     Create the users table.
@@ -16,9 +21,6 @@ def create_users_table(conn):
         )
     """)
 
-    # Save the changes to the database
-    conn.commit()
-
 
 def create_cyber_incidents_table(conn):
     """
@@ -39,8 +41,6 @@ def create_cyber_incidents_table(conn):
         )
     """)
 
-    conn.commit()
-
 
 def create_datasets_table(conn):
     """
@@ -61,8 +61,6 @@ def create_datasets_table(conn):
         )
     """)
 
-    conn.commit()
-
 
 def create_tickets_table(conn):
     """
@@ -84,16 +82,447 @@ def create_tickets_table(conn):
         )
     """)
 
-    conn.commit()
 
+# =============== MIGRATION HELPERS ===============
 
-def initialize_all_tables(conn):
+def get_schema_version(conn):
+    """Return the schema version saved inside the database file."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def column_exists(conn, table, column):
+    """Return True if the table already has this column."""
+    rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return any(row[1] == column for row in rows)
+
+
+def add_column(conn, table, column, definition):
     """
-    Create all tables in the database.
+    Add a new column to an existing table without touching the data.
+
+    Example: add_column(conn, "it_tickets", "closed_at", "TEXT")
+    Nothing happens if the column is already there.
+    """
+    if not column_exists(conn, table, column):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
 
-    This function calls the other functions above.
+def add_index(conn, name, table, columns, where=None):
     """
+    Create an index if it does not exist yet.
+
+    columns: list of column names (more than one makes a composite index)
+    where: optional condition, which makes a partial index
+    """
+    sql = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    if where:
+        sql += f" WHERE {where}"
+    conn.execute(sql)
+
+
+@contextmanager
+def savepoint(conn, name):
+    """
+    Run a block as one unit: all of it is saved, or none of it.
+
+    On its own the SAVEPOINT is the whole transaction and RELEASE commits
+    it. Inside a transaction that is already open (for example a job on
+    the writer thread) it nests, and the outer transaction commits.
+    The helpers called inside must not commit themselves.
+    """
+    conn.execute(f"SAVEPOINT {name}")
+    try:
+        yield
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        raise
+    conn.execute(f"RELEASE {name}")
+
+
+# =============== MIGRATIONS ===============
+
+def _migration_base_tables(conn):
+    """Version 1: the four tables the app started with."""
     create_users_table(conn)
     create_cyber_incidents_table(conn)
     create_datasets_table(conn)
     create_tickets_table(conn)
+
+
+def _migration_dashboard_indexes(conn):
+    """
+    Version 2: indexes for the filters and charts on the dashboards.
+
+    Without them every filter on status, severity, priority, etc. reads
+    the whole table.
+    """
+    # --- cyber incidents ---
+    add_index(conn, "idx_incidents_status", "cyber_incidents", ["status"])
+    add_index(conn, "idx_incidents_severity", "cyber_incidents", ["severity"])
+    add_index(conn, "idx_incidents_timestamp", "cyber_incidents", ["timestamp"])
+    # category first so "Phishing" + status is answered from the index only
+    add_index(conn, "idx_incidents_category_status", "cyber_incidents",
+              ["category", "status"])
+    # small index with only the incidents that still need work
+    add_index(conn, "idx_incidents_active_severity", "cyber_incidents",
+              ["severity"], where="status IN ('Open', 'In Progress')")
+
+    # --- it tickets ---
+    # status + resolution time also covers the bottleneck analysis
+    add_index(conn, "idx_tickets_status_resolution", "it_tickets",
+              ["status", "resolution_time_hours"])
+    add_index(conn, "idx_tickets_priority", "it_tickets", ["priority"])
+    # assignee + resolution time covers the staff performance table
+    add_index(conn, "idx_tickets_assigned_resolution", "it_tickets",
+              ["assigned_to", "resolution_time_hours"])
+    add_index(conn, "idx_tickets_created_at", "it_tickets", ["created_at"])
+    # open-only tickets, the queue agents look at all day
+    add_index(conn, "idx_tickets_open_priority", "it_tickets",
+              ["priority", "assigned_to"], where="status = 'Open'")
+
+    # --- datasets ---
+    add_index(conn, "idx_datasets_uploaded_by", "datasets_metadata",
+              ["uploaded_by", "rows"])
+
+
+def _migration_priority_resolution_index(conn):
+    """
+    Version 3: priority + resolution time in one index.
+
+    The box plot of resolution time per priority reads quartiles with
+    ORDER BY resolution_time_hours inside one priority, which this index
+    answers without sorting. It also covers the old priority-only index.
+    """
+    add_index(conn, "idx_tickets_priority_resolution", "it_tickets",
+              ["priority", "resolution_time_hours"])
+    conn.execute("DROP INDEX IF EXISTS idx_tickets_priority")
+
+
+def create_csv_imports_table(conn):
+    """
+    Create the csv_imports table.
+
+    It remembers the checksum of the last CSV file loaded into each table,
+    so the same file is not imported again.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS csv_imports (
+            table_name TEXT PRIMARY KEY,      -- table the file was loaded into
+            checksum TEXT NOT NULL,           -- sha256 of the CSV file
+            rows INTEGER NOT NULL,            -- how many rows were imported
+            imported_at TEXT NOT NULL         -- when the import finished
+        )
+    """)
+
+
+def _migration_summary_counters(conn):
+    """
+    Version 5: table_summary with counts per status, severity, category,
+    priority and assignee, kept up to date by triggers.
+    """
+    from hive_database.summary import create_summary_schema, rebuild_summary
+
+    create_summary_schema(conn)
+    # count the rows that are already there
+    rebuild_summary(conn)
+
+
+def create_login_throttle_table(conn):
+    """
+    Create the login_throttle table.
+
+    Saves the failed-login counters so a restart does not reset them.
+    Only used when the login throttle runs with persist=True.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS login_throttle (
+            key TEXT PRIMARY KEY,              -- "user:<name>" or "client:<address>"
+            tokens REAL NOT NULL,              -- attempts left in the token bucket
+            updated REAL NOT NULL,             -- when tokens was last worked out
+            failures INTEGER NOT NULL,         -- wrong passwords in a row
+            locked_until REAL NOT NULL         -- no attempts before this time
+        )
+    """)
+
+
+def create_schema_meta_table(conn):
+    """
+    Create the schema_meta table.
+
+    A small key/value table for facts about the database itself,
+    e.g. the schema fingerprint saved by ensure_schema().
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+
+def create_response_cache_table(conn):
+    """
+    Create the response_cache table.
+
+    JARVIS saves its answers here, so the same question about the same
+    data is answered from disk instead of calling the API again.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,              -- sha256 of model, data version and question
+            question TEXT NOT NULL,            -- the normalised question
+            model TEXT NOT NULL,
+            data_version TEXT NOT NULL,        -- version of the data context used
+            answer TEXT NOT NULL,
+            created_at REAL NOT NULL,          -- time.time() when saved
+            last_used REAL NOT NULL,           -- time.time() of the last hit
+            hits INTEGER NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL              -- bytes of question + answer
+        )
+    """)
+    add_index(conn, "idx_response_cache_last_used", "response_cache", ["last_used"])
+    add_index(conn, "idx_response_cache_created_at", "response_cache", ["created_at"])
+
+
+def _migration_row_changes(conn):
+    """
+    Version 9: row_changes log filled by triggers, so search indexes
+    can catch up with new, changed and deleted rows.
+    """
+    from hive_database.changes import create_change_log_schema
+
+    create_change_log_schema(conn)
+
+
+def _migration_fulltext(conn):
+    """
+    Version 10: FTS5 indexes over incident and ticket descriptions,
+    kept up to date by triggers.
+    """
+    from hive_database.fulltext import create_fulltext_schema, rebuild_fulltext
+
+    create_fulltext_schema(conn)
+    # index the rows that are already there
+    rebuild_fulltext(conn)
+
+
+def _migration_time_rollups(conn):
+    """
+    Version 11: hourly and daily counters for the trend charts,
+    kept up to date by triggers.
+    """
+    from hive_database.rollups import create_rollup_schema, rebuild_rollups
+
+    create_rollup_schema(conn)
+    # count the rows that are already there
+    rebuild_rollups(conn)
+
+
+def _migration_table_versions(conn):
+    """
+    Version 12: table_versions, a change counter per table kept by
+    triggers, so table snapshots know when they are out of date.
+    """
+    from hive_database.snapshots import create_version_schema
+
+    create_version_schema(conn)
+
+
+# Every schema change goes in this list as (version, description, function).
+# Never edit a migration that has shipped, add a new one at the end instead.
+MIGRATIONS = [
+    (1, "base tables", _migration_base_tables),
+    (2, "dashboard indexes", _migration_dashboard_indexes),
+    (3, "priority and resolution time index", _migration_priority_resolution_index),
+    (4, "csv import checksums", create_csv_imports_table),
+    (5, "trigger summary counters", _migration_summary_counters),
+    (6, "login throttle state", create_login_throttle_table),
+    (7, "schema fingerprint", create_schema_meta_table),
+    (8, "jarvis response cache", create_response_cache_table),
+    (9, "row change log for search indexes", _migration_row_changes),
+    (10, "full-text search indexes", _migration_fulltext),
+    (11, "hourly and daily rollups", _migration_time_rollups),
+    (12, "table versions for snapshots", _migration_table_versions),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn, target=None):
+    """
+    Bring the database up to the target version (default: latest).
+
+    Each migration runs inside its own savepoint together with the
+    new PRAGMA user_version, so a failed step leaves the old version
+    and none of its tables. Returns the list of versions that were applied.
+    """
+    target = LATEST_VERSION if target is None else target
+    current = get_schema_version(conn)
+    applied = []
+
+    for version, description, step in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+
+        with savepoint(conn, "migration"):
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+
+        applied.append(version)
+
+    return applied
+
+
+def schema_fingerprint(conn):
+    """
+    Return a sha256 of every table, index, view and trigger definition.
+
+    Two databases with the same fingerprint have exactly the same schema.
+    """
+    rows = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name"
+    ).fetchall()
+
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(f"{row[0]}|{row[1]}|{row[2]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def saved_fingerprint(conn):
+    """Return the fingerprint saved by the last ensure_schema(), or None."""
+    try:
+        row = conn.execute(
+            "SELECT value FROM schema_meta WHERE key = 'fingerprint'"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # schema_meta does not exist yet (older database)
+        return None
+    return row[0] if row else None
+
+
+def save_fingerprint(conn):
+    fingerprint = schema_fingerprint(conn)
+    conn.execute(
+        "INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('fingerprint', ?)",
+        (fingerprint,),
+    )
+    return fingerprint
+
+
+def ensure_schema(conn):
+    """
+    Make sure the database has the latest schema, doing as little as possible.
+
+    - "current":  version and fingerprint match, nothing was run
+    - "migrated": new migrations were applied
+    - "repaired": the version was right but the schema was different
+      (e.g. an index dropped by hand or an import that stopped halfway),
+      so every migration was run again to put the missing parts back
+
+    The migrations only use IF NOT EXISTS / IF EXISTS, so running them
+    again on a good database changes nothing.
+    """
+    if get_schema_version(conn) < LATEST_VERSION:
+        migrate(conn)
+        with savepoint(conn, "fingerprint"):
+            save_fingerprint(conn)
+        return "migrated"
+
+    if saved_fingerprint(conn) == schema_fingerprint(conn):
+        return "current"
+
+    with savepoint(conn, "repair"):
+        for version, description, step in MIGRATIONS:
+            step(conn)
+        save_fingerprint(conn)
+    return "repaired"
+
+
+def rebuild_derived(conn, table):
+    """
+    Recount everything that is worked out from a table's rows.
+
+    Bulk loads switch the triggers off for speed, so they call this
+    afterwards to bring summaries, rollups and search indexes back in line
+    with the table.
+    """
+    from hive_database.changes import CHANGE_TABLES, log_table_reload
+    from hive_database.fulltext import FULLTEXT_TABLES, rebuild_fulltext
+    from hive_database.rollups import ROLLUP_DIMENSIONS, rebuild_rollups
+    from hive_database.snapshots import VERSIONED_TABLES, bump_table_version
+    from hive_database.summary import SUMMARY_DIMENSIONS, rebuild_summary
+
+    if table in SUMMARY_DIMENSIONS:
+        rebuild_summary(conn, table)
+    if table in ROLLUP_DIMENSIONS:
+        rebuild_rollups(conn, table)
+    if table in VERSIONED_TABLES:
+        # old snapshots of the table must not be used any more
+        bump_table_version(conn, table)
+    if table in FULLTEXT_TABLES:
+        rebuild_fulltext(conn, table)
+    if table in CHANGE_TABLES:
+        # search indexes cannot tell which rows changed, so they build again
+        log_table_reload(conn, table)
+
+
+# =============== QUERY PLANS ===============
+
+# The queries the dashboards run most often
+HOT_QUERIES = {
+    "open incidents": "SELECT COUNT(*) FROM cyber_incidents WHERE status = 'Open'",
+    "critical incidents": "SELECT COUNT(*) FROM cyber_incidents WHERE severity = 'Critical'",
+    "phishing by status": (
+        "SELECT status, COUNT(*) FROM cyber_incidents "
+        "WHERE category = 'Phishing' GROUP BY status"
+    ),
+    "active critical incidents": (
+        "SELECT COUNT(*) FROM cyber_incidents "
+        "WHERE status IN ('Open', 'In Progress') AND severity = 'Critical'"
+    ),
+    "incidents in date range": (
+        "SELECT * FROM cyber_incidents "
+        "WHERE timestamp >= '2024-06-01' AND timestamp < '2024-07-01'"
+    ),
+    "open tickets": "SELECT COUNT(*) FROM it_tickets WHERE status = 'Open'",
+    "critical tickets": "SELECT COUNT(*) FROM it_tickets WHERE priority = 'Critical'",
+    "staff performance": (
+        "SELECT assigned_to, COUNT(*), AVG(resolution_time_hours) "
+        "FROM it_tickets GROUP BY assigned_to"
+    ),
+    "status bottleneck": (
+        "SELECT status, AVG(resolution_time_hours) FROM it_tickets GROUP BY status"
+    ),
+    "open queue by priority": (
+        "SELECT * FROM it_tickets WHERE status = 'Open' AND priority = 'High'"
+    ),
+    "rows per source": (
+        "SELECT uploaded_by, SUM(rows) FROM datasets_metadata GROUP BY uploaded_by"
+    ),
+}
+
+
+def explain_query_plan(conn, sql, params=()):
+    """Return SQLite's query plan for a query as a list of text lines."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+def query_plan_report(conn, queries=None):
+    """Return {query name: plan lines} for the hot dashboard queries."""
+    queries = HOT_QUERIES if queries is None else queries
+    return {name: explain_query_plan(conn, sql) for name, sql in queries.items()}
+
+
+def initialize_all_tables(conn):
+    """
+    Create all tables in the database.
+
+    This runs every migration that the database has not seen yet,
+    so it is safe to call on a new or an old database file.
+    Returns "current", "migrated" or "repaired" (see ensure_schema).
+    """
+    return ensure_schema(conn)
@@ -1,4 +1,130 @@
-from hive_database.connection import get_db_connection
+import threading
+import time
+from collections import OrderedDict
+
+from hive_database.connection import db_connection, write
+
+# Most known usernames we remember
+USER_CACHE_SIZE = 1024
+
+# Most unknown usernames we remember. Kept apart from the known ones,
+# so a flood of made-up names cannot push the real users out.
+NEGATIVE_CACHE_SIZE = 1024
+
+# How long (seconds) we trust a cached user record. Another process
+# (or a script on the same file) may change a password or role, so even
+# known users are read again from time to time.
+POSITIVE_TTL = 300.0
+
+# How long (seconds) we remember that a username does NOT exist.
+# Short, so a user registered by another process shows up soon.
+NEGATIVE_TTL = 60.0
+
+
+class UserCache:
+    """
+    Small LRU cache: username -> user record (id, username, hash, role).
+
+    Known users are kept for POSITIVE_TTL seconds. Unknown usernames are
+    cached too (as None) for NEGATIVE_TTL seconds, in their own smaller
+    map, so typos and brute-force guesses do not hit SQLite every time.
+    """
+
+    def __init__(self, max_size=USER_CACHE_SIZE, negative_size=NEGATIVE_CACHE_SIZE,
+                 positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.max_size = max_size
+        self.negative_size = negative_size
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()   # username -> (record, expires)
+        self._missing = OrderedDict()   # username -> expires
+        self._lock = threading.Lock()
+
+        # goes up on every write (add_user, update_user), see store()
+        self.version = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def lookup(self, username):
+        """
+        Return (found, record).
+
+        found is False when the cache knows nothing about the username.
+        record is None when the username is cached as not existing.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry[1] >= now:
+                self._entries.move_to_end(username)
+                self.hits += 1
+                return True, entry[0]
+
+            expires = self._missing.get(username)
+            if expires is not None and expires >= now:
+                self._missing.move_to_end(username)
+                self.negative_hits += 1
+                return True, None
+
+            self.misses += 1
+            return False, None
+
+    @staticmethod
+    def _put(entries, username, value, max_size):
+        entries[username] = value
+        entries.move_to_end(username)
+        while len(entries) > max_size:
+            entries.popitem(last=False)
+
+    def store(self, username, record, seen=None):
+        """
+        Remember a record, or None for "this user does not exist".
+
+        seen: self.version from before the database was read. If a write
+        happened since, what we read may already be out of date (e.g. the
+        user was added in the meantime), so it is not cached. Writers
+        leave seen out: their record is the newest one.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            if seen is None:
+                self.version += 1
+            elif seen != self.version:
+                return
+
+            if record is None:
+                self._entries.pop(username, None)
+                self._put(self._missing, username, now + self.negative_ttl, self.negative_size)
+            else:
+                self._missing.pop(username, None)
+                self._put(self._entries, username, (record, now + self.positive_ttl), self.max_size)
+
+    def invalidate(self, username=None):
+        """Forget one username, or everything when no name is given."""
+        with self._lock:
+            self.version += 1
+            if username is None:
+                self._entries.clear()
+                self._missing.clear()
+            else:
+                self._entries.pop(username, None)
+                self._missing.pop(username, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "negative_entries": len(self._missing),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+            }
+
+
+# One cache for the whole process
+user_cache = UserCache()
 
 
 def add_user(username, password_hash, role):
@@ -7,45 +133,77 @@ def add_user(username, password_hash, role):
 
     This function saves a username, password hash, and role.
     It returns the new user's id.
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
 
-    # Insert the new user into the table
-    cursor.execute(
+    If the username is taken, the UNIQUE constraint makes SQLite raise
+    sqlite3.IntegrityError, so there is no need to check first.
+    """
+    # Insert the new user on the writer thread and get the ID of the new user
+    user_id = write(lambda conn: conn.execute(
         "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
         (username, password_hash, role)
-    )
+    ).lastrowid)
+
+    # replace a cached "does not exist" with the real record
+    user_cache.store(username, {
+        "id": user_id,
+        "username": username,
+        "password_hash": password_hash,
+        "role": role,
+    })
+    return user_id
 
-    conn.commit()
 
-    # Get the ID of the new user
-    user_id = cursor.lastrowid
+def update_user(username, **changes):
+    """
+    Change the password_hash and/or role of a user.
 
-    conn.close()
-    return user_id
+    Example: update_user("alice", role="admin")
+    Returns True if the user was found.
+    Always use this instead of an UPDATE of your own, so the cached
+    record of the user is thrown away.
+    """
+    allowed = {"password_hash", "role"}
+    unknown = set(changes) - allowed
+    if unknown or not changes:
+        raise ValueError(f"can only change {sorted(allowed)}, got {sorted(changes)}")
+
+    set_clause = ", ".join(f"{column} = ?" for column in changes)
+    changed = write(lambda conn: conn.execute(
+        f"UPDATE users SET {set_clause} WHERE username = ?",
+        list(changes.values()) + [username]
+    ).rowcount)
+
+    user_cache.invalidate(username)
+    return changed > 0
 
 
 def get_user(username):
     """
     Get a user by username.
 
-    This returns one row from the database.
+    This returns the user as a dict (id, username, password_hash, role).
     If the user does not exist, it returns None.
+    Answers come from the user cache when possible.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    found, record = user_cache.lookup(username)
+    if found:
+        return dict(record) if record is not None else None
 
-    # Select the user with the given username
-    cursor.execute(
-        "SELECT * FROM users WHERE username = ?",
-        (username,)
-    )
+    seen = user_cache.version
+    with db_connection() as conn:
+        cursor = conn.cursor()
 
-    user = cursor.fetchone()
+        # Select the user with the given username
+        cursor.execute(
+            "SELECT id, username, password_hash, role FROM users WHERE username = ?",
+            (username,)
+        )
 
-    conn.close()
-    return user
+        user = cursor.fetchone()
+
+    record = dict(user) if user is not None else None
+    user_cache.store(username, record, seen=seen)
+    return dict(record) if record is not None else None
 
 
 def check_user_exists(username):
@@ -55,16 +213,10 @@ def check_user_exists(username):
     Returns True if the username is found.
     Returns False if not found.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "SELECT id FROM users WHERE username = ?",
-        (username,)
-    )
+    # If get_user gives a record, the user exists
+    return get_user(username) is not None
 
-    # If fetchone gives a row, the user exists
-    exists = cursor.fetchone() is not None
 
-    conn.close()
-    return exists
+def user_cache_stats():
+    """Return the hit/miss counters of the user cache."""
+    return user_cache.stats()
@@ -0,0 +1,233 @@
+"""
+Write-behind queue: single-row inserts from many callers, saved
+together in one transaction (a "group commit").
+
+Every commit has a fixed cost (the WAL write, and a sync to disk with
+synchronous=FULL). When alerts raise incidents one at a time, that cost
+is paid once per row. Here the rows wait in a queue for at most
+MAX_LATENCY seconds, or until MAX_BATCH rows are waiting, and are then
+inserted by the writer thread (connection.write) in one transaction.
+
+Each caller gets a Future right away. It is done when its row is
+committed, or holds the error if its row failed (a duplicate id fails
+only that row, not the whole batch). Call .result() on it to wait.
+
+It is optional: create_incident / create_ticket only use it with
+wait=False. Queued rows are committed on flush(), on close() and when
+the program exits.
+"""
+import atexit
+import threading
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+
+from hive_database.connection import write
+
+# Most rows committed together in one transaction
+MAX_BATCH = 500
+
+# Longest time (seconds) a row waits before its batch is committed
+MAX_LATENCY = 0.05
+
+
+class WriteBehindQueue:
+    """
+    Collects single inserts and commits them in batches.
+
+    A batch is sent when MAX_BATCH rows are waiting, or MAX_LATENCY
+    seconds after its first row arrived, whichever comes first. While
+    the writer commits one batch, the next one fills up, so under heavy
+    load the batches grow by themselves.
+    """
+
+    def __init__(self, max_batch=MAX_BATCH, max_latency=MAX_LATENCY):
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+
+        self._rows = Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+        # rows queued and rows finished so far, flush() waits on these
+        self._queued = 0
+        self._finished = 0
+        self._progress = threading.Condition(self._lock)
+
+        self.stats = {
+            "rows": 0,
+            "failed": 0,
+            "batches": 0,
+            "largest_batch": 0,
+        }
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._loop, name="hive-write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, table, sql, params):
+        """
+        Queue one insert (sql with ? marks, params) into table.
+
+        Returns a Future that is done once the row is committed.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("write-behind queue is closed")
+            self._start()
+            self._rows.put((table, sql, params, future))
+            self._queued += 1
+        return future
+
+    def _next_batch(self):
+        """Wait for the first row, then collect more until full or too old."""
+        first = self._rows.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_latency
+
+        while len(batch) < self.max_batch:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            try:
+                item = self._rows.get(timeout=left)
+            except Empty:
+                break
+            if item is None:
+                # close(): commit what we have, then stop
+                self._rows.put(None)
+                break
+            batch.append(item)
+
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._commit(batch)
+
+    def _commit(self, batch):
+        size = len(batch)
+        try:
+            self._commit_rows(batch)
+        finally:
+            with self._lock:
+                self._finished += size
+                self._progress.notify_all()
+
+    def _commit_rows(self, batch):
+        # a Future cancelled by its caller is skipped
+        batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        def insert_all(conn):
+            # a failed row (e.g. duplicate id) only undoes that one
+            # statement, the others stay in the transaction
+            errors = {}
+            for i, (_, sql, params, _) in enumerate(batch):
+                try:
+                    conn.execute(sql, params)
+                except Exception as error:
+                    errors[i] = error
+            return errors
+
+        try:
+            errors = write(insert_all)
+        except BaseException as error:
+            # the commit itself failed, no row of the batch was saved
+            for item in batch:
+                item[3].set_exception(error)
+            with self._lock:
+                self.stats["failed"] += len(batch)
+            return
+
+        # I import inside the function because data_loader imports this module
+        from hive_database.data_loader import bump_data_version
+
+        for table in {item[0] for item in batch}:
+            bump_data_version(table)
+
+        for i, (_, _, _, future) in enumerate(batch):
+            if i in errors:
+                future.set_exception(errors[i])
+            else:
+                future.set_result(None)
+
+        with self._lock:
+            self.stats["rows"] += len(batch) - len(errors)
+            self.stats["failed"] += len(errors)
+            self.stats["batches"] += 1
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+    def pending(self):
+        """How many rows are waiting to be sent."""
+        return self._rows.qsize()
+
+    def flush(self, timeout=None):
+        """
+        Wait until every row queued so far is committed (or failed).
+
+        Returns False if the timeout (seconds) ran out first.
+        """
+        with self._lock:
+            target = self._queued
+            return self._progress.wait_for(lambda: self._finished >= target, timeout)
+
+    def close(self):
+        """Commit the queued rows, then stop the thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._rows.put(None)
+            thread.join()
+
+
+# One shared queue for the whole app
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_write_behind():
+    """Return the shared write-behind queue, creating it the first time."""
+    global _queue
+
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = WriteBehindQueue()
+    return _queue
+
+
+def close_write_behind():
+    """
+    Commit everything still queued and stop the shared queue.
+
+    Called at exit and by configure_database(), so queued rows are saved
+    in the file they were meant for. The next submit starts a new queue.
+    """
+    global _queue
+
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.close()
+
+
+# registered after connection.py's hook, so it runs first at exit:
+# the rows are handed to the writer before the writer stops
+atexit.register(close_write_behind)
@@ -0,0 +1,220 @@
+import os
+import random
+import threading
+import time
+
+from jarvis.streaming import StreamDeadlineError, StreamMetrics, stream_chat
+
+# The OpenAI model JARVIS uses
+MODEL_NAME = "gpt-4.1-mini"
+
+# Longest time (seconds) one question may take, retries included
+AI_DEADLINE = 30.0
+
+# Longest time (seconds) we wait for the next piece of a streamed answer.
+# The deadline is only checked between pieces, so this is how far one
+# stalled read can go past it.
+READ_TIMEOUT = 10.0
+
+# How many times a failed request is tried again (before any text arrived)
+MAX_RETRIES = 2
+RETRY_BASE = 0.5      # first wait in seconds, doubled every retry
+RETRY_MAX = 4.0       # never wait longer than this between retries
+
+# Most requests to the AI service at the same time (all sessions together)
+MAX_CONCURRENT = 4
+
+# Longest time (seconds) a question waits for a free slot before we give up
+QUEUE_WAIT = 5.0
+
+# HTTP status codes that are worth trying again
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class AIUnavailableError(RuntimeError):
+    """Raised when the AI service cannot answer (the page then uses the fallback)."""
+
+
+def is_transient(error):
+    """True for errors that may go away if we try again (network, 429, 5xx)."""
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    return getattr(error, "status_code", None) in TRANSIENT_STATUS
+
+
+class AIClient:
+    """
+    The OpenAI client with the safety rules JARVIS needs:
+
+    - a deadline for the whole question, retries included
+    - retries with jittered exponential backoff, only for transient errors
+      and only before the first piece of text was shown
+    - a semaphore so at most max_concurrent requests run at once
+    - latency metrics (percentiles and a histogram) in self.metrics
+
+    Anything that goes wrong ends as AIUnavailableError.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        base_url=None,
+        model=MODEL_NAME,
+        deadline=AI_DEADLINE,
+        max_retries=MAX_RETRIES,
+        retry_base=RETRY_BASE,
+        retry_max=RETRY_MAX,
+        max_concurrent=MAX_CONCURRENT,
+        queue_wait=QUEUE_WAIT,
+        read_timeout=READ_TIMEOUT,
+    ):
+        self.api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url
+        self.model = model
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.queue_wait = queue_wait
+        self.read_timeout = read_timeout
+
+        self._client = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self.max_concurrent = max_concurrent
+
+        self.metrics = StreamMetrics()
+        self.retries = 0
+        self.rejected = 0
+        self.failures = 0
+
+    @property
+    def configured(self):
+        return bool(self.api_key)
+
+    def _get_client(self):
+        """Create the OpenAI client the first time (the import takes a second)."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    # we do our own retries, so the library must not retry too
+                    self._client = OpenAI(
+                        api_key=self.api_key, base_url=self.base_url, max_retries=0
+                    )
+        return self._client
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _backoff(self, attempt):
+        """Full jitter: a random wait between 0 and base * 2^attempt."""
+        return random.uniform(0, min(self.retry_max, self.retry_base * 2 ** attempt))
+
+    def stream(self, messages):
+        """
+        Yield the answer text piece by piece.
+
+        Raises AIUnavailableError when there is no key, no free slot,
+        the deadline passed, or the service keeps failing.
+        """
+        if not self.configured:
+            raise AIUnavailableError("no API key")
+
+        if not self._slots.acquire(timeout=self.queue_wait):
+            self._count("rejected")
+            raise AIUnavailableError("too many questions at once")
+
+        try:
+            yield from self._stream_with_retries(messages)
+        finally:
+            self._slots.release()
+
+    def _stream_with_retries(self, messages):
+        # I import inside the function because openai takes a second to load
+        from openai import Timeout
+
+        end = time.monotonic() + self.deadline
+        attempt = 0
+
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                self._count("failures")
+                raise AIUnavailableError("the AI service took too long")
+
+            started = False
+            pieces = stream_chat(
+                self._get_client(), self.model, messages,
+                metrics=self.metrics, deadline=end,
+                timeout=Timeout(remaining, read=min(remaining, self.read_timeout)),
+            )
+            try:
+                for piece in pieces:
+                    started = True
+                    yield piece
+                return
+
+            except StreamDeadlineError as e:
+                self._count("failures")
+                raise AIUnavailableError("the AI service took too long") from e
+
+            except Exception as e:
+                # once text is on screen we cannot start the answer again
+                if started or not is_transient(e) or attempt >= self.max_retries:
+                    self._count("failures")
+                    raise AIUnavailableError(f"{type(e).__name__}: {e}") from e
+
+            finally:
+                # also runs when the page closes us, so the HTTP stream is closed now
+                pieces.close()
+
+            wait = min(self._backoff(attempt), max(0.0, end - time.monotonic()))
+            self._count("retries")
+            attempt += 1
+            time.sleep(wait)
+
+    def complete(self, messages):
+        """Return the whole answer as one string (same rules as stream)."""
+        return "".join(self.stream(messages))
+
+    def stats(self):
+        stats = self.metrics.stats()
+        with self._lock:
+            stats.update({
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "failures": self.failures,
+                "max_concurrent": self.max_concurrent,
+            })
+        return stats
+
+
+# One client shared by every Streamlit session, so the
+# concurrency limit is for the whole process
+_ai_client = None
+_ai_client_lock = threading.Lock()
+
+
+def get_ai_client():
+    """Return the shared AI client, creating it the first time."""
+    global _ai_client
+
+    if _ai_client is None:
+        with _ai_client_lock:
+            if _ai_client is None:
+                _ai_client = AIClient()
+    return _ai_client
+
+
+def configure_ai_client(**options):
+    """Replace the shared client, e.g. configure_ai_client(base_url=..., deadline=5)."""
+    global _ai_client
+
+    with _ai_client_lock:
+        _ai_client = AIClient(**options)
+    return _ai_client
@@ -0,0 +1,162 @@
+import hashlib
+import re
+from collections import deque
+
+# Most tokens we send to the model for one question (all messages together)
+PROMPT_TOKEN_BUDGET = 3000
+
+# Most earlier messages sent word for word (a question and its answer are two)
+RECENT_MESSAGES = 6
+
+# Most tokens for the summary of the older messages
+SUMMARY_TOKEN_BUDGET = 300
+
+# How much of an old question / answer goes into its summary line
+SUMMARY_QUESTION_CHARS = 120
+SUMMARY_ANSWER_CHARS = 160
+
+# Extra tokens the API adds for every message (role, separators)
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(text):
+    """
+    Rough token count: about 4 characters per token for English text.
+
+    Good enough for a budget; we do not need the exact tokenizer.
+    """
+    return (len(text) + 3) // 4
+
+
+def message_tokens(messages):
+    return sum(estimate_tokens(m["content"]) + TOKENS_PER_MESSAGE for m in messages)
+
+
+def _shorten(text, limit):
+    text = re.sub(r"\s+", " ", text).strip()
+    return text if len(text) <= limit else text[: limit - 3].rstrip() + "..."
+
+
+def _first_sentence(text):
+    match = re.search(r"(.+?[.!?])(\s|$)", text.strip(), re.S)
+    return match.group(1) if match else text
+
+
+def summary_line(message):
+    """One short line for an old message."""
+    if message["role"] == "user":
+        return f"User asked: {_shorten(message['content'], SUMMARY_QUESTION_CHARS)}"
+    return f"JARVIS answered: {_shorten(_first_sentence(message['content']), SUMMARY_ANSWER_CHARS)}"
+
+
+class ConversationWindow:
+    """
+    Decides which part of the chat goes to the model with a new question.
+
+    - the last recent_messages messages are sent word for word
+    - older messages become one short line each in a rolling summary,
+      made once when they leave the window (no extra model call)
+    - the summary is cut to summary_budget tokens (oldest lines first)
+    - if everything is still over token_budget, more recent messages
+      are moved into the summary
+
+    Keep one per chat (in st.session_state) so the summary is not
+    worked out again for every question.
+    """
+
+    def __init__(self, token_budget=PROMPT_TOKEN_BUDGET, recent_messages=RECENT_MESSAGES,
+                 summary_budget=SUMMARY_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.recent_messages = recent_messages
+        self.summary_budget = summary_budget
+
+        self.summary_lines = []
+        self.dropped_lines = 0     # summary lines cut to stay in the budget
+        self.summarised = 0        # how many history messages are in the summary
+        self.reports = deque(maxlen=100)
+
+    def reset(self):
+        self.summary_lines = []
+        self.dropped_lines = 0
+        self.summarised = 0
+
+    def _fold(self, history, upto):
+        """Move history[self.summarised:upto] into the summary."""
+        for message in history[self.summarised:upto]:
+            self.summary_lines.append(summary_line(message))
+        self.summarised = max(self.summarised, upto)
+
+        while self.summary_lines and estimate_tokens(self.summary_text()) > self.summary_budget:
+            self.summary_lines.pop(0)
+            self.dropped_lines += 1
+
+    def summary_text(self):
+        if not self.summary_lines:
+            return ""
+        text = "Summary of the earlier conversation:\n"
+        if self.dropped_lines:
+            text += f"({self.dropped_lines} older messages left out)\n"
+        return text + "\n".join(self.summary_lines)
+
+    def build(self, history, system_prompt, final_prompt):
+        """
+        Return the messages for the model.
+
+        history: earlier chat messages [{"role", "content"}, ...],
+                 not including the new question
+        final_prompt: the new question with the data context
+        """
+        if len(history) < self.summarised:
+            # the chat was cleared
+            self.reset()
+
+        start = max(self.summarised, len(history) - self.recent_messages)
+        self._fold(history, start)
+
+        fixed = [{"role": "system", "content": system_prompt}]
+        last = [{"role": "user", "content": final_prompt}]
+
+        while True:
+            summary = self.summary_text()
+            middle = [{"role": "system", "content": summary}] if summary else []
+            recent = [{"role": m["role"], "content": m["content"]} for m in history[start:]]
+            messages = fixed + middle + recent + last
+
+            tokens = message_tokens(messages)
+            if tokens <= self.token_budget or start >= len(history):
+                break
+            start += 1
+            self._fold(history, start)
+
+        self.reports.append({
+            "prompt_tokens": tokens,
+            "budget": self.token_budget,
+            "recent_messages": len(recent),
+            "summarised_messages": self.summarised,
+            "summary_tokens": estimate_tokens(summary),
+        })
+        return messages
+
+    def window_key(self, messages):
+        """
+        Short hash of the conversation part of the messages (without the
+        first system prompt and the new question), for the response cache.
+        Empty for the first question of a chat, so those answers are shared.
+        """
+        middle = messages[1:-1]
+        if not middle:
+            return ""
+        raw = "\n".join(f"{m['role']}:{m['content']}" for m in middle)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    def last_report(self):
+        return self.reports[-1] if self.reports else None
+
+    def stats(self):
+        """Average and largest prompt size of the questions in this chat."""
+        sizes = [report["prompt_tokens"] for report in self.reports]
+        return {
+            "questions": len(sizes),
+            "avg_prompt_tokens": sum(sizes) / len(sizes) if sizes else 0.0,
+            "max_prompt_tokens": max(sizes) if sizes else 0,
+        }
@@ -0,0 +1,39 @@
+# Words in a question that point to each section of the context snapshot
+SECTION_KEYWORDS = {
+    "CYBERSECURITY": ["incident", "cyber", "phishing", "malware", "ddos", "attack",
+                      "severity", "security", "threat"],
+    "DATASETS": ["dataset", "data science", "rows", "columns", "upload"],
+    "IT TICKETS": ["ticket", "support", "resolution", "staff", "priority", "assigned"],
+}
+
+
+def fallback_answer(question, snapshot, reason, records=""):
+    """
+    Answer without the AI service, from the cached context snapshot.
+
+    Only the sections the question seems to be about are shown
+    (all of them if no keyword matches), then the matching records
+    from the search index, if any.
+    """
+    q = question.casefold()
+    figures = snapshot["figures"]
+
+    titles = [
+        title for title, words in SECTION_KEYWORDS.items()
+        if title in figures and any(word in q for word in words)
+    ]
+    if not titles:
+        titles = list(figures)
+
+    text = (
+        f"JARVIS cannot reach the AI service right now ({reason}), "
+        "so here are the latest figures from the H.I.V.E. database instead:\n\n"
+    )
+    for title in titles:
+        text += f"**{title}**\n"
+        for label, value in figures[title]:
+            text += f"- {label}: {value}\n"
+        text += "\n"
+    if records:
+        text += records
+    return text.rstrip() + "\n"
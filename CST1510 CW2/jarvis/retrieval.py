@@ -0,0 +1,444 @@
+"""
+BM25 search over incident and ticket descriptions, so JARVIS can see the
+rows a question is about instead of only the global counts.
+
+The index lives in memory as numpy arrays (one index per table):
+- every row has a slot with its row id, length and an alive flag
+- postings (which slots contain a word, and how often) are kept per word
+  in one big sorted array, plus a small list of new postings that is
+  merged in once it grows ("compaction")
+
+Before each search the index reads the row_changes log (filled by SQLite
+triggers) and updates only the rows that changed. A bulk import makes it
+build again from the table.
+"""
+import math
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from hive_database.changes import (
+    CHANGE_TABLES,
+    TEXT_COLUMN,
+    changes_since,
+    last_change,
+    prune_changes,
+)
+from hive_database.connection import db_connection, get_connection_manager
+
+# BM25 settings (the usual defaults)
+K1 = 1.2
+B = 0.75
+
+# How many rows per table a question gets as context
+TOP_K = 5
+
+# Merge the new postings and drop dead slots when they are this big
+# compared with the whole index
+COMPACT_RATIO = 0.25
+
+# Words of 2+ letters/digits that start with a letter. Plain numbers such
+# as "Incident 1042" are left out: use the id filters for those.
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9_]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from",
+    "has", "have", "how", "in", "is", "it", "many", "me", "of", "on", "or",
+    "show", "that", "the", "there", "this", "to", "was", "what", "when", "which",
+    "who", "why", "with", "about", "any", "all", "our", "we", "you",
+}
+
+# Rows read from SQLite at a time while building
+BUILD_BATCH = 50000
+
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class Vocabulary(dict):
+    """
+    word -> term id. A new word gets the next id the first time it is
+    looked up; stop words are -1. Looking words up with map() keeps the
+    loop in C, which is what makes building 1M rows fast.
+    """
+
+    def __init__(self):
+        super().__init__((word, -1) for word in STOPWORDS)
+        self.size = 0
+
+    def __missing__(self, word):
+        self[word] = term = self.size
+        self.size += 1
+        return term
+
+
+class BM25Index:
+    """A BM25 index for one table. Use search(); it keeps itself up to date."""
+
+    def __init__(self, table, k1=K1, b=B, compact_ratio=COMPACT_RATIO):
+        self.table = table
+        self.key = CHANGE_TABLES[table]
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+
+        self._lock = threading.Lock()
+        self.seq = None       # last row_changes seq we applied (None = not built)
+        self.builds = 0
+        self.updates = 0
+
+    # ---------- building ----------
+
+    def _reset(self):
+        self.vocab = Vocabulary()                      # word -> term id
+        self.row_ids = np.empty(0, dtype=np.int64)     # slot -> row id
+        self.lengths = np.empty(0, dtype=np.float32)   # slot -> words in the row
+        self.alive = np.empty(0, dtype=bool)           # slot -> row still exists
+        self.size = 0                                  # slots in use
+        self.slot_of = {}                              # row id -> slot
+        self.live = 0
+        self.total_length = 0.0
+
+        # postings: slots and counts of term t are in [offsets[t], offsets[t + 1])
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.post_slots = np.empty(0, dtype=np.int32)
+        self.post_tf = np.empty(0, dtype=np.float32)
+
+        # postings added since the last compaction: term id -> ([slots], [tf])
+        self.pending = {}
+        self.pending_count = 0
+        self.dead = 0
+        self._norm = None
+        self._norm_key = None
+
+    def _term_ids(self, text):
+        ids = map(self.vocab.__getitem__, TOKEN_PATTERN.findall((text or "").lower()))
+        return [term for term in ids if term >= 0]
+
+    def build(self):
+        """Read every row of the table and build the index from scratch."""
+        self._reset()
+        seq = last_change()   # changes after this are applied by refresh()
+
+        terms = []        # term id of every word of every row (-1 = stop word)
+        counts = []       # words per row, so we know which row a word is from
+        row_ids = []
+        lookup = self.vocab.__getitem__
+        findall = TOKEN_PATTERN.findall
+
+        with db_connection() as conn:
+            cursor = conn.execute(f"SELECT {self.key}, {TEXT_COLUMN} FROM {self.table}")
+            while True:
+                batch = cursor.fetchmany(BUILD_BATCH)
+                if not batch:
+                    break
+                for row_id, text in batch:
+                    words = findall((text or "").lower())
+                    terms.extend(map(lookup, words))
+                    counts.append(len(words))
+                    row_ids.append(row_id)
+
+        self.size = len(row_ids)
+        terms = np.array(terms, dtype=np.int64)
+        slots = np.repeat(np.arange(self.size, dtype=np.int64), counts)
+        keep = terms >= 0
+        terms, slots = terms[keep], slots[keep]
+
+        self.row_ids = np.array(row_ids, dtype=np.int64)
+        self.lengths = np.bincount(slots, minlength=self.size).astype(np.float32)
+        self.alive = np.ones(self.size, dtype=bool)
+        self.slot_of = dict(zip(row_ids, range(self.size)))
+        self.live = self.size
+        self.total_length = float(self.lengths.sum())
+
+        self._set_postings(terms, slots, None)
+        self.seq = seq
+        self.builds += 1
+
+        # the log before this point is not needed by this index any more
+        prune_changes()
+
+    def _set_postings(self, terms, slots, tf):
+        """
+        Store postings given as parallel arrays. tf=None means every
+        (term, slot) pair appears once per word, so it is counted here.
+        """
+        n_terms = self.vocab.size
+        combined = terms * max(self.size, 1) + slots
+        if tf is None:
+            combined, counts = np.unique(combined, return_counts=True)
+            tf = counts.astype(np.float32)
+        else:
+            order = np.argsort(combined, kind="stable")
+            combined, tf = combined[order], tf[order]
+
+        terms = combined // max(self.size, 1)
+        self.post_slots = (combined % max(self.size, 1)).astype(np.int32)
+        self.post_tf = tf.astype(np.float32)
+        self.offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=n_terms), out=self.offsets[1:])
+
+        self.pending = {}
+        self.pending_count = 0
+
+    def _compact(self):
+        """Merge the pending postings and drop dead slots, all in numpy."""
+        counts = np.diff(self.offsets)
+        terms = [np.repeat(np.arange(len(counts)), counts)]
+        slots = [self.post_slots.astype(np.int64)]
+        tfs = [self.post_tf]
+        for term, (p_slots, p_tf) in self.pending.items():
+            terms.append(np.full(len(p_slots), term, dtype=np.int64))
+            slots.append(np.array(p_slots, dtype=np.int64))
+            tfs.append(np.array(p_tf, dtype=np.float32))
+
+        terms = np.concatenate(terms)
+        slots = np.concatenate(slots)
+        tfs = np.concatenate(tfs)
+
+        keep = self.alive[:self.size][slots]
+        terms, slots, tfs = terms[keep], slots[keep], tfs[keep]
+
+        # give the live slots new numbers 0..live-1
+        alive = self.alive[:self.size]
+        new_number = np.cumsum(alive) - 1
+        self.row_ids = self.row_ids[:self.size][alive]
+        self.lengths = self.lengths[:self.size][alive]
+        self.size = len(self.row_ids)
+        self.alive = np.ones(self.size, dtype=bool)
+        self.slot_of = dict(zip(self.row_ids.tolist(), range(self.size)))
+        self.dead = 0
+
+        self._set_postings(terms, new_number[slots], tfs)
+
+    # ---------- incremental updates ----------
+
+    def _grow(self, needed):
+        if needed <= len(self.row_ids):
+            return
+        capacity = max(needed, len(self.row_ids) * 2, 1024)
+        for name, fill in [("row_ids", 0), ("lengths", 0), ("alive", False)]:
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _remove(self, row_id):
+        slot = self.slot_of.pop(row_id, None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        self.live -= 1
+        self.total_length -= float(self.lengths[slot])
+        self.dead += 1
+
+    def _add(self, row_id, text):
+        self._remove(row_id)
+        ids = self._term_ids(text)
+
+        slot = self.size
+        self._grow(slot + 1)
+        self.size += 1
+        self.row_ids[slot] = row_id
+        self.lengths[slot] = len(ids)
+        self.alive[slot] = True
+        self.slot_of[row_id] = slot
+        self.live += 1
+        self.total_length += len(ids)
+
+        for term, tf in Counter(ids).items():
+            p_slots, p_tf = self.pending.setdefault(term, ([], []))
+            p_slots.append(slot)
+            p_tf.append(tf)
+            self.pending_count += 1
+
+    def refresh(self):
+        """Apply the rows changed since the last refresh (or build if needed)."""
+        if self.seq is None:
+            self.build()
+            return
+
+        seq, ids, reload = changes_since(self.table, self.seq)
+        if reload:
+            self.build()
+            return
+
+        if ids:
+            found = {}
+            with db_connection() as conn:
+                for i in range(0, len(ids), 500):
+                    part = ids[i:i + 500]
+                    marks = ", ".join("?" for _ in part)
+                    for row_id, text in conn.execute(
+                        f"SELECT {self.key}, {TEXT_COLUMN} FROM {self.table} "
+                        f"WHERE {self.key} IN ({marks})",
+                        part,
+                    ):
+                        found[row_id] = text
+
+            for row_id in ids:
+                if row_id in found:
+                    self._add(row_id, found[row_id])
+                else:
+                    self._remove(row_id)
+            self.updates += len(ids)
+
+            if self.pending_count + self.dead > self.compact_ratio * max(len(self.post_slots), 1000):
+                self._compact()
+        self.seq = seq
+
+    # ---------- searching ----------
+
+    def _postings(self, term):
+        if term + 1 < len(self.offsets):
+            start, end = self.offsets[term], self.offsets[term + 1]
+        else:
+            start = end = 0   # a new word, only in the pending postings
+        slots = self.post_slots[start:end]
+        tf = self.post_tf[start:end]
+        if term in self.pending:
+            p_slots, p_tf = self.pending[term]
+            slots = np.concatenate([slots, np.array(p_slots, dtype=np.int32)])
+            tf = np.concatenate([tf, np.array(p_tf, dtype=np.float32)])
+        return slots, tf
+
+    def _norms(self):
+        """
+        k1 * (1 - b + b * length / average length) for every slot.
+        Worked out again only when rows were added or removed.
+        """
+        key = (self.size, self.live, self.total_length)
+        if self._norm_key != key:
+            avg_length = self.total_length / self.live
+            lengths = self.lengths[:self.size]
+            self._norm = (self.k1 * (1 - self.b + self.b * lengths / avg_length)).astype(np.float32)
+            self._norm_key = key
+        return self._norm
+
+    def _top_k(self, slots, scores, k):
+        """
+        The k slots with the best scores, best first. Equal scores go to
+        the smaller row id, so the answer does not depend on slot order.
+        """
+        k = min(k, len(slots))
+        kth = np.partition(scores, -k)[-k]
+        above = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)
+        room = k - len(above)
+        if len(tied) > room:
+            tied = tied[np.argpartition(self.row_ids[slots[tied]], room - 1)[:room]]
+        best = np.concatenate([above, tied])
+        best = best[np.lexsort((self.row_ids[slots[best]], -scores[best]))]
+        return slots[best]
+
+    def search(self, query, k=TOP_K):
+        """Return [(row id, score), ...], best first (only rows with a score > 0)."""
+        with self._lock:
+            self.refresh()
+
+            terms = {self.vocab[w] for w in tokenize(query) if w in self.vocab}
+            if not terms or not self.live:
+                return []
+
+            norms = self._norms()
+            scores = np.zeros(self.size, dtype=np.float32)
+            touched = []
+
+            for term in terms:
+                slots, tf = self._postings(term)
+                if self.dead:
+                    live = self.alive[slots]
+                    slots, tf = slots[live], tf[live]
+                if not len(slots):
+                    continue
+
+                df = len(slots)
+                idf = math.log(1 + (self.live - df + 0.5) / (df + 0.5))
+                # one posting per slot and term, so += is safe here
+                scores[slots] += np.float32(idf * (self.k1 + 1)) * tf / (tf + norms[slots])
+                touched.append(slots)
+
+            if not touched:
+                return []
+
+            # rare words: only look at the rows that have them,
+            # common words: it is quicker to look at every row
+            if sum(len(slots) for slots in touched) < self.size // 8:
+                candidates = np.unique(np.concatenate(touched))
+            else:
+                candidates = np.arange(self.size)
+            best = self._top_k(candidates, scores[candidates], k)
+            return [(int(self.row_ids[s]), float(scores[s])) for s in best if scores[s] > 0]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rows": self.live,
+                "words": self.vocab.size if self.seq is not None else 0,
+                "postings": len(self.post_slots) + self.pending_count if self.seq is not None else 0,
+                "builds": self.builds,
+                "updates": self.updates,
+            }
+
+
+# One index per (database file, table), shared by every session
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(table):
+    key = (str(get_connection_manager().db_path), table)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = BM25Index(table)
+        return _indexes[key]
+
+
+def retrieve(question, k=TOP_K):
+    """Return {table: [row dict with a "score", ...]} for the best matches."""
+    results = {}
+    for table, key in CHANGE_TABLES.items():
+        hits = get_search_index(table).search(question, k)
+        if not hits:
+            continue
+
+        scores = dict(hits)
+        marks = ", ".join("?" for _ in hits)
+        with db_connection() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM {table} WHERE {key} IN ({marks})", list(scores)
+            ).fetchall()
+
+        rows = [dict(row, score=scores[row[key]]) for row in rows]
+        rows.sort(key=lambda row: -row["score"])
+        results[table] = rows
+    return results
+
+
+def _describe(table, row):
+    if table == "cyber_incidents":
+        return (
+            f"Incident {row['incident_id']} ({row['timestamp']}, {row['severity']}, "
+            f"{row['category']}, {row['status']}): {row['description']}"
+        )
+    return (
+        f"Ticket {row['ticket_id']} ({row['created_at']}, {row['priority']}, "
+        f"{row['status']}, {row['assigned_to']}, {row['resolution_time_hours']} h): "
+        f"{row['description']}"
+    )
+
+
+def retrieval_context(question, k=TOP_K):
+    """The best matching rows as text for the prompt ("" if nothing matches)."""
+    results = retrieve(question, k)
+    if not results:
+        return ""
+
+    text = "RECORDS THAT MATCH THE QUESTION (best first):\n"
+    for table, rows in results.items():
+        for row in rows:
+            text += f"- {_describe(table, row)}\n"
+    return text
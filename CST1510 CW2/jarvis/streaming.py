@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+
+# How many recent requests we keep for the metrics
+LATENCY_SAMPLES = 1000
+
+# Upper edges (milliseconds) of the latency histogram buckets
+HISTOGRAM_BUCKETS_MS = [100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class StreamDeadlineError(TimeoutError):
+    """Raised by stream_chat when its deadline passes during the answer."""
+
+
+class StreamMetrics:
+    """
+    Time to first token and total time of streamed answers.
+
+    - ttft:  from sending the request to the first piece of text
+    - total: from sending the request to the last piece of text
+    Cancelled and failed requests are counted, but only finished ones
+    go into the total time percentiles.
+    """
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self._lock = threading.Lock()
+        self._ttft = deque(maxlen=samples)
+        self._total = deque(maxlen=samples)
+
+        # one count per bucket, plus one for "slower than the last edge"
+        self._histograms = {
+            "ttft": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+            "total": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+        }
+
+        self.completed = 0
+        self.cancelled = 0
+        self.errors = 0
+
+    def record(self, ttft, total, outcome):
+        """outcome is "completed", "cancelled" or "error"."""
+        with self._lock:
+            if ttft is not None:
+                self._ttft.append(ttft)
+                self._add_to_histogram("ttft", ttft)
+            if outcome == "completed":
+                self._total.append(total)
+                self._add_to_histogram("total", total)
+                self.completed += 1
+            elif outcome == "cancelled":
+                self.cancelled += 1
+            else:
+                self.errors += 1
+
+    def _add_to_histogram(self, name, seconds):
+        counts = self._histograms[name]
+        ms = seconds * 1000
+        for i, edge in enumerate(HISTOGRAM_BUCKETS_MS):
+            if ms <= edge:
+                counts[i] += 1
+                return
+        counts[-1] += 1
+
+    def histogram(self, name="total"):
+        """
+        Return [(label, count), ...] for "ttft" or "total", e.g.
+        [("<=100 ms", 3), ("<=250 ms", 10), ..., (">30000 ms", 0)].
+        Unlike the percentiles, these counts cover every request since start.
+        """
+        with self._lock:
+            counts = list(self._histograms[name])
+        labels = [f"<={edge} ms" for edge in HISTOGRAM_BUCKETS_MS]
+        labels.append(f">{HISTOGRAM_BUCKETS_MS[-1]} ms")
+        return list(zip(labels, counts))
+
+    def stats(self):
+        """Counters and p50/p95 (milliseconds) of recent requests."""
+        with self._lock:
+            stats = {
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "errors": self.errors,
+            }
+            series = {"ttft": sorted(self._ttft), "total": sorted(self._total)}
+
+        for name, samples in series.items():
+            for label, q in [("p50", 0.50), ("p95", 0.95)]:
+                key = f"{name}_{label}_ms"
+                if samples:
+                    stats[key] = samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+                else:
+                    stats[key] = 0.0
+        return stats
+
+
+# One set of metrics for the whole process
+stream_metrics = StreamMetrics()
+
+
+def stream_chat(client, model, messages, metrics=stream_metrics, deadline=None, **options):
+    """
+    Ask for a chat completion with stream=True and yield the text pieces.
+
+    Use it with st.write_stream(), which shows each piece as it arrives.
+
+    deadline: time.monotonic() value the whole answer must finish by.
+    The HTTP timeout only limits each single read, so a server that keeps
+    sending a little at a time could go on forever. The deadline is
+    checked after every chunk (empty ones too) and StreamDeadlineError
+    is raised once it has passed.
+
+    If the user leaves the page, Streamlit stops the script and closes this
+    generator. The finally block then closes the HTTP response, so the
+    server stops generating an answer nobody will read.
+    A request that fails (even before the stream opens) is still recorded
+    in the metrics as an error.
+    """
+    start = time.perf_counter()
+    ttft = None
+    outcome = "error"
+    stream = None
+
+    try:
+        stream = client.chat.completions.create(
+            model=model, messages=messages, stream=True, **options
+        )
+        for chunk in stream:
+            if deadline is not None and time.monotonic() > deadline:
+                raise StreamDeadlineError("the answer did not finish before the deadline")
+            if not chunk.choices:
+                continue
+            piece = chunk.choices[0].delta.content
+            if not piece:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            yield piece
+        outcome = "completed"
+    except GeneratorExit:
+        outcome = "cancelled"
+        raise
+    finally:
+        if stream is not None:
+            stream.close()
+        if metrics is not None:
+            metrics.record(ttft, time.perf_counter() - start, outcome)
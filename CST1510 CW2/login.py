@@ -6,6 +6,7 @@ from authentication.security import (
     register_user,
     login_user,
 )
+from authentication.throttle import TRUST_PROXY_HEADER, UNKNOWN_CLIENT
 
 st.set_page_config(
     page_title="HIVE Access Portal",
@@ -14,6 +15,7 @@ st.set_page_config(
 )
 
 # Run database setup one time at start
+# (on later reruns it returns straight away)
 setup_database()
 
 # Session state setup
@@ -29,6 +31,30 @@ if "role" not in st.session_state:
     st.session_state.role = None
 
 
+def get_client_address():
+    """
+    Return the browser's IP address for the login throttle.
+
+    The X-Forwarded-For header is only used behind our own proxy
+    (TRUST_PROXY_HEADER), because a browser can put anything in it.
+    If we do not know the address, UNKNOWN_CLIENT is returned.
+    """
+    try:
+        if TRUST_PROXY_HEADER:
+            forwarded = st.context.headers.get("X-Forwarded-For")
+            if forwarded:
+                # our proxy adds the address it saw at the end,
+                # anything before it was sent by the browser
+                return forwarded.split(",")[-1].strip()
+
+        address = getattr(st.context, "ip_address", None)
+        if address:
+            return address
+    except Exception:
+        pass
+    return UNKNOWN_CLIENT
+
+
 def show_login_page():
     """
     Show the login and register screen.
@@ -76,7 +102,13 @@ def show_login_page():
                         st.error("⚠️ Please fill in all fields")
                     else:
                         # Try to log in the user
-                        success, result = login_user(login_username, login_password)
+                        # (the client address lets the throttle slow down
+                        # one attacker without locking out everybody)
+                        success, result = login_user(
+                            login_username,
+                            login_password,
+                            client=get_client_address(),
+                        )
 
                         if success:
                             # Save user info in session
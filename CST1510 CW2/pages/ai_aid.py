@@ -1,24 +1,22 @@
-import os
+import hashlib
+
 import streamlit as st
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # We load variables from .env file (this keeps secrets outside code)
 load_dotenv(override=True)
 
-# Read the OpenAI API key from environment
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-# Create OpenAI client
-# If the key is in the env, the client can talk to the API
-client = OpenAI(api_key=OPENAI_API_KEY)
+# The data context comes from a cached snapshot of SQL aggregates,
+# shared by every session and rebuilt when the data changes
+from hive_database.context import get_context_snapshot
+from hive_database.response_cache import get_response_cache
 
-# Import our data helpers from the H.I.V.E. database
-from hive_database.data_loader import (
-    load_cyber_incidents,
-    load_datasets_metadata,
-    load_it_tickets,
-)
+# One AI client for all sessions: it has a deadline, retries and a limit
+# on parallel requests. The openai package loads on the first question.
+from jarvis.client import AIUnavailableError, get_ai_client
+from jarvis.conversation import ConversationWindow
+from jarvis.fallback import fallback_answer
+from jarvis.retrieval import retrieval_context
 
 # ============================
 # Page configuration
@@ -70,84 +68,79 @@ if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
 
-def get_data_context() -> str:
-    """
-    Make a short text summary of all three domains.
-    This text will be sent to OpenAI as context.
-    """
-    context = "Here is the current data from the H.I.V.E. platform:\n\n"
-
-    # --- Cybersecurity data ---
-    cyber_df = load_cyber_incidents()
-    context += "CYBERSECURITY:\n"
-    context += f"- Total incidents: {len(cyber_df)}\n"
-    context += f"- Open incidents: {len(cyber_df[cyber_df['status'] == 'Open'])}\n"
-    context += f"- Critical incidents: {len(cyber_df[cyber_df['severity'] == 'Critical'])}\n"
-    context += f"- Phishing incidents: {len(cyber_df[cyber_df['category'] == 'Phishing'])}\n\n"
-
-    # --- Dataset data ---
-    datasets_df = load_datasets_metadata()
-    context += "DATASETS:\n"
-    context += f"- Total datasets: {len(datasets_df)}\n"
-    context += f"- Total rows across all datasets: {datasets_df['rows'].sum()}\n\n"
-
-    # --- IT tickets data ---
-    tickets_df = load_it_tickets()
-    context += "IT TICKETS:\n"
-    context += f"- Total tickets: {len(tickets_df)}\n"
-    context += f"- Open tickets: {len(tickets_df[tickets_df['status'] == 'Open'])}\n"
-    context += (
-        f"- Average resolution time: "
-        f"{tickets_df['resolution_time_hours'].mean():.1f} hours\n"
+# The conversation window picks which earlier messages go to the model:
+# the last few word for word, older ones as a short summary
+if "conversation" not in st.session_state:
+    st.session_state.conversation = ConversationWindow()
+
+
+def build_messages(user_message, data_context, history):
+    """Make the list of messages we send to the model."""
+    # This is the final prompt we send to the model
+    full_prompt = (
+        f"{data_context}\n\n"
+        f"User question: {user_message}\n\n"
+        "You are JARVIS, the H.I.V.E. AI assistant. "
+        "Explain in clear and simple English. "
+        "Give short explanations and 2–3 practical suggestions."
     )
 
-    return context
+    system_prompt = (
+        "You are JARVIS, an AI assistant for the H.I.V.E. platform. "
+        "You help agents understand cybersecurity, data science, "
+        "and IT operations data."
+    )
 
+    return st.session_state.conversation.build(history, system_prompt, full_prompt)
 
-def get_ai_response(user_message: str) -> str:
-    """
-    Send a question and the data context to OpenAI.
-    Return the answer text from the model.
+
+def stream_ai_response(user_message: str, history):
     """
-    # If the key is missing, we tell the user
-    if not OPENAI_API_KEY:
-        return "AI is not configured. Please set OPENAI_API_KEY in your .env file."
+    Send a question, the data context and the recent chat to OpenAI.
+    Yield the answer text piece by piece, as the model writes it.
 
+    If the AI service cannot answer, JARVIS answers from the local figures.
+    """
+    snapshot = get_context_snapshot()
+    client = get_ai_client()
+
+    # The incidents and tickets whose descriptions match the question best
+    records = retrieval_context(user_message)
+    data_context = f"{snapshot['text']}\n{records}" if records else snapshot["text"]
+    messages = build_messages(user_message, data_context, history)
+
+    # Same question about the same data (and the same earlier chat,
+    # if there is one): answer from the cache
+    version = snapshot["version"]
+    if records:
+        version += "-" + hashlib.sha256(records.encode("utf-8")).hexdigest()[:8]
+    window_key = st.session_state.conversation.window_key(messages)
+    if window_key:
+        version = f"{version}-{window_key}"
+
+    cache = get_response_cache()
+    cached = cache.get(user_message, client.model, version)
+    if cached is not None:
+        yield cached
+        return
+
+    pieces = []
     try:
-        # Build context about the data
-        data_context = get_data_context()
-
-        # This is the final prompt we send to the model
-        full_prompt = (
-            f"{data_context}\n\n"
-            f"User question: {user_message}\n\n"
-            "You are JARVIS, the H.I.V.E. AI assistant. "
-            "Explain in clear and simple English. "
-            "Give short explanations and 2–3 practical suggestions."
-        )
-
-        # Call OpenAI Chat Completions API
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are JARVIS, an AI assistant for the H.I.V.E. platform. "
-                        "You help agents understand cybersecurity, data science, "
-                        "and IT operations data."
-                    ),
-                },
-                {"role": "user", "content": full_prompt},
-            ],
-        )
+        for piece in client.stream(messages):
+            pieces.append(piece)
+            yield piece
 
-        # Get the text from the first choice
-        return response.choices[0].message.content
+    except AIUnavailableError as e:
+        if pieces:
+            yield f"\n\n*(The answer was cut off: {e})*"
+        else:
+            reason = "OPENAI_API_KEY is not set in your .env file" if not client.configured else e
+            yield fallback_answer(user_message, snapshot, reason, records)
+        return
 
-    except Exception as e:
-        # If there is any error, we return it as text
-        return f"Error from AI: {e}"
+    # Errors, fallbacks and cancelled answers are not saved,
+    # so they are tried again next time
+    cache.put(user_message, client.model, version, "".join(pieces))
 
 
 # ============================
@@ -174,11 +167,11 @@ if user_input:
     with st.chat_message("user"):
         st.write(user_input)
 
-    # Ask OpenAI for an answer
+    # Ask OpenAI for an answer, shown word by word as it arrives
     with st.chat_message("assistant"):
-        with st.spinner("JARVIS is thinking..."):
-            ai_reply = get_ai_response(user_input)
-            st.write(ai_reply)
+        ai_reply = st.write_stream(
+            stream_ai_response(user_input, st.session_state.chat_history[:-1])
+        )
 
     # Save AI answer
     st.session_state.chat_history.append(
@@ -191,7 +184,25 @@ if user_input:
 # Button to clear chat
 if st.button("🧹 Clear Chat History"):
     st.session_state.chat_history = []
+    st.session_state.conversation.reset()
     st.rerun()
 
 st.markdown("---")
-st.caption(" JARVIS – H.I.V.E. AI Assistant Module")
+cache_stats = get_response_cache().stats()
+timing = get_ai_client().stats()
+st.caption(
+    f" JARVIS – H.I.V.E. AI Assistant Module · answer cache: "
+    f"{cache_stats['entries']} saved, {cache_stats['hit_rate']:.0%} hit rate · "
+    f"first word p50 {timing['ttft_p50_ms']:.0f} ms, "
+    f"full answer p50 {timing['total_p50_ms']:.0f} ms"
+)
+
+# Size of the last prompt, so we can see the window working
+report = st.session_state.conversation.last_report()
+if report:
+    st.caption(
+        f"Last prompt: ~{report['prompt_tokens']} of {report['budget']} tokens · "
+        f"{report['recent_messages']} recent messages sent in full, "
+        f"{report['summarised_messages']} older ones summarised "
+        f"(~{report['summary_tokens']} tokens)"
+    )
@@ -3,11 +3,21 @@ import plotly.express as px
 from datetime import datetime
 
 from hive_database.data_loader import (
-    load_cyber_incidents,
+    query_page,
+    search_page,
+    distinct_values,
+    get_row,
+    get_data_version,
+    list_ids,
+    next_id,
     create_incident,
     update_incident,
     delete_incident,
+    bulk_update_incidents,
 )
+from hive_database.aggregates import count_where, value_counts
+from hive_database.rollups import TREND_DAYS, hour_heatmap, rollup_trend
+from hive_database.summary import summary_count, summary_counts
 
 # Page configuration
 st.set_page_config(
@@ -44,9 +54,6 @@ if st.sidebar.button(" Logout", use_container_width=True):
     st.session_state.role = None
     st.switch_page("login.py")
 
-# Load data
-df = load_cyber_incidents()
-
 # Main title
 st.title(" Cyber Security – Incident Dashboard")
 st.markdown("### Monitor and manage security incidents in the H.I.V.E.")
@@ -61,15 +68,25 @@ tab_overview, tab_incidents, tab_analysis = st.tabs(
 with tab_overview:
     st.subheader("Threat Overview")
 
+    # tiles and charts read the trigger-maintained counters (a few rows)
+
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total incidents", len(df))
+        st.metric("Total incidents", summary_count("cyber_incidents"))
     with col2:
-        st.metric("Open incidents", len(df[df["status"] == "Open"]))
+        st.metric(
+            "Open incidents", summary_count("cyber_incidents", "status", "Open")
+        )
     with col3:
-        st.metric("Critical incidents", len(df[df["severity"] == "Critical"]))
+        st.metric(
+            "Critical incidents",
+            summary_count("cyber_incidents", "severity", "Critical"),
+        )
     with col4:
-        st.metric("Phishing attacks", len(df[df["category"] == "Phishing"]))
+        st.metric(
+            "Phishing attacks",
+            summary_count("cyber_incidents", "category", "Phishing"),
+        )
 
     st.markdown("---")
 
@@ -77,7 +94,7 @@ with tab_overview:
     # Category bar chart
     with c1:
         st.markdown("#### Incidents by category")
-        cat_counts = df["category"].value_counts()
+        cat_counts = summary_counts("cyber_incidents", "category")
         fig_cat = px.bar(
             x=cat_counts.index,
             y=cat_counts.values,
@@ -89,7 +106,7 @@ with tab_overview:
     # Severity pie chart
     with c2:
         st.markdown("#### Severity levels")
-        sev_counts = df["severity"].value_counts()
+        sev_counts = summary_counts("cyber_incidents", "severity")
         fig_sev = px.pie(
             values=sev_counts.values,
             names=sev_counts.index,
@@ -98,7 +115,7 @@ with tab_overview:
         st.plotly_chart(fig_sev, use_container_width=True)
 
     st.markdown("#### Incident status")
-    status_counts = df["status"].value_counts()
+    status_counts = summary_counts("cyber_incidents", "status")
     fig_status = px.bar(
         x=status_counts.index,
         y=status_counts.values,
@@ -117,7 +134,7 @@ with tab_incidents:
             new_id = st.number_input(
                 "Incident ID",
                 min_value=1,
-                value=int(df["incident_id"].max() + 1),
+                value=next_id("cyber_incidents"),
             )
             new_time = st.text_input(
                 "Timestamp",
@@ -145,78 +162,190 @@ with tab_incidents:
 
     st.markdown("#### All incidents")
 
+    # --- search ---
+    search_text = st.text_input(
+        "🔍 Search descriptions",
+        placeholder="e.g. vpn, password reset, ransomware",
+    )
+
     # --- filters ---
+    status_options = distinct_values("cyber_incidents", "status")
+    sev_options = distinct_values("cyber_incidents", "severity")
+    cat_options = distinct_values("cyber_incidents", "category")
+
     f1, f2, f3 = st.columns(3)
     with f1:
         sel_status = st.multiselect(
             "Filter by status",
-            options=df["status"].unique().tolist(),
-            default=df["status"].unique().tolist(),
+            options=status_options,
+            default=status_options,
         )
     with f2:
         sel_sev = st.multiselect(
             "Filter by severity",
-            options=df["severity"].unique().tolist(),
-            default=df["severity"].unique().tolist(),
+            options=sev_options,
+            default=sev_options,
         )
     with f3:
         sel_cat = st.multiselect(
             "Filter by category",
-            options=df["category"].unique().tolist(),
-            default=df["category"].unique().tolist(),
+            options=cat_options,
+            default=cat_options,
         )
 
-    filtered = df[
-        (df["status"].isin(sel_status))
-        & (df["severity"].isin(sel_sev))
-        & (df["category"].isin(sel_cat))
-    ]
+    s1, s2 = st.columns(2)
+    with s1:
+        sort_by = st.selectbox(
+            "Sort by",
+            ["incident_id", "timestamp", "severity", "category", "status"],
+        )
+    with s2:
+        descending = st.checkbox("Descending", value=False)
+
+    # Filtering, sorting and paging all happen inside the database,
+    # so only one page of rows comes back to the page.
+    # We keep the cursor of every page we visited to be able to go back.
+    filter_key = (search_text, tuple(sel_status), tuple(sel_sev), tuple(sel_cat),
+                  sort_by, descending)
+    if st.session_state.get("incident_filter_key") != filter_key:
+        st.session_state.incident_filter_key = filter_key
+        st.session_state.incident_cursors = [None]
+    cursors = st.session_state.incident_cursors
+
+    filters = {"status": sel_status, "severity": sel_sev, "category": sel_cat}
+    if search_text.strip():
+        # ordered by the search (best match or newest first), not the sort options
+        page = search_page(
+            "cyber_incidents", search_text, filters=filters, cursor=cursors[-1]
+        )
+    else:
+        page = query_page(
+            "cyber_incidents",
+            filters=filters,
+            sort_by=sort_by,
+            descending=descending,
+            cursor=cursors[-1],
+        )
+    filtered = page["rows"]
+
+    # rows can be ticked in the table for the bulk update below.
+    # Streamlit remembers the ticks by row position, so the key changes with
+    # the filters, the page and every write: then old ticks are dropped
+    # instead of pointing at other (or missing) rows.
+    table_event = st.dataframe(
+        filtered,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=(f"incident_table_{hash(filter_key)}_{len(cursors)}"
+             f"_{get_data_version('cyber_incidents')}"),
+    )
+    ticked = [i for i in table_event.selection.rows if i < len(filtered)]
+    selected_ids = filtered.iloc[ticked]["incident_id"].tolist()
+
+    p1, p2, p3 = st.columns([1, 2, 1])
+    with p1:
+        if st.button("⬅️ Previous", disabled=len(cursors) == 1, key="incident_prev"):
+            cursors.pop()
+            st.rerun()
+    with p2:
+        order = {True: " (best match first)", False: " (newest first)"}.get(page.get("ranked"), "")
+        st.caption(f"Page {len(cursors)} – {page['total']} matching incidents{order}")
+    with p3:
+        if st.button("Next ➡️", disabled=page["next_cursor"] is None, key="incident_next"):
+            cursors.append(page["next_cursor"])
+            st.rerun()
+
+    # --- bulk update ---
+    with st.expander(f"🧰 Bulk update ({len(selected_ids)} selected)"):
+        with st.form("bulk_incident_form"):
+            keep = "(keep)"
+            bulk_status = st.selectbox(
+                "New status", [keep, "Open", "In Progress", "Resolved", "Closed"]
+            )
+            bulk_sev = st.selectbox(
+                "New severity", [keep, "Low", "Medium", "High", "Critical"]
+            )
+            # bulk updates go by the filters only, so not while searching
+            apply_to_all = st.checkbox(
+                f"Apply to all {page['total']} incidents matching the filters",
+                disabled=bool(search_text.strip()),
+                help="Clear the search box to update by filters.",
+            )
 
-    st.dataframe(filtered, use_container_width=True)
+            if st.form_submit_button("Apply to incidents"):
+                changes = {
+                    col: value
+                    for col, value in {"status": bulk_status, "severity": bulk_sev}.items()
+                    if value != keep
+                }
+                if not changes:
+                    st.warning("⚠️ Pick a new status or severity first.")
+                elif not apply_to_all and not selected_ids:
+                    st.warning("⚠️ Tick some rows in the table first.")
+                else:
+                    # one transaction for all rows, not one commit per incident
+                    if apply_to_all:
+                        changed = bulk_update_incidents(
+                            filters={
+                                "status": sel_status,
+                                "severity": sel_sev,
+                                "category": sel_cat,
+                            },
+                            **changes,
+                        )
+                    else:
+                        changed = bulk_update_incidents(selected_ids, **changes)
+                    st.success(f"✅ {changed} incidents updated.")
+                    st.rerun()
 
     c_left, c_right = st.columns(2)
 
+    # every incident can be picked, not only the ones on this page
+    incident_ids = list_ids("cyber_incidents")
+
     # --- update ---
     with c_left:
         with st.expander("✏️ Update incident"):
-            upd_id = st.selectbox(
-                "Select incident ID", df["incident_id"].values
-            )
-            current = df[df["incident_id"] == upd_id].iloc[0]
-
-            with st.form("update_incident_form"):
-                new_status = st.selectbox(
-                    "Status",
-                    ["Open", "In Progress", "Resolved", "Closed"],
-                    index=["Open", "In Progress", "Resolved", "Closed"].index(
-                        current["status"]
-                    ),
-                )
-                new_severity = st.selectbox(
-                    "Severity",
-                    ["Low", "Medium", "High", "Critical"],
-                    index=["Low", "Medium", "High", "Critical"].index(
-                        current["severity"]
-                    ),
-                )
-
-                upd_btn = st.form_submit_button("Update incident")
-                if upd_btn:
-                    update_incident(
-                        upd_id, status=new_status, severity=new_severity
+            upd_id = st.selectbox("Select incident ID", incident_ids)
+            current = get_row("cyber_incidents", upd_id) if upd_id is not None else None
+
+            if current is None:
+                st.info("No incidents yet.")
+            else:
+                with st.form("update_incident_form"):
+                    new_status = st.selectbox(
+                        "Status",
+                        ["Open", "In Progress", "Resolved", "Closed"],
+                        index=["Open", "In Progress", "Resolved", "Closed"].index(
+                            current["status"]
+                        ),
+                    )
+                    new_severity = st.selectbox(
+                        "Severity",
+                        ["Low", "Medium", "High", "Critical"],
+                        index=["Low", "Medium", "High", "Critical"].index(
+                            current["severity"]
+                        ),
                     )
-                    st.success("✅ Incident updated.")
-                    st.rerun()
+
+                    upd_btn = st.form_submit_button("Update incident")
+                    if upd_btn:
+                        update_incident(
+                            upd_id, status=new_status, severity=new_severity
+                        )
+                        st.success("✅ Incident updated.")
+                        st.rerun()
 
     # --- delete ---
     with c_right:
         with st.expander("🗑️ Delete incident"):
             del_id = st.selectbox(
                 "Select incident ID to delete",
-                df["incident_id"].values,
+                incident_ids,
                 key="del_incident",
             )
-            if st.button("Delete incident", type="primary"):
+            if st.button("Delete incident", type="primary", disabled=del_id is None):
                 delete_incident(del_id)
                 st.success("✅ Incident deleted.")
                 st.rerun()
@@ -226,23 +355,26 @@ with tab_analysis:
     st.subheader("Threat analysis")
 
     st.markdown("#### Phishing focus")
-    phishing_df = df[df["category"] == "Phishing"]
+    # only counts come back from the database, not the incidents themselves
+    phishing_total = summary_count("cyber_incidents", "category", "Phishing")
 
     c1, c2 = st.columns(2)
     with c1:
-        st.metric("Total phishing incidents", len(phishing_df))
+        st.metric("Total phishing incidents", phishing_total)
         st.metric(
             "Open / In progress",
-            len(
-                phishing_df[
-                    phishing_df["status"].isin(["Open", "In Progress"])
-                ]
+            count_where(
+                "cyber_incidents",
+                category="Phishing",
+                status=["Open", "In Progress"],
             ),
         )
 
     with c2:
-        if not phishing_df.empty:
-            ph_status = phishing_df["status"].value_counts()
+        if phishing_total > 0:
+            ph_status = value_counts(
+                "cyber_incidents", "status", filters={"category": ["Phishing"]}
+            )
             fig_ph = px.pie(
                 values=ph_status.values,
                 names=ph_status.index,
@@ -252,6 +384,36 @@ with tab_analysis:
         else:
             st.info("No phishing incidents in current data.")
 
+    st.markdown("#### Incident trend")
+    # both charts read the hourly / daily rollups, not the incidents,
+    # so a year of data draws as fast with 1,000 or 1,000,000 rows
+    trend_by = st.selectbox(
+        "Break down by", ["severity", "category", "status"], key="incident_trend_by"
+    )
+    trend = rollup_trend("cyber_incidents", trend_by)
+
+    if trend.empty:
+        st.info("No incidents with a valid timestamp yet.")
+    else:
+        fig_trend = px.line(
+            trend,
+            x="bucket",
+            y="n",
+            color="value",
+            labels={"bucket": "Day", "n": "Incidents", "value": trend_by.capitalize()},
+            title=f"Incidents per day by {trend_by} (last {TREND_DAYS} days of data)",
+        )
+        st.plotly_chart(fig_trend, use_container_width=True)
+
+        fig_heat = px.imshow(
+            hour_heatmap("cyber_incidents"),
+            labels={"x": "Hour of day", "y": "Weekday", "color": "Incidents"},
+            title="When incidents happen (weekday x hour)",
+            color_continuous_scale="Reds",
+            aspect="auto",
+        )
+        st.plotly_chart(fig_heat, use_container_width=True)
+
     st.markdown("---")
     st.info(
         "💡 Use this tab in your report to discuss which categories and severities "
@@ -5,10 +5,15 @@ from datetime import datetime
 # import helpers from our H.I.V.E. database module
 from hive_database.data_loader import (
     load_datasets_metadata,
+    query_page,
+    distinct_values,
+    get_row,
+    next_id,
     create_dataset,
     update_dataset,
     delete_dataset,
 )
+from hive_database.aggregates import column_stat, value_counts, group_stats
 
 # -----------------------------
 # Page configuration (H.I.V.E.)
@@ -60,6 +65,8 @@ if st.sidebar.button("🚪 Logout", use_container_width=True):
 # -----------------------------
 # Load dataset metadata
 # -----------------------------
+# the per-dataset charts below need every dataset row,
+# the totals and source summaries are worked out by SQLite instead
 df = load_datasets_metadata()
 
 # -----------------------------
@@ -75,10 +82,10 @@ st.markdown("---")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("Total Datasets", len(df))
+    st.metric("Total Datasets", column_stat("datasets_metadata", "dataset_id", "count"))
 
 with col2:
-    total_rows = df["rows"].sum()
+    total_rows = int(column_stat("datasets_metadata", "rows", "sum"))
     st.metric("Total Rows", f"{total_rows:,}")
 
 with col3:
@@ -87,7 +94,7 @@ with col3:
     st.metric("Est. Storage", f"{storage_gb:.2f} GB")
 
 with col4:
-    sources = df["uploaded_by"].nunique()
+    sources = column_stat("datasets_metadata", "uploaded_by", "nunique")
     st.metric("Data Sources", sources)
 
 st.markdown("---")
@@ -123,7 +130,7 @@ with tab_overview:
     # --- pie chart: datasets by source ---
     with col2:
         st.markdown("#### Data Sources")
-        source_counts = df["uploaded_by"].value_counts()
+        source_counts = value_counts("datasets_metadata", "uploaded_by")
         fig2 = px.pie(
             values=source_counts.values,
             names=source_counts.index,
@@ -161,7 +168,7 @@ with tab_datasets:
             new_id = st.number_input(
                 "Dataset ID",
                 min_value=1,
-                value=int(df["dataset_id"].max() + 1),
+                value=next_id("datasets_metadata"),
             )
             new_name = st.text_input("Dataset Name")
             new_rows = st.number_input(
@@ -200,13 +207,15 @@ with tab_datasets:
     # -------------
     st.markdown("#### All Datasets")
 
+    source_options = distinct_values("datasets_metadata", "uploaded_by")
+
     col1, col2 = st.columns(2)
 
     with col1:
         filter_source = st.multiselect(
             "Filter by Source",
-            df["uploaded_by"].unique(),
-            default=df["uploaded_by"].unique(),
+            source_options,
+            default=source_options,
         )
 
     with col2:
@@ -216,13 +225,49 @@ with tab_datasets:
             value=0,
         )
 
-    filtered_df = df[
-        (df["uploaded_by"].isin(filter_source))
-        & (df["rows"] >= min_rows)
-    ]
+    col1, col2 = st.columns(2)
+
+    with col1:
+        sort_by = st.selectbox(
+            "Sort by",
+            ["dataset_id", "name", "rows", "columns", "uploaded_by", "upload_date"],
+        )
+
+    with col2:
+        descending = st.checkbox("Descending", value=False)
+
+    # filter, sort and page inside the database
+    # the list of visited cursors lets us go back a page
+    filter_key = (tuple(filter_source), min_rows, sort_by, descending)
+    if st.session_state.get("dataset_filter_key") != filter_key:
+        st.session_state.dataset_filter_key = filter_key
+        st.session_state.dataset_cursors = [None]
+    cursors = st.session_state.dataset_cursors
+
+    page = query_page(
+        "datasets_metadata",
+        filters={"uploaded_by": filter_source},
+        minimums={"rows": min_rows},
+        sort_by=sort_by,
+        descending=descending,
+        cursor=cursors[-1],
+    )
+    filtered_df = page["rows"]
 
     st.dataframe(filtered_df, use_container_width=True)
 
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Previous", disabled=len(cursors) == 1, key="dataset_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(cursors)} – {page['total']} matching datasets")
+    with col3:
+        if st.button("Next ➡️", disabled=page["next_cursor"] is None, key="dataset_next"):
+            cursors.append(page["next_cursor"])
+            st.rerun()
+
     # -------------
     # update / delete dataset
     # -------------
@@ -233,41 +278,44 @@ with tab_datasets:
         with st.expander("✏️ Update Dataset"):
             update_id = st.selectbox(
                 "Select Dataset ID",
-                df["dataset_id"].values,
+                filtered_df["dataset_id"].tolist(),
             )
-            dataset = df[df["dataset_id"] == update_id].iloc[0]
-
-            with st.form("update_dataset"):
-                upd_name = st.text_input("Name", value=dataset["name"])
-                upd_rows = st.number_input(
-                    "Rows",
-                    value=int(dataset["rows"]),
-                )
-                upd_columns = st.number_input(
-                    "Columns",
-                    value=int(dataset["columns"]),
-                )
-
-                if st.form_submit_button("Update"):
-                    update_dataset(
-                        update_id,
-                        name=upd_name,
-                        rows=upd_rows,
-                        columns=upd_columns,
+            dataset = get_row("datasets_metadata", update_id) if update_id is not None else None
+
+            if dataset is None:
+                st.info("No datasets on this page.")
+            else:
+                with st.form("update_dataset"):
+                    upd_name = st.text_input("Name", value=dataset["name"])
+                    upd_rows = st.number_input(
+                        "Rows",
+                        value=int(dataset["rows"]),
                     )
-                    st.success("✅ Dataset updated in H.I.V.E.")
-                    st.rerun()
+                    upd_columns = st.number_input(
+                        "Columns",
+                        value=int(dataset["columns"]),
+                    )
+
+                    if st.form_submit_button("Update"):
+                        update_dataset(
+                            update_id,
+                            name=upd_name,
+                            rows=upd_rows,
+                            columns=upd_columns,
+                        )
+                        st.success("✅ Dataset updated in H.I.V.E.")
+                        st.rerun()
 
     # --- delete dataset ---
     with col2:
         with st.expander("🗑️ Delete Dataset"):
             delete_id = st.selectbox(
                 "Select Dataset ID to Delete",
-                df["dataset_id"].values,
+                filtered_df["dataset_id"].tolist(),
                 key="delete",
             )
 
-            if st.button("Delete Dataset", type="primary"):
+            if st.button("Delete Dataset", type="primary", disabled=delete_id is None):
                 delete_dataset(delete_id)
                 st.success("✅ Dataset removed from H.I.V.E. Data Lab")
                 st.rerun()
@@ -294,11 +342,13 @@ with tab_analysis:
 
     with col2:
         st.markdown("**Source Dependency (total rows per source)**")
-        source_rows = (
-            df.groupby("uploaded_by")["rows"]
-            .sum()
-            .sort_values(ascending=False)
-        )
+        source_rows = group_stats(
+            "datasets_metadata",
+            by="uploaded_by",
+            aggregations={"rows": ("rows", "sum")},
+            sort_by="rows",
+            descending=True,
+        )["rows"]
         fig = px.bar(
             x=source_rows.index,
             y=source_rows.values,
@@ -335,16 +385,13 @@ with tab_analysis:
     # -------------
     st.markdown("#### 📊 Source Dependency Summary")
 
-    total_by_source = df.groupby("uploaded_by").agg(
-        {
-            "dataset_id": "count",
-            "rows": "sum",
-        }
-    ).rename(
-        columns={
-            "dataset_id": "dataset_count",
-            "rows": "total_rows",
-        }
+    total_by_source = group_stats(
+        "datasets_metadata",
+        by="uploaded_by",
+        aggregations={
+            "dataset_count": ("dataset_id", "count"),
+            "total_rows": ("rows", "sum"),
+        },
     )
 
     st.dataframe(total_by_source, use_container_width=True)
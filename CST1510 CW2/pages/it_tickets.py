@@ -4,11 +4,21 @@ import plotly.graph_objects as go
 from datetime import datetime
 
 from hive_database.data_loader import (
-    load_it_tickets,
+    query_page,
+    search_page,
+    distinct_values,
+    get_row,
+    get_data_version,
+    list_ids,
+    next_id,
     create_ticket,
     update_ticket,
     delete_ticket,
+    bulk_update_tickets,
 )
+from hive_database.aggregates import group_stats, box_stats
+from hive_database.rollups import TREND_DAYS, hour_heatmap, rollup_trend
+from hive_database.summary import summary_count, summary_counts, summary_mean_hours
 
 # -----------------------------
 # Page configuration (H.I.V.E.)
@@ -59,12 +69,6 @@ if st.sidebar.button(" Logout", use_container_width=True):
     st.session_state.role = None
     st.switch_page("login.py")
 
-# -----------------------------
-# Load IT ticket data
-# -----------------------------
-# here we read all tickets from database (or CSV inside the loader)
-df = load_it_tickets()
-
 # -----------------------------
 # Page header
 # -----------------------------
@@ -77,19 +81,20 @@ st.markdown("---")
 # -----------------------------
 col1, col2, col3, col4 = st.columns(4)
 
+# tiles read the summary counters that triggers keep up to date
 with col1:
-    st.metric("Total Tickets", len(df))
+    st.metric("Total Tickets", summary_count("it_tickets"))
 
 with col2:
-    open_tickets = len(df[df["status"] == "Open"])
+    open_tickets = summary_count("it_tickets", "status", "Open")
     st.metric("Open Tickets", open_tickets)
 
 with col3:
-    avg_resolution = df["resolution_time_hours"].mean()
+    avg_resolution = summary_mean_hours("it_tickets")
     st.metric("Avg Resolution", f"{avg_resolution:.1f} hrs")
 
 with col4:
-    critical = len(df[df["priority"] == "Critical"])
+    critical = summary_count("it_tickets", "priority", "Critical")
     st.metric("Critical Tickets", critical)
 
 st.markdown("---")
@@ -112,7 +117,7 @@ with tab_overview:
     # --- chart: tickets by priority ---
     with col1:
         st.markdown("#### Tickets by Priority")
-        priority_counts = df["priority"].value_counts()
+        priority_counts = summary_counts("it_tickets", "priority")
         fig1 = px.bar(
             x=priority_counts.index,
             y=priority_counts.values,
@@ -124,7 +129,7 @@ with tab_overview:
     # --- chart: tickets by status ---
     with col2:
         st.markdown("#### Ticket Status")
-        status_counts = df["status"].value_counts()
+        status_counts = summary_counts("it_tickets", "status")
         fig2 = px.pie(
             values=status_counts.values,
             names=status_counts.index,
@@ -134,7 +139,7 @@ with tab_overview:
 
     # --- chart: tickets per staff member ---
     st.markdown("#### Staff Workload in H.I.V.E. Tech Cell")
-    staff_counts = df["assigned_to"].value_counts()
+    staff_counts = summary_counts("it_tickets", "assigned_to")
     fig3 = px.bar(
         x=staff_counts.index,
         y=staff_counts.values,
@@ -158,7 +163,7 @@ with tab_tickets:
             new_id = st.number_input(
                 "Ticket ID",
                 min_value=1,
-                value=int(df["ticket_id"].max() + 1)
+                value=next_id("it_tickets")
             )
             new_priority = st.selectbox(
                 "Priority",
@@ -202,94 +207,214 @@ with tab_tickets:
     # -------------
     st.markdown("#### All Tickets in Queue")
 
-    # simple filters
+    # search the ticket descriptions (full-text index in the database)
+    search_text = st.text_input(
+        "🔍 Search Descriptions",
+        placeholder="e.g. printer, vpn, outlook",
+    )
+
+    # simple filters (options come straight from the database)
+    status_options = distinct_values("it_tickets", "status")
+    priority_options = distinct_values("it_tickets", "priority")
+    staff_options = distinct_values("it_tickets", "assigned_to")
+
     col1, col2, col3 = st.columns(3)
     with col1:
         filter_status = st.multiselect(
             "Filter by Status",
-            df["status"].unique(),
-            default=df["status"].unique(),
+            status_options,
+            default=status_options,
         )
     with col2:
         filter_priority = st.multiselect(
             "Filter by Priority",
-            df["priority"].unique(),
-            default=df["priority"].unique(),
+            priority_options,
+            default=priority_options,
         )
     with col3:
         filter_staff = st.multiselect(
             "Filter by Tech Agent",
-            df["assigned_to"].unique(),
-            default=df["assigned_to"].unique(),
+            staff_options,
+            default=staff_options,
+        )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        sort_by = st.selectbox(
+            "Sort by",
+            ["ticket_id", "created_at", "priority", "status", "assigned_to",
+             "resolution_time_hours"],
+        )
+    with col2:
+        descending = st.checkbox("Descending", value=False)
+
+    # the database filters, sorts and cuts one page for us
+    # we remember the cursor of each visited page so "Previous" works
+    filter_key = (
+        search_text, tuple(filter_status), tuple(filter_priority), tuple(filter_staff),
+        sort_by, descending,
+    )
+    if st.session_state.get("ticket_filter_key") != filter_key:
+        st.session_state.ticket_filter_key = filter_key
+        st.session_state.ticket_cursors = [None]
+    cursors = st.session_state.ticket_cursors
+
+    filters = {
+        "status": filter_status,
+        "priority": filter_priority,
+        "assigned_to": filter_staff,
+    }
+    if search_text.strip():
+        # ordered by the search (best match or newest first), not the sort options
+        page = search_page("it_tickets", search_text, filters=filters, cursor=cursors[-1])
+    else:
+        page = query_page(
+            "it_tickets",
+            filters=filters,
+            sort_by=sort_by,
+            descending=descending,
+            cursor=cursors[-1],
         )
+    filtered_df = page["rows"]
+
+    # tick rows in the table to change them all together (see bulk update).
+    # The ticks are row positions, so a new key (other filters, other page,
+    # or any change to the tickets) starts with nothing ticked.
+    table_event = st.dataframe(
+        filtered_df,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=(f"ticket_table_{hash(filter_key)}_{len(cursors)}"
+             f"_{get_data_version('it_tickets')}"),
+    )
+    ticked = [i for i in table_event.selection.rows if i < len(filtered_df)]
+    selected_ids = filtered_df.iloc[ticked]["ticket_id"].tolist()
 
-    # apply filters to dataframe
-    filtered_df = df[
-        (df["status"].isin(filter_status))
-        & (df["priority"].isin(filter_priority))
-        & (df["assigned_to"].isin(filter_staff))
-    ]
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Previous", disabled=len(cursors) == 1, key="ticket_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        order = {True: " (best match first)", False: " (newest first)"}.get(page.get("ranked"), "")
+        st.caption(f"Page {len(cursors)} – {page['total']} matching tickets{order}")
+    with col3:
+        if st.button("Next ➡️", disabled=page["next_cursor"] is None, key="ticket_next"):
+            cursors.append(page["next_cursor"])
+            st.rerun()
 
-    st.dataframe(filtered_df, use_container_width=True)
+    # -------------
+    # bulk update
+    # -------------
+    with st.expander(f"🧰 Bulk Update ({len(selected_ids)} selected)"):
+        with st.form("bulk_ticket_form"):
+            keep = "(keep)"
+            bulk_status = st.selectbox(
+                "New Status",
+                [keep, "Open", "In Progress", "Resolved", "Waiting for User"],
+            )
+            bulk_priority = st.selectbox(
+                "New Priority",
+                [keep, "Low", "Medium", "High", "Critical"],
+            )
+            # bulk updates go by the filters only, so not while searching
+            apply_to_all = st.checkbox(
+                f"Apply to all {page['total']} tickets matching the filters",
+                disabled=bool(search_text.strip()),
+                help="Clear the search box to update by filters.",
+            )
+
+            if st.form_submit_button("Apply to Tickets"):
+                changes = {
+                    col: value
+                    for col, value in {"status": bulk_status, "priority": bulk_priority}.items()
+                    if value != keep
+                }
+                if not changes:
+                    st.warning("⚠️ Pick a new status or priority first")
+                elif not apply_to_all and not selected_ids:
+                    st.warning("⚠️ Tick some tickets in the table first")
+                else:
+                    # all tickets change inside one transaction
+                    if apply_to_all:
+                        changed = bulk_update_tickets(
+                            filters={
+                                "status": filter_status,
+                                "priority": filter_priority,
+                                "assigned_to": filter_staff,
+                            },
+                            **changes,
+                        )
+                    else:
+                        changed = bulk_update_tickets(selected_ids, **changes)
+                    st.success(f"✅ {changed} H.I.V.E. tickets updated")
+                    st.rerun()
 
     # -------------
     # update / delete
     # -------------
     col1, col2 = st.columns(2)
 
+    # every ticket can be picked, not only the ones on this page
+    ticket_ids = list_ids("it_tickets")
+
     # --- update ticket ---
     with col1:
         with st.expander(" Update Ticket"):
             update_id = st.selectbox(
                 "Select Ticket ID",
-                df["ticket_id"].values
+                ticket_ids
             )
-            ticket = df[df["ticket_id"] == update_id].iloc[0]
-
-            with st.form("update_ticket"):
-                status_options = [
-                    "Open",
-                    "In Progress",
-                    "Resolved",
-                    "Waiting for User",
-                ]
-                priority_options = ["Low", "Medium", "High", "Critical"]
-
-                upd_status = st.selectbox(
-                    "Status",
-                    status_options,
-                    index=status_options.index(ticket["status"]),
-                )
-                upd_priority = st.selectbox(
-                    "Priority",
-                    priority_options,
-                    index=priority_options.index(ticket["priority"]),
-                )
-                upd_resolution = st.number_input(
-                    "Resolution Time (hrs)",
-                    value=float(ticket["resolution_time_hours"]),
-                )
-
-                if st.form_submit_button("Update"):
-                    update_ticket(
-                        update_id,
-                        status=upd_status,
-                        priority=upd_priority,
-                        resolution_time_hours=upd_resolution,
+            ticket = get_row("it_tickets", update_id) if update_id is not None else None
+
+            if ticket is None:
+                st.info("No tickets yet.")
+            else:
+                with st.form("update_ticket"):
+                    status_options = [
+                        "Open",
+                        "In Progress",
+                        "Resolved",
+                        "Waiting for User",
+                    ]
+                    priority_options = ["Low", "Medium", "High", "Critical"]
+
+                    upd_status = st.selectbox(
+                        "Status",
+                        status_options,
+                        index=status_options.index(ticket["status"]),
+                    )
+                    upd_priority = st.selectbox(
+                        "Priority",
+                        priority_options,
+                        index=priority_options.index(ticket["priority"]),
+                    )
+                    upd_resolution = st.number_input(
+                        "Resolution Time (hrs)",
+                        value=float(ticket["resolution_time_hours"]),
                     )
-                    st.success("✅ Ticket updated for H.I.V.E. Tech Cell")
-                    st.rerun()
+
+                    if st.form_submit_button("Update"):
+                        update_ticket(
+                            update_id,
+                            status=upd_status,
+                            priority=upd_priority,
+                            resolution_time_hours=upd_resolution,
+                        )
+                        st.success("✅ Ticket updated for H.I.V.E. Tech Cell")
+                        st.rerun()
 
     # --- delete ticket ---
     with col2:
         with st.expander("🗑️ Delete Ticket"):
             delete_id = st.selectbox(
                 "Select Ticket ID to Delete",
-                df["ticket_id"].values,
+                ticket_ids,
                 key="delete",
             )
 
-            if st.button("Delete Ticket", type="primary"):
+            if st.button("Delete Ticket", type="primary", disabled=delete_id is None):
                 delete_ticket(delete_id)
                 st.success("✅ Ticket removed from H.I.V.E. queue")
                 st.rerun()
@@ -305,21 +430,15 @@ with tab_analysis:
     # -------------
     st.markdown("####  Tech Agent Performance")
 
-    staff_performance = df.groupby("assigned_to").agg(
-        {
-            "ticket_id": "count",
-            "resolution_time_hours": "mean",
-        }
-    ).rename(
-        columns={
-            "ticket_id": "total_tickets",
-            "resolution_time_hours": "avg_resolution_time",
-        }
-    )
-
-    staff_performance = staff_performance.sort_values(
-        "avg_resolution_time",
-        ascending=False,
+    staff_performance = group_stats(
+        "it_tickets",
+        by="assigned_to",
+        aggregations={
+            "total_tickets": ("ticket_id", "count"),
+            "avg_resolution_time": ("resolution_time_hours", "mean"),
+        },
+        sort_by="avg_resolution_time",
+        descending=True,
     )
 
     col1, col2 = st.columns(2)
@@ -354,11 +473,13 @@ with tab_analysis:
     # -------------
     st.markdown("####  Status Bottleneck Analysis")
 
-    status_resolution = (
-        df.groupby("status")["resolution_time_hours"]
-        .mean()
-        .sort_values(ascending=False)
-    )
+    status_resolution = group_stats(
+        "it_tickets",
+        by="status",
+        aggregations={"resolution_time_hours": ("resolution_time_hours", "mean")},
+        sort_by="resolution_time_hours",
+        descending=True,
+    )["resolution_time_hours"]
 
     col1, col2 = st.columns(2)
 
@@ -388,18 +509,76 @@ with tab_analysis:
     # -------------
     st.markdown("####  Priority vs Resolution Time")
 
-    fig = px.box(
-        df,
-        x="priority",
-        y="resolution_time_hours",
-        labels={
-            "priority": "Priority",
-            "resolution_time_hours": "Resolution Time (hours)",
-        },
+    # quartiles come from SQLite, so we draw the boxes from 5 numbers each
+    # instead of sending every ticket to plotly
+    box = box_stats("it_tickets", "resolution_time_hours", by="priority")
+
+    fig = go.Figure(
+        go.Box(
+            x=box.index,
+            lowerfence=box["min"],
+            q1=box["q1"],
+            median=box["median"],
+            q3=box["q3"],
+            upperfence=box["max"],
+        )
+    )
+    fig.update_layout(
         title="Resolution Time Distribution by Priority",
+        xaxis_title="Priority",
+        yaxis_title="Resolution Time (hours)",
     )
     st.plotly_chart(fig, use_container_width=True)
 
+    # -------------
+    # ticket trend
+    # -------------
+    st.markdown("####  Ticket Trend")
+
+    # the charts only read the hourly / daily rollups, never the tickets,
+    # so they stay as fast when the queue grows
+    trend_by = st.selectbox(
+        "Break Down By", ["priority", "status"], key="ticket_trend_by"
+    )
+    trend = rollup_trend("it_tickets", trend_by)
+
+    if trend.empty:
+        st.info("No tickets with a valid creation date yet.")
+    else:
+        fig = px.line(
+            trend,
+            x="bucket",
+            y="n",
+            color="value",
+            labels={"bucket": "Day", "n": "Tickets", "value": trend_by.capitalize()},
+            title=f"Tickets Created per Day by {trend_by.capitalize()} "
+                  f"(last {TREND_DAYS} days of data)",
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            fig = px.imshow(
+                hour_heatmap("it_tickets"),
+                labels={"x": "Hour of Day", "y": "Weekday", "color": "Tickets"},
+                title="When Tickets Come In",
+                color_continuous_scale="Blues",
+                aspect="auto",
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+        with col2:
+            daily = rollup_trend("it_tickets")
+            fig = px.line(
+                daily,
+                x="bucket",
+                y="avg_hours",
+                labels={"bucket": "Day", "avg_hours": "Avg Resolution Time (hrs)"},
+                title="Average Resolution Time of the Tickets Created Each Day",
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
 # footer
 st.markdown("---")
 st.caption(" H.I.V.E. Tech Cell – Infrastructure Support Module")